@@ -0,0 +1,136 @@
+"""
+Running career totals kept up to date one exam change at a time.
+"""
+
+from calculations import AcademicCalculator
+
+
+def _empty_totals():
+    """Return zeroed per-status totals, shaped like get_exam_summary() values."""
+    return {'count': 0, 'credits': 0, 'graded_count': 0,
+            'graded_credits': 0, 'grade_sum': 0, 'weighted_grade_sum': 0}
+
+
+class CareerAggregates:
+    """
+    Per-status exam totals and the passed-grade histogram, maintained
+    incrementally.
+
+    The totals are loaded from the database once and then adjusted in O(1)
+    by the DatabaseManager exam hooks (add_exam, update_exam, delete_exam),
+    so views can read averages, credits and the histogram without touching
+    the exam list. Changes the hooks did not see (writes from other
+    connections) are caught through the change log; bulk writes and rolled
+    back transactions call exams_reset(). Either way the totals are
+    reloaded on the next read.
+    """
+
+    def __init__(self, db_manager):
+        """
+        Args:
+            db_manager (DatabaseManager): Database to track; the aggregates
+                register themselves as one of its exam observers
+        """
+        self.db_manager = db_manager
+        # Data version the totals reflect; None forces a reload
+        self.version = None
+        self.totals = {}
+        self.grade_counts = {}
+        db_manager.add_exam_observer(self)
+
+    def reload(self):
+        """Recompute every total from the database."""
+        # Read the version first: later changes then trigger another reload
+        self.version = self.db_manager.get_data_version()
+        self.totals = self.db_manager.get_exam_summary()
+        self.grade_counts = self.db_manager.get_grade_distribution()
+
+    def _sync(self):
+        """Reload the totals if the exams changed behind the hooks' back."""
+        if self.version is not None:
+            changes = self.db_manager.get_changes_since(self.version, ('exams',))
+            if changes is not None and not (changes['exams']['upserted'] or changes['exams']['deleted']):
+                self.version = changes['version']
+                return
+        self.reload()
+
+    def exam_changed(self, old, new):
+        """
+        Apply a single-exam change (hook called by DatabaseManager).
+
+        Args:
+            old (dict or Exam): Exam before the change, None if it was added
+            new (dict or Exam): Exam after the change, None if it was deleted
+        """
+        if self.version is None:
+            return  # Reloaded on the next read anyway
+
+        # Only apply the delta if this is the sole exam change since the
+        # totals were last in sync; anything else means a full reload
+        exam_id = (new or old)['id']
+        changes = self.db_manager.get_changes_since(self.version, ('exams',))
+        if changes is None or (changes['exams']['upserted'] | changes['exams']['deleted']) != {exam_id}:
+            self.version = None
+            return
+
+        if old is not None:
+            self._add(old, -1)
+        if new is not None:
+            self._add(new, 1)
+        self.version = changes['version']
+
+    def exams_reset(self):
+        """Forget the totals after a bulk change (hook called by DatabaseManager)."""
+        self.version = None
+
+    def _add(self, exam, sign):
+        """Add (sign=1) or remove (sign=-1) one exam's contribution."""
+        status = exam['status']
+        credits = exam['credits']
+        grade = exam['grade']
+
+        totals = self.totals.setdefault(status, _empty_totals())
+        totals['count'] += sign
+        totals['credits'] += sign * credits
+
+        if grade is not None:
+            totals['graded_count'] += sign
+            totals['graded_credits'] += sign * credits
+            totals['grade_sum'] += sign * grade
+            totals['weighted_grade_sum'] += sign * grade * credits
+
+            if status == 'passed':
+                count = self.grade_counts.get(grade, 0) + sign
+                if count:
+                    self.grade_counts[grade] = count
+                else:
+                    del self.grade_counts[grade]
+
+    def summary(self):
+        """
+        Get the per-status totals.
+
+        Returns:
+            dict: Same structure as DatabaseManager.get_exam_summary()
+        """
+        self._sync()
+        return {status: dict(totals) for status, totals in self.totals.items()}
+
+    def grade_distribution(self):
+        """
+        Get the number of passed exams for each grade.
+
+        Returns:
+            dict: Same structure as DatabaseManager.get_grade_distribution()
+        """
+        self._sync()
+        return dict(self.grade_counts)
+
+    def statistics(self):
+        """
+        Get the main career statistics.
+
+        Returns:
+            dict: See AcademicCalculator.calculate_statistics_from_summary()
+        """
+        return AcademicCalculator.calculate_statistics_from_summary(self.summary())
@@ -6,71 +6,139 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushBut
 from PyQt5.QtCore import Qt, pyqtSlot, pyqtSignal
 from PyQt5.QtGui import QFont, QColor
 
-import matplotlib
-matplotlib.use('Qt5Agg')
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+import numpy as np
 
+from aggregates import CareerAggregates
 from calculations import AcademicCalculator
+from charts import ChartCanvas
+from db_worker import AsyncDatabase
+from trends import (TREND_MAX_POINTS, cumulative_average, lttb, rolling_average,
+                    weighted_cumulative_average)
 
-class LineChartWidget(FigureCanvas):
+
+def _fetch_target_exams(db_manager):
+    """Load the exams the target calculation needs (runs on the database worker)."""
+    planned_exams = db_manager.get_planned_exams()
+    # Required grades only depend on passed and planned exams
+    return db_manager.get_passed_exams() + planned_exams, planned_exams
+
+
+def _fetch_analytics(db_manager):
+    """Load everything the analytics tab shows (runs on the database worker)."""
+    return {
+        # Read the version first: later changes are then re-applied, never lost
+        'version': db_manager.get_data_version(),
+        'passed_exams': db_manager.get_passed_exams(),
+        'planned_exams': db_manager.get_planned_exams(),
+    }
+
+class LineChartWidget(ChartCanvas):
     """Widget for displaying trend charts."""
     
     def __init__(self, parent=None, width=5, height=4, dpi=100):
-        self.fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = self.fig.add_subplot(111)
-        super(LineChartWidget, self).__init__(self.fig)
-        self.setParent(parent)
+        super(LineChartWidget, self).__init__(parent, width, height, dpi)
         
-        FigureCanvas.setSizePolicy(self,
-                                  QSizePolicy.Expanding,
-                                  QSizePolicy.Expanding)
-        FigureCanvas.updateGeometry(self)
-        
-    def update_chart(self, exams, title, y_label):
-        """Update the line chart with new data."""
-        self.axes.clear()
+        # One line per series, created once and updated with set_data()
+        self.grade_line = self._add_line('o-', 'Grades')
+        self.cumulative_line = self._add_line('r--', 'Cumulative Average')
+        self.weighted_line = self._add_line('g--', 'Weighted Cumulative Average')
+        self.rolling_line = self._add_line('m-', 'Rolling Average')
+        self.empty_text = self.add_animated(self.axes.text(
+            0.5, 0.5, "No data to display", transform=self.axes.transAxes,
+            horizontalalignment='center', verticalalignment='center'))
         
+        self.axes.set_xlabel('Exams (chronological)')
+        self.tick_labels = []
+        self.legend_labels = []
+        
+    def _add_line(self, style, label):
+        """Create an empty, hidden line for one series."""
+        line, = self.axes.plot([], [], style, label=label, visible=False)
+        return self.add_animated(line)
+        
+    def update_chart(self, exams, title, y_label, rolling_window=None, weighted=False,
+                     max_points=TREND_MAX_POINTS):
+        """
+        Update the line chart with new data.
+        
+        Args:
+            exams (list): Exams to plot; only passed, dated and graded ones are used
+            title (str): Chart title
+            y_label (str): y axis label
+            rolling_window (int, optional): Also plot the average of the last
+                rolling_window exams
+            weighted (bool): Also plot the credit-weighted cumulative average
+            max_points (int): Most points drawn per line; longer histories are
+                downsampled (LTTB)
+        """
         # Sort exams by date
-        sorted_exams = sorted([e for e in exams if e['date'] and e['status'] == 'passed'], 
+        sorted_exams = sorted([e for e in exams if e['date'] and e['status'] == 'passed'
+                               and e['grade'] is not None], 
                              key=lambda x: x['date'])
         
-        if not sorted_exams:
-            self.axes.text(0.5, 0.5, "No data to display", 
-                          horizontalalignment='center', verticalalignment='center')
-            self.draw()
-            return
-            
         dates = [e['date'] for e in sorted_exams]
-        grades = [e['grade'] for e in sorted_exams]
-        
-        # Calculate cumulative average at each point
-        cum_grades = []
-        for i in range(len(grades)):
-            cum_grades.append(sum(grades[:i+1]) / (i+1))
-        
-        # Plot grades and cumulative average
-        self.axes.plot(range(len(dates)), grades, 'o-', label='Grades')
-        self.axes.plot(range(len(dates)), cum_grades, 'r--', label='Cumulative Average')
+        grades = np.fromiter((e['grade'] for e in sorted_exams), np.float64, len(sorted_exams))
+        positions = np.arange(len(grades))
+        
+        # Trend series from prefix sums, O(n)
+        series = {self.grade_line: grades, self.cumulative_line: cumulative_average(grades)}
+        if weighted:
+            credits = np.fromiter((e['credits'] for e in sorted_exams), np.float64, len(sorted_exams))
+            series[self.weighted_line] = weighted_cumulative_average(grades, credits)
+        if rolling_window:
+            series[self.rolling_line] = rolling_average(grades, rolling_window)
+            self.rolling_line.set_label(f'Rolling Average ({rolling_window})')
+            
+        # Update each line in place, downsampled to at most max_points points
+        for line in (self.grade_line, self.cumulative_line, self.weighted_line, self.rolling_line):
+            values = series.get(line)
+            line.set_visible(values is not None and len(values) > 0)
+            if line.get_visible():
+                kept = lttb(positions, values, max_points)
+                line.set_data(positions[kept], values[kept])
+        self.grade_line.set_marker('o' if len(grades) <= max_points else '')
+        self.empty_text.set_visible(not len(grades))
+        
+        # Everything below is part of the background: only redraw it if it changed
+        old_limits = (self.axes.get_xlim(), self.axes.get_ylim())
+        self.axes.relim(visible_only=True)
+        self.axes.autoscale_view()
+        full = (self.axes.get_xlim(), self.axes.get_ylim()) != old_limits
         
         # Add labels and title
-        self.axes.set_xlabel('Exams (chronological)')
-        self.axes.set_ylabel(y_label)
-        self.axes.set_title(title)
+        if self.axes.get_title() != title or self.axes.get_ylabel() != y_label:
+            self.axes.set_title(title)
+            self.axes.set_ylabel(y_label)
+            self.invalidate_layout()
+            full = True
         
         # Set x-ticks
         if len(dates) > 10:
             # Only show some of the dates if there are too many
             step = len(dates) // 10 + 1
-            self.axes.set_xticks(range(0, len(dates), step))
-            self.axes.set_xticklabels([dates[i] for i in range(0, len(dates), step)], rotation=45)
         else:
-            self.axes.set_xticks(range(len(dates)))
-            self.axes.set_xticklabels(dates, rotation=45)
-        
-        self.axes.legend()
-        self.fig.tight_layout()
-        self.draw()
+            step = 1
+        tick_labels = dates[::step]
+        if tick_labels != self.tick_labels:
+            self.tick_labels = tick_labels
+            self.axes.set_xticks(range(0, len(dates), step))
+            self.axes.set_xticklabels(tick_labels, rotation=45)
+            self.invalidate_layout()
+            full = True
+        
+        legend_labels = [line.get_label() for line in series if line.get_visible()]
+        if legend_labels != self.legend_labels:
+            self.legend_labels = legend_labels
+            legend = self.axes.get_legend()
+            if legend:
+                self.animated_artists.remove(legend)
+                legend.remove()
+            if legend_labels:
+                # Animated as well, so it stays above the blitted lines
+                self.add_animated(self.axes.legend(handles=[line for line in series if line.get_visible()]))
+            full = True
+            
+        self.refresh(full)
 
 
 class GradeEditDialog(QDialog):
@@ -150,10 +218,13 @@ class CustomGradeSpinBox(QDoubleSpinBox):
 class TargetCalculationWidget(QWidget):
     """Widget for calculating target grades needed to reach desired average."""
     
-    def __init__(self, db_manager, calculator):
+    def __init__(self, db_manager, calculator, async_db=None):
         super(TargetCalculationWidget, self).__init__()
         self.db_manager = db_manager
         self.calculator = calculator
+        self.async_db = async_db or AsyncDatabase(db_manager, threaded=False, parent=self)
+        self.exams = []            # Passed and planned exams of the last load
+        self.planned_exams = []    # Planned exams of the last load
         self.required_grades = {}  # Store the current required grades
         self.custom_grades = {}    # Store custom grades for manual mode
         self.mode = "auto"         # Default mode: "auto" or "manual"
@@ -181,7 +252,7 @@ class TargetCalculationWidget(QWidget):
         self.target_avg_input.setMaximum(110)
         
         # Get current target from settings
-        target_avg = int(self.db_manager.get_setting('target_average', 100))
+        target_avg = self.db_manager.get_int('target_average', 100)
         self.target_avg_input.setValue(target_avg)
         
         form_layout.addRow("Media Obiettivo (scala 110):", self.target_avg_input)
@@ -252,8 +323,8 @@ class TargetCalculationWidget(QWidget):
         
         self.setLayout(layout)
         
-        # Initial calculation
-        self.calculate_targets()
+        # The exams, and with them the initial calculation, are supplied
+        # by AnalyticsWidget.refresh_data through set_exams()
         
     def handle_grade_cell_click(self, row, column):
         """Handle click on a grade cell to edit the target grade."""
@@ -270,7 +341,7 @@ class TargetCalculationWidget(QWidget):
             current_grade_value = current_grade_value[0]  # Extract grade from tuple
             
         # Show edit dialog
-        max_grade = int(self.db_manager.get_setting('max_grade', 30))
+        max_grade = self.db_manager.get_int('max_grade', 30)
         dialog = GradeEditDialog(self, exam['name'], current_grade_value, max_grade)
         
         if dialog.exec_() == QDialog.Accepted:
@@ -291,11 +362,11 @@ class TargetCalculationWidget(QWidget):
         
         # Recalculate grades with updated fixed grades
         target_avg = self.target_avg_input.value()
-        max_grade = int(self.db_manager.get_setting('max_grade', 30))
+        max_grade = self.db_manager.get_int('max_grade', 30)
         target_avg_scaled = (target_avg / 110) * max_grade
         
-        all_exams = self.db_manager.get_all_exams()
-        planned_exams = self.db_manager.get_planned_exams()
+        all_exams = self.exams
+        planned_exams = self.planned_exams
         
         self.required_grades = self.calculator.calculate_required_grades(
             all_exams, planned_exams, target_avg_scaled, max_grade, fixed_grades)
@@ -314,11 +385,11 @@ class TargetCalculationWidget(QWidget):
     def update_with_fixed_grade(self, exam_id, fixed_grade):
         """Update calculation with a manually fixed grade."""
         target_avg = self.target_avg_input.value()
-        max_grade = int(self.db_manager.get_setting('max_grade', 30))
+        max_grade = self.db_manager.get_int('max_grade', 30)
         target_avg_scaled = (target_avg / 110) * max_grade
         
-        all_exams = self.db_manager.get_all_exams()
-        planned_exams = self.db_manager.get_planned_exams()
+        all_exams = self.exams
+        planned_exams = self.planned_exams
         
         # Calculate new required grades with the fixed grade
         self.required_grades = self.calculator.recalculate_with_fixed_grade(
@@ -330,9 +401,9 @@ class TargetCalculationWidget(QWidget):
     def update_results_table(self):
         """Update the results table with current required grades."""
         self.results_table.setRowCount(0)
-        all_exams = self.db_manager.get_all_exams()
-        planned_exams = self.db_manager.get_planned_exams()
-        max_grade = int(self.db_manager.get_setting('max_grade', 30))
+        all_exams = self.exams
+        planned_exams = self.planned_exams
+        max_grade = self.db_manager.get_int('max_grade', 30)
         
         if not planned_exams:
             self.summary_label.setText("Non ci sono esami pianificati per cui calcolare gli obiettivi.")
@@ -538,8 +609,7 @@ class TargetCalculationWidget(QWidget):
             
             # Initialize custom grades from current grades when switching to manual mode
             if self.mode == "manual":
-                all_exams = self.db_manager.get_all_exams()
-                planned_exams = self.db_manager.get_planned_exams()
+                planned_exams = self.planned_exams
                 
                 # Initialize with current calculated or fixed grades
                 self.custom_grades = {}
@@ -563,9 +633,9 @@ class TargetCalculationWidget(QWidget):
         
     def update_manual_mode_summary(self):
         """Update the summary label with the projected average based on custom grades."""
-        all_exams = self.db_manager.get_all_exams()
-        planned_exams = self.db_manager.get_planned_exams()
-        max_grade = int(self.db_manager.get_setting('max_grade', 30))
+        all_exams = self.exams
+        planned_exams = self.planned_exams
+        max_grade = self.db_manager.get_int('max_grade', 30)
         
         # Get passed exams for current weight calculation
         passed_exams = [e for e in all_exams if e['status'] == 'passed']
@@ -592,12 +662,23 @@ class TargetCalculationWidget(QWidget):
         # Save target to settings
         self.db_manager.update_setting('target_average', str(target_avg))
         
-        # Get all exams
-        all_exams = self.db_manager.get_all_exams()
-        planned_exams = self.db_manager.get_planned_exams()
+        # Reload the exams in the background; set_exams recalculates on arrival
+        self.async_db.call(_fetch_target_exams, callback=self.set_exams, key='target_exams')
+        
+    def set_exams(self, exams):
+        """
+        Recalculate the required grades for a new set of exams.
+        
+        Args:
+            exams (tuple): (passed and planned exams, planned exams)
+        """
+        self.exams, self.planned_exams = exams
+        all_exams = self.exams
+        planned_exams = self.planned_exams
+        target_avg = self.target_avg_input.value()
         
         # Get max grade setting
-        max_grade = int(self.db_manager.get_setting('max_grade', 30))
+        max_grade = self.db_manager.get_int('max_grade', 30)
         
         # Convert target to max_grade scale
         target_avg_scaled = (target_avg / 110) * max_grade
@@ -738,6 +819,8 @@ class CompletionPredictionWidget(QWidget):
         
     def update_prediction(self, passed_exams, planned_exams, total_credits_required):
         """Update the prediction with new data."""
+        self.total_credits_required = total_credits_required
+        
         # Calculate base prediction
         self.prediction_data = self.calculator.calculate_completion_prediction(
             passed_exams, planned_exams, total_credits_required)
@@ -770,7 +853,7 @@ class CompletionPredictionWidget(QWidget):
         months_text = f"{self.prediction_data['months_remaining']} mesi"
         self.prediction_labels["Tempo rimasto:"].setText(months_text)
         
-        total_required = int(self.db_manager.get_setting('total_credits', 180))
+        total_required = self.total_credits_required
         credits_text = f"{int(self.prediction_data['credits_needed'])} / {total_required}"
         self.prediction_labels["CFU rimasti:"].setText(credits_text)
         
@@ -794,10 +877,13 @@ class CompletionPredictionWidget(QWidget):
 class AnalyticsWidget(QWidget):
     """Widget for academic analytics and projections."""
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, async_db=None, aggregates=None):
         super(AnalyticsWidget, self).__init__()
         self.db_manager = db_manager
+        self.async_db = async_db or AsyncDatabase(db_manager, threaded=False, parent=self)
+        self.aggregates = aggregates or CareerAggregates(db_manager)
         self.calculator = AcademicCalculator()
+        self.data_version = None
         self.init_ui()
         self.refresh_data()
         
@@ -857,7 +943,7 @@ class AnalyticsWidget(QWidget):
         scroll_layout.addWidget(self.trend_chart)
         
         # Target calculation widget
-        self.target_widget = TargetCalculationWidget(self.db_manager, self.calculator)
+        self.target_widget = TargetCalculationWidget(self.db_manager, self.calculator, self.async_db)
         scroll_layout.addWidget(self.target_widget)
         
         # Completion prediction widget
@@ -870,28 +956,46 @@ class AnalyticsWidget(QWidget):
         main_layout.addWidget(scroll_area)
         self.setLayout(main_layout)
         
+    @pyqtSlot()
+    def apply_changes(self):
+        """Refresh the analytics only if exams or settings changed since the last refresh."""
+        if self.data_version is None or self.async_db.is_pending('analytics'):
+            # A load is still in flight and may predate this change
+            self.refresh_data()
+            return
+            
+        changes = self.db_manager.get_changes_since(self.data_version, ('exams', 'settings'))
+        if changes is None or any(changes[entity]['upserted'] or changes[entity]['deleted']
+                                  for entity in ('exams', 'settings')):
+            self.refresh_data()
+        else:
+            self.data_version = changes['version']
+            
     @pyqtSlot()
     def refresh_data(self):
-        """Refresh the analytics with the latest data."""
-        # Get all exams
-        all_exams = self.db_manager.get_all_exams()
-        passed_exams = self.db_manager.get_passed_exams()
+        """Refresh the analytics with the latest data once the query completes."""
+        # The statistics come from the running totals and can be shown now;
+        # the charts and projections wait for the exam lists
+        self.show_statistics()
+        self.async_db.call(_fetch_analytics, callback=self._show_data, key='analytics')
         
-        # Get settings
-        total_required_credits = int(self.db_manager.get_setting('total_credits', 180))
-        max_grade = int(self.db_manager.get_setting('max_grade', 30))
+    def show_statistics(self):
+        """Update the statistics labels from the running career totals."""
+        total_required_credits = self.db_manager.get_int('total_credits', 180)
+        max_grade = self.db_manager.get_int('max_grade', 30)
         
         # Calculate statistics
-        simple_avg = self.calculator.calculate_simple_average(all_exams)
-        weighted_avg = self.calculator.calculate_weighted_average(all_exams)
+        stats = self.aggregates.statistics()
+        simple_avg = stats['simple_average']
+        weighted_avg = stats['weighted_average']
         
         # Convert to 110 scale
         simple_avg_110 = self.calculator.convert_to_110_scale(simple_avg, max_grade)
         weighted_avg_110 = self.calculator.convert_to_110_scale(weighted_avg, max_grade)
         
         # Calculate credits
-        earned_credits = self.calculator.calculate_total_credits(all_exams)
-        remaining_credits = self.calculator.calculate_remaining_credits(all_exams, total_required_credits)
+        earned_credits = stats['earned_credits']
+        remaining_credits = max(0, total_required_credits - earned_credits)
         
         # Update statistics labels
         self.stat_labels["CFU Totali:"].setText(f"{earned_credits}/{total_required_credits}")
@@ -901,12 +1005,24 @@ class AnalyticsWidget(QWidget):
         self.stat_labels["Media Semplice (110):"].setText(f"{simple_avg_110:.2f}/110")
         self.stat_labels["Media Ponderata (110):"].setText(f"{weighted_avg_110:.2f}/110")
         
+    def _show_data(self, data):
+        """Update every section of the tab with the data loaded by refresh_data."""
+        self.data_version = data['version']
+        
+        # The lists are only needed by the trend chart, the targets and the
+        # completion prediction; the statistics labels are already up to date
+        passed_exams = data['passed_exams']
+        planned_exams = data['planned_exams']
+        
+        # Get settings
+        total_required_credits = self.db_manager.get_int('total_credits', 180)
+        max_grade = self.db_manager.get_int('max_grade', 30)
+        
         # Update trend chart
         self.trend_chart.update_chart(passed_exams, "Andamento Voti nel Tempo", f"Voto (max {max_grade})")
         
-        # Refresh target calculations
-        self.target_widget.calculate_targets()
+        # Refresh target calculations with the exams loaded above
+        self.target_widget.set_exams((passed_exams + planned_exams, planned_exams))
         
         # Update completion prediction
-        planned_exams = self.db_manager.get_planned_exams()
         self.completion_widget.update_prediction(passed_exams, planned_exams, total_required_credits)
@@ -0,0 +1,264 @@
+"""
+NumPy-backed counterpart of AcademicCalculator.
+
+ExamArrays holds a snapshot of the exams as parallel columns (ids, credits,
+grades, status codes), built once; ArrayCalculator then answers each
+statistic with a few vectorized passes over those columns instead of
+filtering lists of exam dictionaries again for every call.
+
+Results are identical to AcademicCalculator's for the integer grades and
+credits the application stores: integer-valued float64 sums are exact, and
+the float sums of calculate_required_grades are accumulated left to right
+(np.cumsum), like Python's sum().
+"""
+
+import numpy as np
+
+# Status column codes; any other status maps to STATUS_OTHER
+STATUS_CODES = {'passed': 0, 'failed': 1, 'planned': 2}
+STATUS_OTHER = len(STATUS_CODES)
+
+# Lowest passing grade assigned by calculate_required_grades
+MIN_REQUIRED_GRADE = 18
+
+
+class ExamArrays:
+    """Columnar snapshot of a list of exams."""
+
+    __slots__ = ('ids', 'credits', 'grades', 'status', 'passed', 'graded')
+
+    def __init__(self, ids, credits, grades, status):
+        """
+        Args:
+            ids (array-like): Exam IDs
+            credits (array-like): Exam credits
+            grades (array-like): Exam grades, NaN (or None) for ungraded exams
+            status (array-like): Status codes, see STATUS_CODES
+        """
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.credits = np.asarray(credits, dtype=np.int64)
+        self.grades = np.asarray(grades, dtype=np.float64)
+        self.status = np.asarray(status, dtype=np.int8)
+
+        # Masks shared by most statistics, computed once per snapshot
+        self.passed = self.status == STATUS_CODES['passed']
+        self.graded = self.passed & ~np.isnan(self.grades)
+
+    @classmethod
+    def from_exams(cls, exams):
+        """
+        Build a snapshot from exam records or dictionaries.
+
+        Args:
+            exams (list): Exams with 'id', 'credits', 'grade' and 'status'
+
+        Returns:
+            ExamArrays: Columnar copy of the exams
+        """
+        count = len(exams)
+        return cls(
+            np.fromiter((exam['id'] for exam in exams), np.int64, count),
+            np.fromiter((exam['credits'] for exam in exams), np.int64, count),
+            # float() would reject None; np.nan marks ungraded exams
+            np.fromiter((np.nan if exam['grade'] is None else exam['grade'] for exam in exams),
+                        np.float64, count),
+            np.fromiter((STATUS_CODES.get(exam['status'], STATUS_OTHER) for exam in exams),
+                        np.int8, count))
+
+    @classmethod
+    def from_database(cls, db_manager, status=None):
+        """
+        Build a snapshot straight from the exams table, without creating records.
+
+        Args:
+            db_manager (DatabaseManager): Database to read
+            status (str, optional): Only include exams with this status
+
+        Returns:
+            ExamArrays: Columnar copy of the exams
+        """
+        # SQLite maps the status to its code, so no per-row Python is needed
+        cases = " ".join(f"WHEN '{name}' THEN {code}" for name, code in STATUS_CODES.items())
+        query = f"SELECT id, credits, grade, CASE status {cases} ELSE {STATUS_OTHER} END FROM exams"
+        params = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+
+        rows = db_manager.conn.execute(query, params).fetchall()
+        if not rows:
+            return cls((), (), (), ())
+        # float64 conversion turns NULL grades into NaN
+        return cls(*zip(*rows))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def select(self, mask):
+        """Return a snapshot of the exams selected by a boolean mask."""
+        return ExamArrays(self.ids[mask], self.credits[mask], self.grades[mask], self.status[mask])
+
+
+def _sequential_sum(values):
+    """Sum values left to right, rounding like Python's sum(); 0 if empty."""
+    if len(values) == 0:
+        return 0
+    return values.cumsum()[-1].item()
+
+
+class ArrayCalculator:
+    """AcademicCalculator statistics computed over ExamArrays."""
+
+    @staticmethod
+    def calculate_simple_average(arrays):
+        """
+        Calculate simple average (not weighted by credits).
+
+        Args:
+            arrays (ExamArrays): Exam snapshot
+
+        Returns:
+            float: Simple average or 0 if no passed exams
+        """
+        count = int(np.count_nonzero(arrays.graded))
+        if not count:
+            return 0
+        return arrays.grades[arrays.graded].sum().item() / count
+
+    @staticmethod
+    def calculate_weighted_average(arrays):
+        """
+        Calculate weighted average based on exam credits.
+
+        Args:
+            arrays (ExamArrays): Exam snapshot
+
+        Returns:
+            float: Weighted average or 0 if no passed exams
+        """
+        credits = arrays.credits[arrays.graded]
+        total_credits = credits.sum().item()
+        if total_credits <= 0:
+            return 0
+        return (arrays.grades[arrays.graded] * credits).sum().item() / total_credits
+
+    @staticmethod
+    def calculate_total_credits(arrays):
+        """
+        Calculate total credits earned from passed exams.
+
+        Args:
+            arrays (ExamArrays): Exam snapshot
+
+        Returns:
+            int: Total credits earned
+        """
+        return arrays.credits[arrays.passed].sum().item()
+
+    @staticmethod
+    def calculate_remaining_credits(arrays, total_required):
+        """
+        Calculate remaining credits needed for graduation.
+
+        Args:
+            arrays (ExamArrays): Exam snapshot
+            total_required (int): Total credits required for graduation
+
+        Returns:
+            int: Remaining credits needed
+        """
+        return max(0, total_required - ArrayCalculator.calculate_total_credits(arrays))
+
+    @staticmethod
+    def calculate_statistics(arrays):
+        """
+        Calculate the main career statistics in one set of passes.
+
+        Args:
+            arrays (ExamArrays): Exam snapshot
+
+        Returns:
+            dict: Same keys as AcademicCalculator.calculate_statistics_from_summary
+        """
+        counts = np.bincount(arrays.status, minlength=STATUS_OTHER + 1)
+        return {
+            'earned_credits': ArrayCalculator.calculate_total_credits(arrays),
+            'simple_average': ArrayCalculator.calculate_simple_average(arrays),
+            'weighted_average': ArrayCalculator.calculate_weighted_average(arrays),
+            'passed_count': counts[STATUS_CODES['passed']].item(),
+            'failed_count': counts[STATUS_CODES['failed']].item(),
+            'planned_count': counts[STATUS_CODES['planned']].item(),
+        }
+
+    @staticmethod
+    def calculate_required_grades(arrays, planned, target_average, max_grade=30, fixed_grades=None):
+        """
+        Vectorized AcademicCalculator.calculate_required_grades.
+
+        Args:
+            arrays (ExamArrays): Snapshot of all exams
+            planned (ExamArrays): Snapshot of the planned exams
+            target_average (float): Target weighted average
+            max_grade (int): Maximum possible grade
+            fixed_grades (dict, optional): Dictionary with exam IDs as keys and manually set grades as values
+
+        Returns:
+            dict: Dictionary with planned exam IDs as keys and required grades as values
+        """
+        if fixed_grades is None:
+            fixed_grades = {}
+
+        if not len(planned):
+            return {}
+
+        current_weighted_sum = (arrays.grades[arrays.graded] * arrays.credits[arrays.graded]).sum().item()
+        current_credits = arrays.credits[arrays.graded].sum().item()
+
+        fixed = np.isin(planned.ids, np.fromiter(fixed_grades, np.int64, len(fixed_grades)))
+        adjustable_ids = planned.ids[~fixed]
+        adjustable_credits = planned.credits[~fixed]
+
+        if not len(adjustable_ids):
+            return fixed_grades
+
+        fixed_ids = planned.ids[fixed].tolist()
+        fixed_values = np.array([fixed_grades[exam_id] for exam_id in fixed_ids], dtype=np.float64)
+        fixed_weighted_sum = _sequential_sum(fixed_values * planned.credits[fixed])
+        fixed_credits = planned.credits[fixed].sum().item()
+
+        total_adjustable_credits = adjustable_credits.sum().item()
+        total_credits = current_credits + fixed_credits + total_adjustable_credits
+
+        required_weighted_sum = target_average * total_credits
+        remaining_weighted_sum = required_weighted_sum - current_weighted_sum - fixed_weighted_sum
+
+        ids = adjustable_ids.tolist()
+        if remaining_weighted_sum <= 0:
+            return {**fixed_grades, **dict.fromkeys(ids, 0)}
+
+        if remaining_weighted_sum > max_grade * total_adjustable_credits:
+            return {**fixed_grades, **dict.fromkeys(ids, max_grade)}
+
+        if len(ids) == 1:
+            required_grade = remaining_weighted_sum / adjustable_credits[0].item()
+            return {**fixed_grades, ids[0]: min(max_grade, max(MIN_REQUIRED_GRADE, required_grade))}
+
+        max_credits = adjustable_credits.max().item()
+        min_credits = adjustable_credits.min().item()
+
+        if max_credits == min_credits:
+            average_grade_needed = remaining_weighted_sum / total_adjustable_credits
+            average_grade_needed = min(max_grade, max(MIN_REQUIRED_GRADE, average_grade_needed))
+            return {**fixed_grades, **dict.fromkeys(ids, average_grade_needed)}
+
+        # Credit-based difficulty factors, as in AcademicCalculator
+        normalized_difficulty = (max_credits - adjustable_credits) / (max_credits - min_credits)
+        difficulty_factors = 0.5 + (0.5 * normalized_difficulty)
+        difficulty_sum = _sequential_sum(difficulty_factors * adjustable_credits)
+
+        base_grade = remaining_weighted_sum / difficulty_sum
+        grades = np.minimum(max_grade, np.maximum(MIN_REQUIRED_GRADE, base_grade * difficulty_factors))
+
+        result = dict(fixed_grades)
+        result.update(zip(ids, grades.tolist()))
+        return result
@@ -0,0 +1,172 @@
+"""
+Online export and restore of the application database.
+
+Copies go through the SQLite backup API (or VACUUM INTO for compacted
+snapshots) instead of copying the database file, so they are consistent
+even while other connections write to the WAL, and they can run on the
+DatabaseWorker thread with progress reporting and cancellation.
+"""
+
+import os
+import sqlite3
+
+# Pages copied per backup step; progress is reported and cancellation
+# checked between steps (256 pages is 1 MiB with the default page size)
+DEFAULT_BACKUP_PAGES = 256
+
+# SQLite virtual machine instructions between cancellation checks of VACUUM INTO
+VACUUM_CANCEL_CHECK_OPS = 10000
+
+
+class BackupCancelled(Exception):
+    """Raised when an export or restore is cancelled before it completes."""
+
+
+def copy_database(source, target, pages=DEFAULT_BACKUP_PAGES, progress=None, cancel=None):
+    """
+    Copy every page of one open database into another.
+
+    A cancelled copy leaves the target untouched: SQLite rolls back the
+    partially written pages when the backup is abandoned.
+
+    Args:
+        source (sqlite3.Connection): Database to copy
+        target (sqlite3.Connection): Database to overwrite
+        pages (int): Pages copied per step
+        progress (callable, optional): Called as progress(copied, total) in
+            pages after each step
+        cancel (threading.Event, optional): Set to abort the copy
+
+    Raises:
+        BackupCancelled: If cancel was set before the copy completed
+    """
+    def on_step(status, remaining, total):
+        # An exception raised here aborts the backup and is propagated
+        if cancel is not None and cancel.is_set():
+            raise BackupCancelled()
+        if progress is not None:
+            progress(total - remaining, total)
+
+    if cancel is not None and cancel.is_set():
+        raise BackupCancelled()
+
+    source.backup(target, pages=pages, progress=on_step)
+
+
+def vacuum_into(conn, dest_path, progress=None, cancel=None):
+    """
+    Write a compacted snapshot of a database with VACUUM INTO.
+
+    The snapshot has no free pages and freshly packed indexes, so it is
+    usually smaller than a page-by-page copy. SQLite does not report how
+    far along it is: progress is called once with (0, 0).
+
+    Args:
+        conn (sqlite3.Connection): Database to snapshot
+        dest_path (str): New file to create; it must not exist
+        progress (callable, optional): Called as progress(0, 0) before starting
+        cancel (threading.Event, optional): Set to abort the snapshot
+
+    Raises:
+        BackupCancelled: If cancel was set before the snapshot completed
+    """
+    if progress is not None:
+        progress(0, 0)
+
+    # VACUUM cannot run inside a transaction
+    if conn.in_transaction:
+        conn.commit()
+
+    if cancel is not None:
+        # A non-zero return interrupts the statement
+        conn.set_progress_handler(cancel.is_set, VACUUM_CANCEL_CHECK_OPS)
+    try:
+        conn.execute("VACUUM INTO ?", (dest_path,))
+    except sqlite3.OperationalError:
+        if cancel is not None and cancel.is_set():
+            raise BackupCancelled() from None
+        raise
+    finally:
+        if cancel is not None:
+            conn.set_progress_handler(None, 0)
+
+
+def export_database(conn, dest_path, compact=False, pages=DEFAULT_BACKUP_PAGES,
+                    progress=None, cancel=None):
+    """
+    Export a consistent copy of a database to a file.
+
+    The copy is written next to dest_path and renamed into place once it
+    is complete, so a failed or cancelled export never leaves a partial
+    file behind or clobbers an existing one.
+
+    Args:
+        conn (sqlite3.Connection): Database to export
+        dest_path (str): Destination file path (replaced if it exists)
+        compact (bool): Write a compacted snapshot with VACUUM INTO instead
+            of a page-by-page backup
+        pages (int): Pages copied per backup step
+        progress (callable, optional): Called as progress(copied, total) in
+            pages; total is 0 for compacted snapshots
+        cancel (threading.Event, optional): Set to abort the export
+
+    Raises:
+        BackupCancelled: If cancel was set before the export completed
+    """
+    temp_path = dest_path + ".part"
+    _remove(temp_path)
+
+    try:
+        if compact:
+            vacuum_into(conn, temp_path, progress, cancel)
+        else:
+            dest = sqlite3.connect(temp_path)
+            try:
+                copy_database(conn, dest, pages, progress, cancel)
+            finally:
+                dest.close()
+        os.replace(temp_path, dest_path)
+    except BaseException:
+        _remove(temp_path)
+        raise
+
+
+def restore_database(conn, src_path, pages=DEFAULT_BACKUP_PAGES, progress=None, cancel=None):
+    """
+    Replace the contents of an open database with those of a file.
+
+    The source is copied into the live connection through the backup API,
+    so the restore is safe in WAL mode and other connections see the new
+    contents at their next transaction. A cancelled restore leaves the
+    database as it was.
+
+    Args:
+        conn (sqlite3.Connection): Database to overwrite
+        src_path (str): Database file to restore from
+        pages (int): Pages copied per backup step
+        progress (callable, optional): Called as progress(copied, total) in pages
+        cancel (threading.Event, optional): Set to abort the restore
+
+    Raises:
+        BackupCancelled: If cancel was set before the restore completed
+    """
+    if conn.in_transaction:
+        conn.commit()
+
+    # sqlite3.connect would create an empty database and restore nothing
+    if not os.path.isfile(src_path):
+        raise FileNotFoundError(src_path)
+
+    source = sqlite3.connect(src_path)
+    try:
+        copy_database(source, conn, pages, progress, cancel)
+    finally:
+        source.close()
+
+
+def _remove(path):
+    """Delete a file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
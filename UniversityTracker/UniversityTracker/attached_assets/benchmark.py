@@ -0,0 +1,537 @@
+"""
+Performance benchmarks for the University Career Manager data layer.
+
+Usage:
+    python benchmark.py              # run every benchmark
+    python benchmark.py indexes      # run a single benchmark by name
+"""
+
+import calendar
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import numpy as np
+
+from aggregates import CareerAggregates
+from array_calculations import STATUS_CODES, ArrayCalculator, ExamArrays
+from calculations import AcademicCalculator
+from calendar_layout import month_layout
+from database import DatabaseManager
+from migrations import migrate
+from records import Exam
+from trends import TREND_MAX_POINTS, cumulative_average, lttb
+
+EXAM_STATUSES = ['passed', 'failed', 'planned']
+EVENT_TYPES = ['exam', 'study', 'deadline', 'meeting', 'session', 'holiday', 'other']
+
+
+def _timed(func, repeat=5):
+    """Return the best wall-clock time of func() over several runs, in ms."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _synthetic_exams(count, seed=42):
+    """Generate exam rows as (name, credits, grade, status, date, notes) tuples."""
+    rng = random.Random(seed)
+    first_day = date(2010, 1, 1)
+    rows = []
+    for i in range(count):
+        status = rng.choice(EXAM_STATUSES)
+        grade = rng.randint(18, 30) if status == 'passed' else None
+        exam_date = (first_day + timedelta(days=rng.randint(0, 5000))).isoformat()
+        rows.append((f"Exam {i}", rng.choice([3, 6, 9, 12]), grade, status, exam_date, None))
+    return rows
+
+
+def _synthetic_events(count, seed=42):
+    """Generate event rows as (title, event_type, start_date, end_date) tuples."""
+    rng = random.Random(seed)
+    first_day = date(2010, 1, 1)
+    rows = []
+    for i in range(count):
+        start = first_day + timedelta(days=rng.randint(0, 5000))
+        end = start + timedelta(days=rng.choice([0, 0, 0, 1, 2, 14]))
+        rows.append((f"Event {i}", rng.choice(EVENT_TYPES),
+                     f"{start.isoformat()}T09:00:00", f"{end.isoformat()}T18:00:00"))
+    return rows
+
+
+def _populate(conn, exam_count, event_count):
+    """Fill a freshly migrated database with synthetic exams and events."""
+    now = "2024-01-01T00:00:00"
+    conn.executemany('''
+    INSERT INTO exams (name, credits, grade, status, date, notes, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [row + (now, now) for row in _synthetic_exams(exam_count)])
+    conn.executemany('''
+    INSERT INTO calendar_events (title, event_type, start_date, end_date, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ''', [row + (now, now) for row in _synthetic_events(event_count)])
+    conn.commit()
+
+
+def bench_indexes(exam_count=20000, event_count=100000):
+    """Compare query plans and timings before and after the index migration."""
+    queries = [
+        ("get_all_exams(status)",
+         "SELECT * FROM exams WHERE status = ? ORDER BY date DESC", ('passed',)),
+        ("get_events_for_month",
+         "SELECT * FROM calendar_events WHERE end_date >= ? AND start_date <= ? ORDER BY start_date ASC",
+         ('2015-03-01', '2015-04-01')),
+        ("get_calendar_events(event_type)",
+         "SELECT * FROM calendar_events WHERE event_type = ? ORDER BY start_date ASC", ('holiday',)),
+        ("get_calendar_events(exam_id)",
+         "SELECT * FROM calendar_events WHERE exam_id = ? ORDER BY start_date ASC", (42,)),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = sqlite3.connect(os.path.join(tmp_dir, "bench.db"))
+        # Version 1 is the original schema without secondary indexes
+        migrate(conn, target_version=1)
+        _populate(conn, exam_count, event_count)
+
+        print(f"indexes: {exam_count} exams, {event_count} events")
+        results = {}
+        for label in ("before", "after"):
+            if label == "after":
+                migrate(conn)
+                conn.execute("ANALYZE")
+            for name, sql, params in queries:
+                plan = "; ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+                elapsed = _timed(lambda: conn.execute(sql, params).fetchall())
+                results.setdefault(name, {})[label] = (plan, elapsed)
+
+        for name, runs in results.items():
+            print(f"  {name}")
+            for label in ("before", "after"):
+                plan, elapsed = runs[label]
+                print(f"    {label:<6} {elapsed:8.2f} ms  {plan}")
+        conn.close()
+
+
+def bench_bulk(exam_count=2000, event_count=2000):
+    """Compare one-commit-per-row inserts with the executemany() bulk methods."""
+    exams = [dict(zip(('name', 'credits', 'grade', 'status', 'date', 'notes'), row))
+             for row in _synthetic_exams(exam_count)]
+    events = [dict(zip(('title', 'event_type', 'start_date', 'end_date'), row))
+              for row in _synthetic_events(event_count)]
+
+    print(f"bulk: {exam_count} exams, {event_count} events (file-backed database)")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, "per_row.db"))
+        start = time.perf_counter()
+        for exam in exams:
+            db.add_exam(**exam)
+        for event in events:
+            db.add_calendar_event(**event)
+        per_row = (time.perf_counter() - start) * 1000
+        db.close()
+
+        db = DatabaseManager(os.path.join(tmp_dir, "bulk.db"))
+        start = time.perf_counter()
+        db.add_exams_bulk(exams)
+        db.add_calendar_events_bulk(events)
+        bulk = (time.perf_counter() - start) * 1000
+        db.close()
+
+    print(f"  per-row commits  {per_row:10.2f} ms")
+    print(f"  bulk             {bulk:10.2f} ms  ({per_row / bulk:.0f}x faster)")
+
+
+def bench_summary(exam_count=10000):
+    """Compare the old four-query dashboard refresh with get_exam_summary()."""
+    calculator = AcademicCalculator
+
+    def list_refresh(db):
+        all_exams = db.get_all_exams()
+        passed_exams = db.get_passed_exams()
+        failed_exams = db.get_failed_exams()
+        planned_exams = db.get_planned_exams()
+        grades = [e['grade'] for e in passed_exams if e['grade'] is not None]
+        return (calculator.calculate_total_credits(all_exams),
+                calculator.calculate_simple_average(all_exams),
+                calculator.calculate_weighted_average(all_exams),
+                len(passed_exams), len(failed_exams), len(planned_exams), len(grades))
+
+    def summary_refresh(db):
+        stats = calculator.calculate_statistics_from_summary(db.get_exam_summary())
+        grade_distribution = db.get_grade_distribution()
+        return (stats['earned_credits'], stats['simple_average'], stats['weighted_average'],
+                stats['passed_count'], stats['failed_count'], stats['planned_count'],
+                sum(grade_distribution.values()))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, "bench.db"))
+        _populate(db.conn, exam_count, 0)
+
+        assert list_refresh(db) == summary_refresh(db), "summary statistics differ"
+        before = _timed(lambda: list_refresh(db))
+        after = _timed(lambda: summary_refresh(db))
+        db.close()
+
+    print(f"summary: dashboard data refresh at {exam_count} exams")
+    print(f"  4 queries + Python sums  {before:8.2f} ms")
+    print(f"  get_exam_summary         {after:8.2f} ms  ({before / after:.0f}x faster)")
+
+
+def bench_intervals(event_count=100000):
+    """Compare B-tree range scans with the calendar_events_rtree interval index."""
+    btree_overlap = ("SELECT * FROM calendar_events WHERE end_date >= ? AND start_date <= ? "
+                     "ORDER BY start_date ASC")
+    btree_conflicts = ("SELECT * FROM calendar_events WHERE end_date > ? AND start_date < ? "
+                       "AND id != ? AND event_type NOT IN ('academic_session', 'holiday') "
+                       "ORDER BY start_date ASC")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, "bench.db"))
+        _populate(db.conn, 0, event_count)
+        db.conn.execute("ANALYZE")
+        event = db.get_calendar_event(event_count // 2)
+
+        cases = [
+            ("month, early (2010-02)",
+             lambda: [dict(row) for row in db.conn.execute(btree_overlap, ('2010-02-01', '2010-03-01'))],
+             lambda: db.get_events_for_month(2010, 2)),
+            ("month, late (2023-06)",
+             lambda: [dict(row) for row in db.conn.execute(btree_overlap, ('2023-06-01', '2023-07-01'))],
+             lambda: db.get_events_for_month(2023, 6)),
+            ("day (2016-05-10)",
+             lambda: [dict(row) for row in db.conn.execute(btree_overlap, ('2016-05-10', '2016-05-10T23:59:59'))],
+             lambda: db.get_events_on_day('2016-05-10')),
+            ("conflicts of one event",
+             lambda: [dict(row) for row in db.conn.execute(
+                 btree_conflicts, (event['start_date'], event['end_date'], event['id']))],
+             lambda: db.get_conflicting_events(event['start_date'], event['end_date'],
+                                               exclude_event_id=event['id'])),
+        ]
+
+        print(f"intervals: {event_count} events")
+        for name, btree, rtree in cases:
+            assert sorted(e['id'] for e in btree()) == sorted(e['id'] for e in rtree()), f"{name}: results differ"
+            before = _timed(btree)
+            after = _timed(rtree)
+            print(f"  {name:<26} B-tree {before:8.2f} ms   R*Tree {after:8.2f} ms")
+
+        pairs = db.get_event_conflicts('2015-01-01', '2015-12-31')
+        elapsed = _timed(lambda: db.get_event_conflicts('2015-01-01', '2015-12-31'), repeat=3)
+        print(f"  {'conflicting pairs in 2015':<26} R*Tree {elapsed:8.2f} ms  ({len(pairs)} pairs)")
+        db.close()
+
+
+def bench_search(exam_count=100000, event_count=100000):
+    """Compare LIKE scans with the FTS5 prefix search behind DatabaseManager.search()."""
+    like_exams = "SELECT id, name FROM exams WHERE name LIKE ? OR notes LIKE ?"
+    like_events = ("SELECT id, title FROM calendar_events "
+                   "WHERE title LIKE ? OR description LIKE ? OR location LIKE ?")
+
+    def like_search(text):
+        pattern = f"%{text}%"
+        return (db.conn.execute(like_exams, (pattern,) * 2).fetchall()
+                + db.conn.execute(like_events, (pattern,) * 3).fetchall())
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, "bench.db"))
+        _populate(db.conn, exam_count, event_count)
+
+        print(f"search: {exam_count} exams, {event_count} events")
+        # Typing "Event 4217" one key at a time
+        for text in ("Ev", "Event", "Event 42", "Event 4217"):
+            before = _timed(lambda: like_search(text))
+            after = _timed(lambda: db.search(text))
+            print(f"  {text!r:<14} LIKE {before:8.2f} ms   FTS5 {after:8.2f} ms")
+        db.close()
+
+
+def bench_records(row_count=100000):
+    """Compare dict(row) materialization with the slot-based records of records.py."""
+    calculator = AcademicCalculator
+
+    def dict_rows(db):
+        return [dict(row) for row in db.conn.execute("SELECT * FROM exams ORDER BY date DESC")]
+
+    def memory(func):
+        tracemalloc.start()
+        rows = func()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del rows
+        return size / (1024 * 1024)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, "bench.db"))
+        _populate(db.conn, row_count, 0)
+
+        dicts = dict_rows(db)
+        records = db.get_all_exams()
+        assert [dict(record) for record in records] == dicts, "records differ from dict rows"
+
+        print(f"records: {row_count} exam rows")
+        print(f"  {'':<28} {'dict':>10} {'record':>10}")
+        results = [
+            ("load (ms)", _timed(lambda: dict_rows(db), repeat=3),
+             _timed(db.get_all_exams, repeat=3)),
+            ("memory (MiB)", memory(lambda: dict_rows(db)), memory(db.get_all_exams)),
+            ("sum row['credits'] (ms)", _timed(lambda: sum(row['credits'] for row in dicts)),
+             _timed(lambda: sum(row['credits'] for row in records))),
+            ("calculate_weighted_average", _timed(lambda: calculator.calculate_weighted_average(dicts)),
+             _timed(lambda: calculator.calculate_weighted_average(records))),
+        ]
+        for name, before, after in results:
+            print(f"  {name:<28} {before:10.2f} {after:10.2f}")
+        print(f"  {'sum row.credits (ms)':<28} {'':>10} "
+              f"{_timed(lambda: sum(row.credits for row in records)):10.2f}")
+        db.close()
+
+
+def bench_streaming(row_count=200000, page_size=100):
+    """Compare full loads with iter_exams, and OFFSET paging with get_exams_page."""
+    def peak_memory(func):
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak / (1024 * 1024)
+
+    def credits_loaded(db):
+        return sum(exam.credits for exam in db.get_all_exams())
+
+    def credits_streamed(db):
+        return sum(exam.credits for exam in db.iter_exams())
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, "bench.db"))
+        _populate(db.conn, row_count, 0)
+        assert credits_loaded(db) == credits_streamed(db), "iter_exams differs from get_all_exams"
+
+        print(f"streaming: {row_count} exam rows")
+        print(f"  {'':<28} {'get_all':>10} {'iter':>10}")
+        print(f"  {'sum credits (ms)':<28} {_timed(lambda: credits_loaded(db), repeat=3):10.2f} "
+              f"{_timed(lambda: credits_streamed(db), repeat=3):10.2f}")
+        print(f"  {'peak memory (MiB)':<28} {peak_memory(lambda: credits_loaded(db)):10.2f} "
+              f"{peak_memory(lambda: credits_streamed(db)):10.2f}")
+
+        # Page at the far end of the history, reached by OFFSET and by keyset
+        offset = row_count - page_size
+        last = db.conn.execute(
+            "SELECT date, id FROM exams ORDER BY date DESC, id DESC LIMIT 1 OFFSET ?",
+            (offset - 1,)).fetchone()
+        by_offset = lambda: db.conn.execute(
+            "SELECT * FROM exams ORDER BY date DESC, id DESC LIMIT ? OFFSET ?",
+            (page_size, offset)).fetchall()
+        by_keyset = lambda: db.get_exams_page(after=tuple(last), limit=page_size)
+        assert [row['id'] for row in by_offset()] == [exam.id for exam in by_keyset()], \
+            "keyset page differs from OFFSET page"
+
+        print(f"  {'':<28} {'OFFSET':>10} {'keyset':>10}")
+        print(f"  {'last page (ms)':<28} {_timed(by_offset):10.2f} {_timed(by_keyset):10.2f}")
+        db.close()
+
+
+def bench_merge(row_count=100000):
+    """Time a merge-import adding 50% new rows and updating 10% of the existing ones."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Same seed, so the source starts with the same rows as the target
+        source_path = os.path.join(tmp_dir, "source.db")
+        source = sqlite3.connect(source_path)
+        migrate(source)
+        _populate(source, row_count * 3 // 2, row_count * 3 // 2)
+        source.execute("UPDATE exams SET notes = 'changed', updated_at = '2025-01-01T00:00:00' "
+                       "WHERE id % 10 = 0 AND id <= ?", (row_count,))
+        source.commit()
+        source.close()
+
+        db = DatabaseManager(os.path.join(tmp_dir, "bench.db"))
+        _populate(db.conn, row_count, row_count)
+
+        start = time.perf_counter()
+        report = db.merge_database(source_path, policy='newer')
+        elapsed = time.perf_counter() - start
+
+        print(f"merge: {row_count} exams and events, source with {row_count * 3 // 2} of each")
+        for table, counts in report.items():
+            print(f"  {table:<20} " + ", ".join(f"{name} {count}" for name, count in counts.items()))
+        print(f"  {'total (s)':<20} {elapsed:.2f}")
+        db.close()
+
+
+def bench_calculator(sizes=(1000, 100000, 1000000)):
+    """Compare AcademicCalculator on exam records with ArrayCalculator on ExamArrays."""
+    def python_stats(exams, planned):
+        calculator = AcademicCalculator
+        return (calculator.calculate_total_credits(exams),
+                calculator.calculate_simple_average(exams),
+                calculator.calculate_weighted_average(exams),
+                calculator.calculate_required_grades(exams, planned, 27))
+
+    def array_stats(arrays, planned):
+        calculator = ArrayCalculator
+        return (calculator.calculate_total_credits(arrays),
+                calculator.calculate_simple_average(arrays),
+                calculator.calculate_weighted_average(arrays),
+                calculator.calculate_required_grades(arrays, planned, 27))
+
+    print("calculator: totals, averages and required grades (ms)")
+    print(f"  {'exams':>8} {'python':>10} {'arrays':>10} {'snapshot':>10} {'speedup':>8}")
+    for size in sizes:
+        exams = [Exam(i + 1, *row, None, None) for i, row in enumerate(_synthetic_exams(size))]
+        planned = [exam for exam in exams if exam.status == 'planned']
+        arrays = ExamArrays.from_exams(exams)
+        planned_arrays = arrays.select(arrays.status == STATUS_CODES['planned'])
+        assert python_stats(exams, planned) == array_stats(arrays, planned_arrays), \
+            "ArrayCalculator differs from AcademicCalculator"
+
+        repeat = 3 if size >= 100000 else 5
+        before = _timed(lambda: python_stats(exams, planned), repeat=repeat)
+        after = _timed(lambda: array_stats(arrays, planned_arrays), repeat=repeat)
+        snapshot = _timed(lambda: ExamArrays.from_exams(exams), repeat=repeat)
+        print(f"  {size:>8} {before:10.2f} {after:10.2f} {snapshot:10.2f} {before / after:7.0f}x")
+
+
+def bench_aggregates(exam_count=100000):
+    """Compare re-aggregating in SQL after each edit with the running CareerAggregates."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, "bench.db"))
+        _populate(db.conn, exam_count, 0)
+        aggregates = CareerAggregates(db)
+        aggregates.reload()
+        grades = iter(range(10 ** 9))
+
+        def edit():
+            db.update_exam(1, grade=18 + next(grades) % 13, status='passed')
+
+        def sql_refresh():
+            edit()
+            return db.get_exam_summary(), db.get_grade_distribution()
+
+        def running_refresh():
+            edit()
+            return aggregates.summary(), aggregates.grade_distribution()
+
+        assert running_refresh()[1] == db.get_grade_distribution(), "running totals differ"
+        before = _timed(sql_refresh)
+        after = _timed(running_refresh)
+        db.close()
+
+    print(f"aggregates: edit one exam, then refresh the totals ({exam_count} exams)")
+    print(f"  get_exam_summary + distribution  {before:8.2f} ms")
+    print(f"  CareerAggregates                 {after:8.2f} ms  ({before / after:.0f}x faster)")
+
+
+def bench_trends(sizes=(1000, 10000, 100000, 1000000), max_points=TREND_MAX_POINTS):
+    """Compare the per-point cumulative average loop with prefix sums plus LTTB."""
+    def quadratic(grades):
+        return [sum(grades[:i + 1]) / (i + 1) for i in range(len(grades))]
+
+    def prefix_sums(grades):
+        values = cumulative_average(grades)
+        positions = np.arange(len(values))
+        kept = lttb(positions, values, max_points)
+        return positions[kept], values[kept]
+
+    print(f"trends: cumulative average series, downsampled to {max_points} points (ms)")
+    print(f"  {'exams':>8} {'loop':>10} {'prefix+lttb':>12} {'points':>8}")
+    rng = np.random.default_rng(42)
+    for size in sizes:
+        grades = rng.integers(18, 31, size).astype(np.float64)
+        repeat = 3 if size >= 100000 else 5
+        after = _timed(lambda: prefix_sums(grades), repeat=repeat)
+        points = len(prefix_sums(grades)[0])
+        if size <= 10000:
+            as_list = grades.tolist()
+            assert np.allclose(quadratic(as_list), cumulative_average(grades)), \
+                "cumulative_average differs from the per-point loop"
+            before = f"{_timed(lambda: quadratic(as_list), repeat=1):10.2f}"
+        else:
+            before = f"{'-':>10}"
+        print(f"  {size:>8} {before} {after:12.2f} {points:>8}")
+
+
+def bench_calendar(sizes=((100, 10), (1000, 100), (10000, 1000), (50000, 5000)), year=2024, month=3):
+    """Compare scanning every session for every day with month_layout()'s sweep line."""
+    def per_day(events, sessions):
+        days_in_month = calendar.monthrange(year, month)[1]
+        events_by_day = {}
+        for event in events:
+            start = date.fromisoformat(event['start_date'][:10])
+            day = start.day if (start.year, start.month) == (year, month) else 1
+            events_by_day.setdefault(day, []).append(event)
+        session_color_by_day = {}
+        for day in range(1, days_in_month + 1):
+            current = date(year, month, day)
+            for session in sessions:
+                if (date.fromisoformat(session['start_date'][:10]) <= current
+                        <= date.fromisoformat(session['end_date'][:10])):
+                    session_color_by_day[day] = session['color']
+        return events_by_day, session_color_by_day
+
+    rng = random.Random(42)
+    month_start = date(year, month, 1)
+    month_days = calendar.monthrange(year, month)[1]
+
+    print(f"calendar: layout of {year}-{month:02d} (ms)")
+    print(f"  {'events':>8} {'sessions':>9} {'per-day':>10} {'sweep':>10}")
+    for event_count, session_count in sizes:
+        events = []
+        for i in range(event_count):
+            start = month_start + timedelta(days=rng.randint(-10, month_days - 1))
+            events.append({'id': i, 'event_type': rng.choice(EVENT_TYPES),
+                           'start_date': f"{start.isoformat()}T09:00:00"})
+        sessions = []
+        for i in range(session_count):
+            start = month_start + timedelta(days=rng.randint(-60, month_days - 1))
+            end = start + timedelta(days=rng.randint(0, 60))
+            if end >= month_start:
+                sessions.append({'id': i, 'color': f"#{rng.randrange(0x1000000):06x}",
+                                 'start_date': f"{start.isoformat()}T00:00:00",
+                                 'end_date': f"{end.isoformat()}T23:59:59"})
+
+        layout = month_layout(year, month, events, sessions)
+        assert (layout['events_by_day'], layout['session_color_by_day']) == per_day(events, sessions), \
+            "month_layout differs from the per-day scan"
+        repeat = 1 if event_count >= 10000 else 5
+        before = _timed(lambda: per_day(events, sessions), repeat=repeat)
+        after = _timed(lambda: month_layout(year, month, events, sessions), repeat=repeat)
+        print(f"  {event_count:>8} {len(sessions):>9} {before:10.2f} {after:10.2f}")
+
+
+BENCHMARKS = {
+    'indexes': bench_indexes,
+    'bulk': bench_bulk,
+    'summary': bench_summary,
+    'intervals': bench_intervals,
+    'search': bench_search,
+    'records': bench_records,
+    'streaming': bench_streaming,
+    'merge': bench_merge,
+    'calculator': bench_calculator,
+    'aggregates': bench_aggregates,
+    'trends': bench_trends,
+    'calendar': bench_calendar,
+}
+
+
+def main(argv):
+    """Run the benchmarks named on the command line (all of them by default)."""
+    names = argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            return 1
+        BENCHMARKS[name]()
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -41,6 +41,44 @@ class AcademicCalculator:
         
         return weighted_sum / total_credits if total_credits > 0 else 0
     
+    @staticmethod
+    def calculate_statistics_from_summary(summary):
+        """
+        Calculate the main career statistics from pre-aggregated sums.
+        
+        Gives the same results as calculate_total_credits,
+        calculate_simple_average and calculate_weighted_average, without
+        needing the full list of exams.
+        
+        Args:
+            summary (dict): Per-status aggregates as returned by
+                DatabaseManager.get_exam_summary()
+            
+        Returns:
+            dict: Dictionary with 'earned_credits', 'simple_average',
+                'weighted_average', 'passed_count', 'failed_count' and 'planned_count'
+        """
+        empty = {'count': 0, 'credits': 0, 'graded_count': 0,
+                 'graded_credits': 0, 'grade_sum': 0, 'weighted_grade_sum': 0}
+        passed = summary.get('passed', empty)
+        
+        simple_average = 0
+        if passed['graded_count'] > 0:
+            simple_average = passed['grade_sum'] / passed['graded_count']
+            
+        weighted_average = 0
+        if passed['graded_credits'] > 0:
+            weighted_average = passed['weighted_grade_sum'] / passed['graded_credits']
+            
+        return {
+            'earned_credits': passed['credits'],
+            'simple_average': simple_average,
+            'weighted_average': weighted_average,
+            'passed_count': passed['count'],
+            'failed_count': summary.get('failed', empty)['count'],
+            'planned_count': summary.get('planned', empty)['count']
+        }
+    
     @staticmethod
     def convert_to_110_scale(average, max_grade=30):
         """
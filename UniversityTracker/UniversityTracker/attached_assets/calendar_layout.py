@@ -0,0 +1,105 @@
+"""
+Month grid layout for the academic calendar, without Qt.
+
+month_layout() turns the events and academic sessions loaded for a month
+into what the day cells show. One pass buckets the events by day, and a
+sweep line over the session boundaries finds the session shading each
+day, so the cost is O(events + sessions log sessions) instead of testing
+every session against every day of the month.
+"""
+
+import calendar
+import heapq
+from datetime import date
+
+
+def _parse_date(value):
+    """Date part of an ISO date or datetime string, None if it is not valid."""
+    try:
+        return date.fromisoformat(value[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+def month_layout(year, month, events, sessions, today=None):
+    """
+    Compute what each day of a month grid shows.
+
+    Events are shown on the day they start; events that started in an
+    earlier month and are still running are shown on the 1st. A day inside
+    several academic sessions takes the color of the last one in
+    `sessions`.
+
+    Args:
+        year (int): Year
+        month (int): Month (1-12)
+        events (list): Calendar events overlapping the month, with
+            'start_date' ISO strings
+        sessions (list): Academic sessions overlapping the month, with
+            'start_date', 'end_date' and 'color'; sessions with invalid
+            dates are ignored
+        today (date, optional): Current date; defaults to date.today()
+
+    Returns:
+        dict: 'first_weekday' (weekday of the 1st, 0 = Monday),
+            'days_in_month', 'events_by_day' ({day: [events]}),
+            'session_color_by_day' ({day: color}, the color may be None)
+            and 'today' (day of the month, or None in other months)
+    """
+    first_weekday, days_in_month = calendar.monthrange(year, month)
+    today = today or date.today()
+
+    # One pass over the events, comparing ISO strings instead of parsing them
+    prefix = f"{year:04d}-{month:02d}-"
+    events_by_day = {}
+    for event in events:
+        start = event['start_date'] or ''
+        if start.startswith(prefix):
+            try:
+                day = int(start[8:10])
+            except ValueError:
+                continue
+        elif start and start < prefix:
+            day = 1
+        else:
+            continue
+        if 1 <= day <= days_in_month:
+            events_by_day.setdefault(day, []).append(event)
+
+    # Clip the sessions to the month as (first day, last day, position)
+    month_first = date(year, month, 1)
+    month_last = date(year, month, days_in_month)
+    spans = []
+    for position, session in enumerate(sessions):
+        start = _parse_date(session['start_date'])
+        end = _parse_date(session['end_date'])
+        if start is None or end is None:
+            continue
+        first = max(start, month_first)
+        last = min(end, month_last)
+        if first <= last:
+            spans.append((first.day, last.day, position))
+    spans.sort()
+
+    # Sweep the days keeping the open sessions in a heap ordered by position,
+    # latest first; sessions that already ended are dropped once they surface
+    session_color_by_day = {}
+    open_sessions = []
+    next_span = 0
+    for day in range(1, days_in_month + 1):
+        while next_span < len(spans) and spans[next_span][0] == day:
+            _, last, position = spans[next_span]
+            heapq.heappush(open_sessions, (-position, last))
+            next_span += 1
+        while open_sessions and open_sessions[0][1] < day:
+            heapq.heappop(open_sessions)
+        if open_sessions:
+            session_color_by_day[day] = sessions[-open_sessions[0][0]]['color']
+
+    return {
+        'first_weekday': first_weekday,
+        'days_in_month': days_in_month,
+        'events_by_day': events_by_day,
+        'session_color_by_day': session_color_by_day,
+        'today': today.day if (today.year, today.month) == (year, month) else None,
+    }
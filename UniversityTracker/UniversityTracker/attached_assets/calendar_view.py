@@ -5,21 +5,88 @@ from PyQt5.QtWidgets import (
     QHeaderView, QTabWidget, QMessageBox, QGroupBox, QSplitter, QFrame,
     QCalendarWidget, QMenu, QAction
 )
-from PyQt5.QtCore import Qt, QDate, QTime, QDateTime, pyqtSignal, pyqtSlot
-from PyQt5.QtGui import QColor, QPalette, QIcon
+from PyQt5.QtCore import Qt, QDate, QTime, QDateTime, QRectF, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QColor, QPalette, QIcon, QPainter
 
 import calendar
 from datetime import datetime, timedelta
 
+from calendar_layout import month_layout
+from database import NON_CONFLICTING_EVENT_TYPES
+from db_worker import AsyncDatabase
+from month_cache import MonthCache
+
+# Event types shown as separate indicators in a day cell; further events
+# collapse into "..."
+MAX_DAY_INDICATORS = 3
+
+
+def _set_style_property(widget, name, value):
+    """
+    Set a dynamic property matched by selectors in style.qss.
+
+    Qt only re-evaluates property selectors when a widget is polished, so
+    the widget is re-polished here, and only if the value changed.
+    """
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+
+
+def _fetch_month(db_manager, year, month):
+    """Load everything the month grid shows (runs on the database worker)."""
+    # Range used to find academic sessions that overlap with this month
+    month_start = f"{year:04d}-{month:02d}-01"
+    if month == 12:
+        month_end = f"{year + 1:04d}-01-01"
+    else:
+        month_end = f"{year:04d}-{month + 1:02d}-01"
+
+    # Read the version first: later changes are then re-applied, never lost
+    version = db_manager.get_data_version()
+    events = db_manager.get_events_for_month(year, month)
+    return {
+        'version': version,
+        'year': year,
+        'month': month,
+        'range': (month_start, month_end),
+        'events': events,
+        'event_ids': {event['id'] for event in events},
+        'sessions': db_manager.get_calendar_events(
+            start_date=month_start,
+            end_date=month_end,
+            event_type="academic_session"
+        ),
+    }
+
+
+def _month_key(year, month):
+    """AsyncDatabase key of the query loading a month."""
+    return f"calendar_month:{year:04d}-{month:02d}"
+
+
+def _adjacent_months(year, month):
+    """The (year, month) pairs before and after a month."""
+    previous = (year - 1, 12) if month == 1 else (year, month - 1)
+    following = (year + 1, 1) if month == 12 else (year, month + 1)
+    return previous, following
+
+
 class AcademicCalendarWidget(QWidget):
     """Widget for academic calendar and exam scheduling."""
     
     # Signal emitted when an exam event is added or modified
     examUpdated = pyqtSignal()
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, async_db=None):
         super(AcademicCalendarWidget, self).__init__()
         self.db_manager = db_manager
+        self.async_db = async_db or AsyncDatabase(db_manager, threaded=False, parent=self)
+        # Loaded months, shown without a query when navigating back to them
+        self.month_cache = MonthCache(db_manager)
         self.init_ui()
         
     def init_ui(self):
@@ -139,93 +206,88 @@ class AcademicCalendarWidget(QWidget):
         # Refresh the calendar
         self.refresh_calendar()
         
+    def apply_changes(self):
+        """Refresh the calendar only if an event shown in, or moved into, the current month changed."""
+        # Drops the cached months the changes touch, the displayed one included
+        self.month_cache.sync()
+        if (self.current_date.year(), self.current_date.month()) not in self.month_cache:
+            self.refresh_calendar()
+        
     def refresh_calendar(self):
         """Refresh the calendar display for the current month."""
         # Update month/year label
         month_name = self.current_date.toString("MMMM")
         month_name = month_name[0].upper() + month_name[1:]  # Capitalize first letter
         year = self.current_date.year()
+        month = self.current_date.month()
         self.month_year_label.setText(f"{month_name} {year}")
         
-        # Get the first day of the month
-        first_day = QDate(year, self.current_date.month(), 1)
-        
-        # Get the day of week for the first day (0 = Monday, 6 = Sunday in Qt)
-        first_day_of_week = first_day.dayOfWeek() - 1  # Adjust to 0-based index
-        
-        # Calculate days in the month
-        days_in_month = first_day.daysInMonth()
-        
-        # Get events for this month from database
-        month_events = self.db_manager.get_events_for_month(year, self.current_date.month())
-        
-        # Get academic sessions that overlap with this month
-        month_start = first_day.toString("yyyy-MM-dd")
-        if self.current_date.month() == 12:
-            month_end = QDate(year + 1, 1, 1).toString("yyyy-MM-dd")
-        else:
-            month_end = QDate(year, self.current_date.month() + 1, 1).toString("yyyy-MM-dd")
+        # Cached months are shown at once, others when the database worker has
+        # loaded them (a prefetch of this month may already be on its way)
+        data = self.month_cache.get(year, month)
+        if data is not None:
+            self._show_month(data)
+        elif not self.async_db.is_pending(_month_key(year, month)):
+            self._load_month(year, month)
             
-        academic_sessions = self.db_manager.get_calendar_events(
-            start_date=month_start, 
-            end_date=month_end,
-            event_type="academic_session"
-        )
-        
-        # Group events by day
-        events_by_day = {}
-        for event in month_events:
-            event_date = QDate.fromString(event['start_date'].split('T')[0], "yyyy-MM-dd")
-            day = event_date.day()
+    def _load_month(self, year, month):
+        """Load a month on the database worker; _month_loaded receives it."""
+        self.async_db.call(_fetch_month, year, month,
+                           callback=self._month_loaded, key=_month_key(year, month))
+        
+    def _month_loaded(self, data):
+        """Cache a loaded month and show it if it is the current one."""
+        current = (data['year'], data['month']) == (self.current_date.year(), self.current_date.month())
+        if not self.month_cache.put(data):
+            # Its events changed while it was loading
+            if current:
+                self._load_month(data['year'], data['month'])
+            return
             
-            if day not in events_by_day:
-                events_by_day[day] = []
-                
-            events_by_day[day].append(event)
+        if current:
+            self._show_month(data)
             
-        # Clear all day cells
-        for week in self.day_cells:
-            for cell in week:
+    def _prefetch_adjacent_months(self, year, month):
+        """Load the months before and after in the background, if not cached yet."""
+        if self.async_db.worker is None:
+            return  # Queries would run inline and slow the navigation down
+            
+        for adjacent in _adjacent_months(year, month):
+            if adjacent not in self.month_cache and not self.async_db.is_pending(_month_key(*adjacent)):
+                self._load_month(*adjacent)
+        
+    def _show_month(self, data):
+        """Redraw the day grid with a month loaded by _fetch_month."""
+        year = data['year']
+        month = data['month']
+        month_events = data['events']
+        
+        layout = month_layout(year, month, month_events, data['sessions'])
+        first_day_of_week = layout['first_weekday']
+        days_in_month = layout['days_in_month']
+        events_by_day = layout['events_by_day']
+        session_color_by_day = layout['session_color_by_day']
+        
+        # Fill in the days; cells outside the month (previous/next month) are hidden
+        cells = [cell for week in self.day_cells for cell in week]
+        for index, cell in enumerate(cells):
+            day = index - first_day_of_week + 1
+            if 1 <= day <= days_in_month:
+                cell.set_day(QDate(year, month, day), events_by_day.get(day, ()),
+                             is_today=day == layout['today'],
+                             in_session=day in session_color_by_day,
+                             session_color=session_color_by_day.get(day) or None)
+                cell.setVisible(True)
+            else:
                 cell.clear()
+                cell.setVisible(False)
                 
-        # Fill in the days
-        day = 1
-        for week_idx in range(6):  # 6 possible weeks in a view
-            for day_idx in range(7):  # 7 days in a week
-                if (week_idx == 0 and day_idx < first_day_of_week) or (day > days_in_month):
-                    # Empty cell (previous/next month)
-                    self.day_cells[week_idx][day_idx].setVisible(False)
-                else:
-                    # Set up the day cell
-                    cell = self.day_cells[week_idx][day_idx]
-                    cell.setVisible(True)
-                    cell.setup(year, self.current_date.month(), day)
-                    
-                    # Add events for this day
-                    if day in events_by_day:
-                        cell.add_events(events_by_day[day])
-                    
-                    # Highlight today
-                    today = QDate.currentDate()
-                    if (year == today.year() and 
-                        self.current_date.month() == today.month() and 
-                        day == today.day()):
-                        cell.highlight_as_today()
-                        
-                    # Check for academic sessions
-                    for session in academic_sessions:
-                        session_start = QDate.fromString(session['start_date'].split('T')[0], "yyyy-MM-dd")
-                        session_end = QDate.fromString(session['end_date'].split('T')[0], "yyyy-MM-dd")
-                        current_date = QDate(year, self.current_date.month(), day)
-                        
-                        if session_start <= current_date <= session_end:
-                            cell.mark_as_session(session['color'])
-                    
-                    day += 1
-                    
         # Update events for the currently selected date, if any
         if hasattr(self, 'selected_date'):
             self.show_events_for_date(self.selected_date)
+            
+        # Have the neighbouring months ready for the previous/next buttons
+        self._prefetch_adjacent_months(year, month)
                     
     def previous_month(self):
         """Navigate to the previous month."""
@@ -281,10 +343,8 @@ class AcademicCalendarWidget(QWidget):
         day_name = day_name[0].upper() + day_name[1:]  # Capitalize first letter
         self.selected_day_label.setText(f"Eventi del {day_name} {date.day()} {date.toString('MMMM yyyy')}")
         
-        # Get events for this date
-        start_date = date.toString("yyyy-MM-dd")
-        end_date = date.addDays(1).toString("yyyy-MM-dd")
-        events = self.db_manager.get_calendar_events(start_date=start_date, end_date=end_date)
+        # Get events covering this date
+        events = self.db_manager.get_events_on_day(date.toString("yyyy-MM-dd"))
         
         # Clear and set up the events table
         self.events_table.setRowCount(0)
@@ -396,6 +456,8 @@ class DayCell(QFrame):
         self.parent_widget = parent
         self.date = None
         self.is_today = False
+        # Background color of the academic session shown, painted over the style.qss one
+        self.session_color = None
         self.init_ui()
         
     def init_ui(self):
@@ -418,6 +480,22 @@ class DayCell(QFrame):
         self.events_layout.setSpacing(1)
         layout.addLayout(self.events_layout)
         
+        # Fixed pool of indicators, reused for every month: one per event type
+        # shown, plus "..." when there are more
+        self.indicators = []
+        for _ in range(MAX_DAY_INDICATORS):
+            indicator = QLabel()
+            indicator.setObjectName("eventIndicator")
+            indicator.setProperty("eventType", "")
+            indicator.hide()
+            self.events_layout.addWidget(indicator)
+            self.indicators.append(indicator)
+            
+        self.more_indicator = QLabel("...")
+        self.more_indicator.setObjectName("moreEvents")
+        self.more_indicator.hide()
+        self.events_layout.addWidget(self.more_indicator)
+        
         # Add stretch to push everything up
         layout.addStretch()
         
@@ -426,123 +504,75 @@ class DayCell(QFrame):
         # Set minimum size
         self.setMinimumSize(100, 80)
         
-        # Default style
-        self.set_default_style()
+        # Default style, see the DayCell rules in style.qss
+        self.setProperty("dayState", "")
+        
+    def set_day(self, date, events=(), is_today=False, in_session=False, session_color=None):
+        """
+        Show a date in the cell.
+        
+        Args:
+            date (QDate): Date shown
+            events (list): Calendar events starting on the date
+            is_today (bool): Highlight the cell as today
+            in_session (bool): The date is part of an academic session
+            session_color (str, optional): Background color of the session;
+                the style.qss one is used if None
+        """
+        self.date = date
+        self.is_today = is_today
+        self.day_label.setText(str(date.day()))
         
-    def set_default_style(self):
-        """Set the default style for the cell."""
-        self.setStyleSheet("""
-        DayCell {
-            background-color: white;
-            border: 1px solid #ccc;
-        }
-        """)
-        
-    def setup(self, year, month, day):
-        """Set up the cell for a specific date."""
-        self.date = QDate(year, month, day)
-        self.day_label.setText(str(day))
-        
-        # Clear any previous events
-        self.clear_events()
+        # Don't override today's highlighting
+        if is_today:
+            state = "today"
+        elif in_session:
+            state = "session"
+        else:
+            state = ""
+        _set_style_property(self, "dayState", state)
+        self._set_session_color(session_color if state == "session" else None)
         
-        # Reset styles
-        self.set_default_style()
-        self.is_today = False
+        self.show_events(events)
         
     def clear(self):
         """Clear the cell completely."""
-        self.day_label.setText("")
-        self.clear_events()
-        self.set_default_style()
+        self.date = None
         self.is_today = False
-        
-    def highlight_as_today(self):
-        """Highlight this cell as today."""
-        self.is_today = True
-        self.setStyleSheet("""
-        DayCell {
-            background-color: #e6f7ff;
-            border: 1px solid #1890ff;
-        }
-        """)
-        
-    def mark_as_session(self, color=None):
-        """Mark this cell as part of an academic session."""
-        bg_color = color if color else "#fff7e6"
-        
-        # Don't override today's highlighting
-        if not self.is_today:
-            self.setStyleSheet(f"""
-            DayCell {{
-                background-color: {bg_color};
-                border: 1px solid #d9d9d9;
-            }}
-            """)
-        
-    def clear_events(self):
-        """Clear all event indicators."""
-        # Remove all widgets from events layout
-        while self.events_layout.count():
-            item = self.events_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-                
-    def add_events(self, events):
-        """Add event indicators to the cell."""
-        # Maximum number of events to show directly
-        max_shown_events = 3
-        
-        # Group events by type
-        event_types = {}
-        for event in events:
-            event_type = event['event_type']
-            if event_type not in event_types:
-                event_types[event_type] = []
-            event_types[event_type].append(event)
+        self.day_label.setText("")
+        _set_style_property(self, "dayState", "")
+        self._set_session_color(None)
+        self.show_events(())
+        
+    def _set_session_color(self, color):
+        if color != self.session_color:
+            self.session_color = color
+            self.update()
             
-        # Add indicator for each event type, up to max_shown_events
-        shown_count = 0
-        for event_type, type_events in event_types.items():
-            if shown_count >= max_shown_events:
-                break
+    def show_events(self, events):
+        """
+        Show one indicator per event type, up to MAX_DAY_INDICATORS.
+        
+        Args:
+            events (list): Calendar events of the day
+        """
+        # Count events by type, in the order the types first appear
+        counts = {}
+        for event in events:
+            counts[event['event_type']] = counts.get(event['event_type'], 0) + 1
+        shown = list(counts.items())[:MAX_DAY_INDICATORS]
+        
+        for index, indicator in enumerate(self.indicators):
+            if index < len(shown):
+                event_type, count = shown[index]
+                indicator.setText(f"{count} {self.get_event_type_short(event_type)}")
+                _set_style_property(indicator, "eventType", event_type)
+                indicator.show()
+            else:
+                indicator.hide()
                 
-            # Create indicator
-            color = self.get_color_for_event_type(event_type)
-            indicator = QLabel(f"{len(type_events)} {self.get_event_type_short(event_type)}")
-            indicator.setStyleSheet(f"""
-            background-color: {color};
-            border-radius: 2px;
-            padding: 1px 3px;
-            color: white;
-            font-size: 8pt;
-            """)
-            
-            self.events_layout.addWidget(indicator)
-            shown_count += 1
-            
         # If there are more events than we can show, add a "more" indicator
-        if sum(len(events) for events in event_types.values()) > shown_count:
-            more_indicator = QLabel("...")
-            more_indicator.setStyleSheet("""
-            color: #888;
-            font-size: 8pt;
-            font-weight: bold;
-            """)
-            self.events_layout.addWidget(more_indicator)
-            
-    def get_color_for_event_type(self, event_type):
-        """Get a color for event type."""
-        colors = {
-            'exam': "#f5222d",  # Red
-            'study': "#1890ff",  # Blue
-            'deadline': "#fa8c16",  # Orange
-            'meeting': "#722ed1",  # Purple
-            'session': "#52c41a",  # Green
-            'holiday': "#eb2f96",  # Pink
-            'other': "#595959"   # Grey
-        }
-        return colors.get(event_type, "#595959")
+        self.more_indicator.setVisible(len(events) > sum(count for _, count in shown))
         
     def get_event_type_short(self, event_type):
         """Get short display name for event type."""
@@ -557,6 +587,21 @@ class DayCell(QFrame):
         }
         return short_names.get(event_type, event_type.capitalize())
         
+    def paintEvent(self, event):
+        super(DayCell, self).paintEvent(event)
+        if self.session_color is None:
+            return
+            
+        # Session colors are chosen by the user, so they are painted here
+        # instead of being written into a per-cell stylesheet
+        color = QColor(self.session_color)
+        if color.isValid():
+            painter = QPainter(self)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(color)
+            painter.drawRoundedRect(QRectF(self.contentsRect()), 3, 3)
+            
     def mouseReleaseEvent(self, event):
         """Handle mouse click to show events for this day."""
         if self.date:
@@ -866,41 +911,64 @@ class EventDialog(QDialog):
         color = self.color_edit.text()
         description = self.description_edit.toPlainText().strip()
         
-        # Save the event
-        if self.event:  # Update existing
-            success = self.db_manager.update_calendar_event(
-                self.event['id'],
-                title=title,
-                event_type=event_type,
-                start_date=start_datetime.toString(Qt.ISODate),
-                end_date=end_datetime.toString(Qt.ISODate),
-                exam_id=exam_id,
-                all_day=is_all_day,
-                location=location or None,
-                description=description or None,
-                color=color
+        # Warn about events clashing with this one (the interval index keeps this cheap)
+        if event_type not in NON_CONFLICTING_EVENT_TYPES:
+            conflicts = self.db_manager.get_conflicting_events(
+                start_datetime.toString(Qt.ISODate),
+                end_datetime.toString(Qt.ISODate),
+                exclude_event_id=self.event['id'] if self.event else None
             )
-        else:  # Create new
-            self.db_manager.add_calendar_event(
-                title=title,
-                event_type=event_type,
-                start_date=start_datetime.toString(Qt.ISODate),
-                end_date=end_datetime.toString(Qt.ISODate),
-                exam_id=exam_id,
-                all_day=is_all_day,
-                location=location or None,
-                description=description or None,
-                color=color
-            )
-            success = True
-            
-        if success:
+            if conflicts:
+                titles = "\n".join(f"- {event['title']}" for event in conflicts[:5])
+                if len(conflicts) > 5:
+                    titles += f"\n... e altri {len(conflicts) - 5}"
+                reply = QMessageBox.question(
+                    self, "Sovrapposizione Eventi",
+                    f"L'evento si sovrappone a:\n{titles}\n\nVuoi salvarlo comunque?",
+                    QMessageBox.Yes | QMessageBox.No,
+                    QMessageBox.No
+                )
+                if reply != QMessageBox.Yes:
+                    return
+                    
+        # Save the event and the linked exam date in a single commit
+        with self.db_manager.transaction():
+            if self.event:  # Update existing
+                success = self.db_manager.update_calendar_event(
+                    self.event['id'],
+                    title=title,
+                    event_type=event_type,
+                    start_date=start_datetime.toString(Qt.ISODate),
+                    end_date=end_datetime.toString(Qt.ISODate),
+                    exam_id=exam_id,
+                    all_day=is_all_day,
+                    location=location or None,
+                    description=description or None,
+                    color=color
+                )
+            else:  # Create new
+                self.db_manager.add_calendar_event(
+                    title=title,
+                    event_type=event_type,
+                    start_date=start_datetime.toString(Qt.ISODate),
+                    end_date=end_datetime.toString(Qt.ISODate),
+                    exam_id=exam_id,
+                    all_day=is_all_day,
+                    location=location or None,
+                    description=description or None,
+                    color=color
+                )
+                success = True
+                
             # If this was an exam event, update the exam date if needed
-            if exam_id and event_type == 'exam':
+            if success and exam_id and event_type == 'exam':
                 self.db_manager.update_exam(
                     exam_id,
                     date=start_date.toString("yyyy-MM-dd")
                 )
+            
+        if success:
+            if exam_id and event_type == 'exam':
                 # Emit signal that an exam was updated
                 if self.parent():
                     self.parent().examUpdated.emit()
@@ -0,0 +1,105 @@
+"""
+Base canvas for the application's matplotlib charts.
+
+Charts create their artists once and later only change their data, so a
+refresh does not rebuild the figure. ChartCanvas then picks the cheapest
+way to show the change: artists marked animated are blitted over a cached
+background when nothing else in the figure changed, and everything else
+goes through draw_idle(), which coalesces repeated refreshes into a single
+render. tight_layout() only runs again after a resize or when a chart says
+its decorations (titles, tick labels) changed.
+"""
+
+from PyQt5.QtWidgets import QSizePolicy
+
+import matplotlib
+matplotlib.use('Qt5Agg')
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+
+class ChartCanvas(FigureCanvas):
+    """Figure canvas with a single axes that updates its artists in place."""
+
+    def __init__(self, parent=None, width=5, height=5, dpi=100):
+        """
+        Args:
+            parent (QWidget, optional): Parent widget
+            width (float): Figure width in inches
+            height (float): Figure height in inches
+            dpi (int): Figure resolution
+        """
+        self.fig = Figure(figsize=(width, height), dpi=dpi)
+        self.axes = self.fig.add_subplot(111)
+        super().__init__(self.fig)
+        self.setParent(parent)
+
+        FigureCanvas.setSizePolicy(self,
+                                   QSizePolicy.Expanding,
+                                   QSizePolicy.Expanding)
+        FigureCanvas.updateGeometry(self)
+
+        # Artists redrawn by blitting, excluded from full draws
+        self.animated_artists = []
+        # Figure rendered without the animated artists, None when stale
+        self._background = None
+        self._layout_stale = True
+        self.mpl_connect('draw_event', self._on_draw)
+
+    def add_animated(self, artist):
+        """
+        Register an artist that changes on refresh and can be blitted.
+
+        Args:
+            artist (Artist): Artist already added to the axes
+
+        Returns:
+            Artist: The same artist
+        """
+        artist.set_animated(True)
+        self.animated_artists.append(artist)
+        return artist
+
+    def invalidate_layout(self):
+        """Recompute tight_layout() on the next full draw."""
+        self._layout_stale = True
+
+    def draw(self):
+        """Render the figure, laying it out first if needed."""
+        if self._layout_stale:
+            self._layout_stale = False
+            self.fig.tight_layout()
+        super().draw()
+
+    def resizeEvent(self, event):
+        self._background = None
+        self.invalidate_layout()
+        super().resizeEvent(event)
+
+    def _on_draw(self, event):
+        """Cache the background after a full draw, then add the animated artists."""
+        self._background = self.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        for artist in self.animated_artists:
+            if artist.get_visible():
+                self.axes.draw_artist(artist)
+
+    def refresh(self, full=False):
+        """
+        Show the updated artists.
+
+        Args:
+            full (bool): Something besides the animated artists changed (axis
+                limits, ticks, labels), so the background must be redrawn
+        """
+        if full or self._background is None or not self.isVisible():
+            # A pending full draw also picks up any later blit-only change
+            self._background = None
+            self.draw_idle()
+            return
+
+        self.restore_region(self._background)
+        self._draw_animated()
+        self.blit(self.fig.bbox)
@@ -3,106 +3,150 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt5.QtCore import Qt, pyqtSlot
 from PyQt5.QtGui import QFont
 
+import math
+
 import matplotlib
-matplotlib.use('Qt5Agg')
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
+from matplotlib.patches import Shadow, Wedge
 
+from aggregates import CareerAggregates
 from calculations import AcademicCalculator
+from charts import ChartCanvas
 
-class PieChartWidget(FigureCanvas):
+class PieChartWidget(ChartCanvas):
     """Widget for displaying a pie chart of exam status."""
     
+    LABELS = ['Superati', 'Non Superati', 'Pianificati']
+    COLORS = ['#4CAF50', '#F44336', '#2196F3']
+    EXPLODE = (0.1, 0, 0)  # explode the 1st slice (Superati)
+    START_ANGLE = 90
+    
     def __init__(self, parent=None, width=5, height=5, dpi=100):
-        self.fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = self.fig.add_subplot(111)
-        super(PieChartWidget, self).__init__(self.fig)
-        self.setParent(parent)
-        
-        FigureCanvas.setSizePolicy(self,
-                                  QSizePolicy.Expanding,
-                                  QSizePolicy.Expanding)
-        FigureCanvas.updateGeometry(self)
+        super(PieChartWidget, self).__init__(parent, width, height, dpi)
+        
+        # Fixed frame, like Axes.pie(): only the animated artists ever change
+        self.axes.set(frame_on=False, xticks=[], yticks=[], xlim=(-1.25, 1.25), ylim=(-1.25, 1.25))
+        self.axes.set_aspect('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
+        
+        # One wedge, shadow, label and percentage per status, hidden while the status has no exams
+        self.wedges = []
+        self.shadows = []
+        self.labels = []
+        self.percentages = []
+        for label, color in zip(self.LABELS, self.COLORS):
+            wedge = self.axes.add_patch(Wedge((0, 0), 1, 0, 0, facecolor=color, clip_on=False, label=label))
+            self.shadows.append(self.add_animated(self.axes.add_patch(
+                Shadow(wedge, -0.02, -0.02, label='_nolegend_'))))
+            self.wedges.append(self.add_animated(wedge))
+            self.labels.append(self.add_animated(self.axes.text(
+                0, 0, label, va='center', fontsize=matplotlib.rcParams['xtick.labelsize'])))
+            self.percentages.append(self.add_animated(self.axes.text(0, 0, '', ha='center', va='center')))
+        
+        self.empty_text = self.add_animated(self.axes.text(
+            0, 0, "Nessun esame da visualizzare",
+            horizontalalignment='center', verticalalignment='center'))
         
     def update_chart(self, passed_count, failed_count, planned_count):
         """Update the pie chart with new data."""
-        self.axes.clear()
-        
-        # Data
-        labels = ['Superati', 'Non Superati', 'Pianificati']
         sizes = [passed_count, failed_count, planned_count]
-        colors = ['#4CAF50', '#F44336', '#2196F3']
-        explode = (0.1, 0, 0)  # explode the 1st slice (Superati)
-        
-        # Only include categories with non-zero values
-        non_zero_labels = []
-        non_zero_sizes = []
-        non_zero_colors = []
-        non_zero_explode = []
+        total = sum(size for size in sizes if size > 0)
         
+        # Only show categories with non-zero values
+        theta1 = self.START_ANGLE / 360
         for i, size in enumerate(sizes):
-            if size > 0:
-                non_zero_labels.append(labels[i])
-                non_zero_sizes.append(size)
-                non_zero_colors.append(colors[i])
-                non_zero_explode.append(explode[i] if i < len(explode) else 0)
-        
-        if sum(non_zero_sizes) > 0:
-            self.axes.pie(non_zero_sizes, explode=non_zero_explode, labels=non_zero_labels, 
-                         colors=non_zero_colors, autopct='%1.1f%%', shadow=True, startangle=90)
-        else:
-            self.axes.text(0.5, 0.5, "Nessun esame da visualizzare", 
-                          horizontalalignment='center', verticalalignment='center')
+            visible = size > 0
+            for artist in (self.wedges[i], self.shadows[i], self.labels[i], self.percentages[i]):
+                artist.set_visible(visible)
+            if not visible:
+                continue
             
-        self.axes.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
-        self.fig.tight_layout()
-        self.draw()
+            # Same geometry as Axes.pie()
+            frac = size / total
+            theta2 = theta1 + frac
+            thetam = math.pi * (theta1 + theta2)
+            x = self.EXPLODE[i] * math.cos(thetam)
+            y = self.EXPLODE[i] * math.sin(thetam)
+            
+            wedge = self.wedges[i]
+            wedge.set_center((x, y))
+            wedge.set_theta1(360 * theta1)
+            wedge.set_theta2(360 * theta2)
+            
+            label_x = x + 1.1 * math.cos(thetam)
+            self.labels[i].set_position((label_x, y + 1.1 * math.sin(thetam)))
+            self.labels[i].set_horizontalalignment('left' if label_x > 0 else 'right')
+            self.percentages[i].set_position((x + 0.6 * math.cos(thetam), y + 0.6 * math.sin(thetam)))
+            self.percentages[i].set_text(f'{100 * frac:1.1f}%')
+            
+            theta1 = theta2
+            
+        self.empty_text.set_visible(total == 0)
+        self.refresh()
 
-class BarChartWidget(FigureCanvas):
+class BarChartWidget(ChartCanvas):
     """Widget for displaying a bar chart of grades distribution."""
     
+    MIN_GRADE = 18
+    
     def __init__(self, parent=None, width=5, height=5, dpi=100):
-        self.fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = self.fig.add_subplot(111)
-        super(BarChartWidget, self).__init__(self.fig)
-        self.setParent(parent)
-        
-        FigureCanvas.setSizePolicy(self,
-                                  QSizePolicy.Expanding,
-                                  QSizePolicy.Expanding)
-        FigureCanvas.updateGeometry(self)
-        
-    def update_chart(self, exams, max_grade=30):
-        """Update the bar chart with new grade distribution."""
-        self.axes.clear()
-        
-        # Extract grades from passed exams
-        grades = [exam['grade'] for exam in exams 
-                 if exam['status'] == 'passed' and exam['grade'] is not None]
-        
-        if not grades:
-            self.axes.text(0.5, 0.5, "Nessun voto da visualizzare", 
-                          horizontalalignment='center', verticalalignment='center')
-            self.draw()
-            return
-            
-        # Create bins for grades (18-30 in Italian system)
-        bins = list(range(18, max_grade + 2))
+        super(BarChartWidget, self).__init__(parent, width, height, dpi)
         
-        # Create histogram
-        self.axes.hist(grades, bins=bins, alpha=0.7, color='#2196F3', edgecolor='black')
+        self.max_grade = None
+        self.bars = []
+        self.empty_text = self.add_animated(self.axes.text(
+            0.5, 0.5, "Nessun voto da visualizzare", transform=self.axes.transAxes,
+            horizontalalignment='center', verticalalignment='center'))
         
         # Add labels and title
         self.axes.set_xlabel('Voti')
         self.axes.set_ylabel('Frequenza')
         self.axes.set_title('Distribuzione dei Voti')
+        self.axes.set_ylim(0, 1)
         
-        # Set x-ticks
-        self.axes.set_xticks(list(range(18, max_grade + 1)))
+    def _create_bars(self, max_grade):
+        """Create one bar per grade (18-30 in Italian system), drawn like a histogram bin."""
+        for bar in self.bars:
+            self.animated_artists.remove(bar)
+            bar.remove()
+            
+        grades = list(range(self.MIN_GRADE, max_grade + 1))
+        container = self.axes.bar(grades, [0] * len(grades), width=1, align='edge', alpha=0.7,
+                                  color='#2196F3', edgecolor='black')
+        self.bars = [self.add_animated(bar) for bar in container]
+        self.max_grade = max_grade
         
-        self.fig.tight_layout()
-        self.draw()
+        # Set x-ticks
+        self.axes.set_xticks(grades)
+        self.axes.set_xlim(self.MIN_GRADE - 0.5, max_grade + 1.5)
+        self.invalidate_layout()
+        
+    def update_chart(self, grade_distribution, max_grade=30):
+        """
+        Update the bar chart with new grade distribution.
+        
+        Args:
+            grade_distribution (dict): Grade as key, number of passed exams as value
+            max_grade (int): Maximum possible grade
+        """
+        full = False
+        if max_grade != self.max_grade:
+            self._create_bars(max_grade)
+            full = True
+            
+        counts = [grade_distribution.get(self.MIN_GRADE + i, 0) for i in range(len(self.bars))]
+        for bar, count in zip(self.bars, counts):
+            bar.set_height(count)
+            
+        # Keep the y axis while the tallest bar still fits comfortably, so
+        # most updates only blit the bars
+        tallest = max(counts, default=0)
+        top = self.axes.get_ylim()[1]
+        new_top = max(1, tallest * 1.2)
+        if tallest > top or new_top * 2 < top:
+            self.axes.set_ylim(0, new_top)
+            full = True
+            
+        self.empty_text.set_visible(not grade_distribution)
+        self.refresh(full)
 
 class StatCard(QFrame):
     """A card widget displaying a statistic with title and value."""
@@ -144,9 +188,10 @@ class StatCard(QFrame):
 class DashboardWidget(QWidget):
     """Dashboard widget showing overview of academic progress."""
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, aggregates=None):
         super(DashboardWidget, self).__init__()
         self.db_manager = db_manager
+        self.aggregates = aggregates or CareerAggregates(db_manager)
         self.calculator = AcademicCalculator()
         
         self.init_ui()
@@ -225,23 +270,34 @@ class DashboardWidget(QWidget):
         
         self.setLayout(main_layout)
         
+    @pyqtSlot()
+    def apply_changes(self):
+        """Refresh the dashboard only if exams or settings changed since the last refresh."""
+        changes = self.db_manager.get_changes_since(self.data_version, ('exams', 'settings'))
+        if changes is None or any(changes[entity]['upserted'] or changes[entity]['deleted']
+                                  for entity in ('exams', 'settings')):
+            self.refresh_data()
+        else:
+            self.data_version = changes['version']
+            
     @pyqtSlot()
     def refresh_data(self):
         """Refresh dashboard with latest data from the database."""
-        # Get all exams
-        all_exams = self.db_manager.get_all_exams()
-        passed_exams = self.db_manager.get_passed_exams()
-        failed_exams = self.db_manager.get_failed_exams()
-        planned_exams = self.db_manager.get_planned_exams()
+        self.data_version = self.db_manager.get_data_version()
+        
+        # Running per-status totals and grade counts, updated per exam change
+        summary = self.aggregates.summary()
+        grade_distribution = self.aggregates.grade_distribution()
         
         # Get degree settings
-        total_required_credits = int(self.db_manager.get_setting('total_credits', 180))
-        max_grade = int(self.db_manager.get_setting('max_grade', 30))
+        total_required_credits = self.db_manager.get_int('total_credits', 180)
+        max_grade = self.db_manager.get_int('max_grade', 30)
         
         # Calculate statistics
-        earned_credits = self.calculator.calculate_total_credits(all_exams)
-        simple_avg = self.calculator.calculate_simple_average(all_exams)
-        weighted_avg = self.calculator.calculate_weighted_average(all_exams)
+        stats = self.calculator.calculate_statistics_from_summary(summary)
+        earned_credits = stats['earned_credits']
+        simple_avg = stats['simple_average']
+        weighted_avg = stats['weighted_average']
         
         # Convert averages to 110 scale
         simple_avg_110 = self.calculator.convert_to_110_scale(simple_avg, max_grade)
@@ -255,14 +311,10 @@ class DashboardWidget(QWidget):
         self.credits_card.update_value(f"{earned_credits}/{total_required_credits}")
         self.average_card.update_value(f"{simple_avg_110:.2f}")
         self.weighted_avg_card.update_value(f"{weighted_avg_110:.2f}")
-        self.exams_passed_card.update_value(str(len(passed_exams)))
+        self.exams_passed_card.update_value(str(stats['passed_count']))
         
         self.progress_bar.setValue(int(progress_percentage))
         
         # Update charts
-        passed_count = len(passed_exams)
-        failed_count = len(failed_exams)
-        planned_count = len(planned_exams)
-        
-        self.pie_chart.update_chart(passed_count, failed_count, planned_count)
-        self.bar_chart.update_chart(passed_exams, max_grade)
+        self.pie_chart.update_chart(stats['passed_count'], stats['failed_count'], stats['planned_count'])
+        self.bar_chart.update_chart(grade_distribution, max_grade)
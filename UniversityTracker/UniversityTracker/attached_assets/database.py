@@ -1,12 +1,139 @@
 import os
+import re
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import islice
+
+import backup
+import merge
+from merge import DEFAULT_MERGE_POLICY
+from migrations import MAX_INTERVAL_KEY, MIN_INTERVAL_KEY, interval_key_sql, migrate
+from records import AcademicSession, CalendarEvent, Exam
+
+# Number of records sent to executemany() per batch by the bulk methods
+DEFAULT_BULK_CHUNK_SIZE = 500
+
+# Rows fetched per fetchmany() call by the iter_* methods
+DEFAULT_FETCH_BATCH_SIZE = 500
+
+# Rows per page returned by the keyset-paginated get_*_page methods
+DEFAULT_PAGE_SIZE = 100
+
+# Connection PRAGMAs, applied in order, for each performance profile.
+# 'performance' lets readers and the writer work concurrently (WAL) and only
+# syncs at checkpoints; 'safe' keeps SQLite's rollback-journal defaults.
+PRAGMA_PROFILES = {
+    'performance': [
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('cache_size', -20000),         # Negative values are KiB (~20 MB)
+        ('mmap_size', 64 * 1024 * 1024),
+        ('temp_store', 'MEMORY'),
+        ('foreign_keys', 'ON'),
+    ],
+    'safe': [
+        ('journal_mode', 'DELETE'),
+        ('synchronous', 'FULL'),
+        ('foreign_keys', 'ON'),
+    ],
+}
+
+DEFAULT_PROFILE = 'performance'
+
+# Run PRAGMA optimize (and a passive WAL checkpoint) after this many commits
+OPTIMIZE_INTERVAL_COMMITS = 1000
+
+# Number of most recent change_log entries kept when optimize() prunes the log
+CHANGE_LOG_RETENTION = 10000
+
+# Tables whose row changes are recorded in change_log
+TRACKED_ENTITIES = ('exams', 'calendar_events', 'academic_sessions', 'settings')
+
+# Event types that span other events without clashing with them
+NON_CONFLICTING_EVENT_TYPES = ('academic_session', 'holiday')
+
+# Candidate filters on calendar_events_rtree (alias r) for the range [?, ?];
+# the exact ISO-string test on calendar_events (alias e) must follow. The
+# IN subquery keeps SQLite from scanning calendar_events to build a join
+# Bloom filter, which costs more than the whole R*Tree search.
+_RTREE_OVERLAP = (f"r.end_key >= {interval_key_sql('?', MIN_INTERVAL_KEY)} "
+                  f"AND r.start_key <= {interval_key_sql('?', MAX_INTERVAL_KEY)}")
+_RTREE_CANDIDATES = f"e.id IN (SELECT r.id FROM calendar_events_rtree AS r WHERE {_RTREE_OVERLAP})"
+
+
+def apply_pragma_profile(conn, profile=DEFAULT_PROFILE):
+    """
+    Apply a performance profile to a connection.
+    
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        profile (str or list): Name of a PRAGMA_PROFILES entry, or a list
+            of (pragma, value) pairs
+    """
+    pragmas = PRAGMA_PROFILES[profile] if isinstance(profile, str) else profile
+    for pragma, value in pragmas:
+        # PRAGMA does not accept bound parameters; values come from the profile
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+
+# Searchable entities: FTS5 table, weights of its columns for bm25() and the
+# column shown as the result title
+SEARCH_INDEXES = {
+    'exams': ('exams_fts', (10.0, 1.0), 'name'),
+    'calendar_events': ('calendar_events_fts', (10.0, 1.0, 2.0), 'title'),
+}
+
+# Highest number of results returned by DatabaseManager.search()
+DEFAULT_SEARCH_LIMIT = 20
+
+# bm25() has to score every match before the best ones are known. When a
+# query (typically a one- or two-letter prefix) matches more rows than this,
+# search() returns the newest matches instead of ranking them all.
+SEARCH_RANK_CANDIDATES = 2000
+
+
+def fts_prefix_query(text):
+    """
+    Turn free text typed by the user into an FTS5 prefix query.
+    
+    Every word must match the start of a token, so "anal mat" finds
+    "Analisi Matematica". Only word characters are kept, which also keeps
+    FTS5 operators out of the query.
+    
+    Args:
+        text (str): Text typed by the user
+        
+    Returns:
+        str: FTS5 MATCH expression, or None if the text has no words
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _chunked(iterable, size):
+    """Yield successive lists of at most size items from any iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 class DatabaseManager:
     """Manages all database operations for the University Career Manager."""
     
-    def __init__(self, db_path=None):
-        """Initialize database connection and create tables if they don't exist."""
+    def __init__(self, db_path=None, profile=DEFAULT_PROFILE):
+        """
+        Initialize database connection and create tables if they don't exist.
+        
+        Args:
+            db_path (str, optional): Database file (defaults to the user's Documents folder)
+            profile (str or list): PRAGMA profile, see PRAGMA_PROFILES
+        """
         if db_path is None:
             # Use user's documents folder for database storage
             documents_folder = os.path.join(os.path.expanduser("~"), "Documents")
@@ -18,70 +145,50 @@ class DatabaseManager:
                 
             db_path = os.path.join(app_folder, "university_career.db")
         
+        self.db_path = db_path
+        self.profile = profile
+        
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
         self.cursor = self.conn.cursor()
+        apply_pragma_profile(self.conn, profile)
+        
+        # Nesting depth of transaction() blocks; commits are deferred while > 0
+        self._transaction_depth = 0
+        self._commits_since_optimize = 0
+        
+        # Settings table cache, loaded on first use (see _settings)
+        self._settings_cache = None
+        self._settings_data_version = None
+        
+        # Objects told about exam writes made through this manager, see add_exam_observer
+        self.exam_observers = []
         
-        # Create tables if they don't exist
+        # Create or upgrade the schema
         self._create_tables()
         
-    def _create_tables(self):
-        """Create necessary database tables if they don't exist."""
-        # Exams table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS exams (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            credits INTEGER NOT NULL,
-            grade INTEGER,
-            status TEXT NOT NULL,
-            date TEXT,
-            notes TEXT,
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL
-        )
-        ''')
-        
-        # Settings table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS settings (
-            key TEXT PRIMARY KEY,
-            value TEXT NOT NULL
-        )
-        ''')
+    def add_exam_observer(self, observer):
+        """
+        Register an object to be told about exam writes made through this manager.
         
-        # Calendar events table for exam scheduling
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS calendar_events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            exam_id INTEGER,
-            title TEXT NOT NULL,
-            event_type TEXT NOT NULL,
-            start_date TEXT NOT NULL,
-            end_date TEXT NOT NULL,
-            all_day INTEGER NOT NULL DEFAULT 1,
-            location TEXT,
-            description TEXT,
-            color TEXT,
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL,
-            FOREIGN KEY (exam_id) REFERENCES exams(id) ON DELETE CASCADE
-        )
-        ''')
-        
-        # Academic sessions table for storing exam periods
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS academic_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            start_date TEXT NOT NULL,
-            end_date TEXT NOT NULL,
-            color TEXT,
-            description TEXT,
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL
-        )
-        ''')
+        After add_exam, update_exam and delete_exam the observer's
+        exam_changed(old, new) is called with the exam before and after the
+        write (None when it was added or deleted). Bulk writes and imports
+        call exams_reset() instead. Writes made by other connections are
+        not reported; observers can detect them through the change log.
+        
+        Args:
+            observer (object): Object with exam_changed and exams_reset methods
+        """
+        self.exam_observers.append(observer)
+        
+    def remove_exam_observer(self, observer):
+        """Stop reporting exam writes to an observer."""
+        self.exam_observers.remove(observer)
+        
+    def _create_tables(self):
+        """Apply pending schema migrations and insert default settings."""
+        migrate(self.conn)
         
         # Insert default settings if they don't exist
         default_settings = [
@@ -100,6 +207,171 @@ class DatabaseManager:
             
         self.conn.commit()
         
+    @contextmanager
+    def transaction(self):
+        """
+        Group several writes into a single commit.
+        
+        The outermost block opens a transaction that is committed when the
+        block exits normally and rolled back if it raises. Nested blocks use
+        savepoints, so an inner failure only undoes the inner writes.
+        
+        Usage:
+            with db_manager.transaction():
+                db_manager.add_exam(...)
+                db_manager.add_calendar_event(...)
+        """
+        depth = self._transaction_depth
+        savepoint = f"sp_{depth}"
+        
+        if depth == 0:
+            if not self.conn.in_transaction:
+                self.conn.execute("BEGIN")
+        else:
+            self.conn.execute(f"SAVEPOINT {savepoint}")
+            
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            # Cached settings may hold values that are being rolled back
+            self.invalidate_settings_cache()
+            if depth == 0:
+                self.conn.rollback()
+            else:
+                self.conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                self.conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+            # Observers may have applied deltas for the undone writes, and the
+            # change log cannot tell: its versions are reused after a rollback
+            self._exams_reset()
+            raise
+        else:
+            self._transaction_depth -= 1
+            if depth == 0:
+                self.conn.commit()
+                self._after_commit()
+            else:
+                self.conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+                
+    def in_transaction(self):
+        """Return True while inside a transaction() block."""
+        return self._transaction_depth > 0
+        
+    def _commit(self):
+        """Commit the current write unless a transaction() block will do it."""
+        if self._transaction_depth == 0:
+            self.conn.commit()
+            self._after_commit()
+            
+    def _after_commit(self):
+        """Run periodic maintenance once enough commits have accumulated."""
+        self._commits_since_optimize += 1
+        if self._commits_since_optimize >= OPTIMIZE_INTERVAL_COMMITS:
+            self.optimize()
+            
+    def optimize(self, checkpoint_mode="PASSIVE"):
+        """
+        Refresh query planner statistics and checkpoint the WAL.
+        
+        Args:
+            checkpoint_mode (str): 'PASSIVE', 'FULL', 'RESTART' or 'TRUNCATE'
+        """
+        self._commits_since_optimize = 0
+        if self._transaction_depth > 0:
+            return
+            
+        self.prune_change_log()
+        self.conn.execute("PRAGMA optimize")
+        if self.conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal':
+            self.conn.execute(f"PRAGMA wal_checkpoint({checkpoint_mode})")
+            
+    def export_database(self, dest_path, compact=False, progress=None, cancel=None):
+        """
+        Write a consistent copy of the database to another file.
+        
+        Uses the SQLite online backup API (see backup.py), so the copy
+        includes changes that are still in the WAL and never sees a
+        half-written commit. Run it on a DatabaseWorker to keep the UI
+        responsive; progress and cancel make it interruptible.
+        
+        Args:
+            dest_path (str): Destination file path (replaced if it exists)
+            compact (bool): Write a compacted VACUUM INTO snapshot instead
+            progress (callable, optional): Called as progress(copied, total) in pages
+            cancel (threading.Event, optional): Set to abort the export
+            
+        Raises:
+            BackupCancelled: If cancel was set before the export completed
+        """
+        backup.export_database(self.conn, dest_path, compact=compact,
+                               progress=progress, cancel=cancel)
+        
+    def import_database(self, src_path, progress=None, cancel=None):
+        """
+        Replace the contents of the database with those of another file.
+        
+        The copy is made through the backup API into the open connection,
+        so it is safe in WAL mode and needs no file juggling. The imported
+        schema is then upgraded to the current version.
+        
+        Args:
+            src_path (str): Database file to import
+            progress (callable, optional): Called as progress(copied, total) in pages
+            cancel (threading.Event, optional): Set to abort the import; the
+                database is left unchanged
+            
+        Raises:
+            BackupCancelled: If cancel was set before the import completed
+        """
+        backup.restore_database(self.conn, src_path, progress=progress, cancel=cancel)
+        
+        apply_pragma_profile(self.conn, self.profile)
+        self._create_tables()
+        self.invalidate_settings_cache()
+        self._exams_reset()
+        
+    def merge_database(self, src_path, policy=DEFAULT_MERGE_POLICY, progress=None, cancel=None):
+        """
+        Merge the exams, events and sessions of another database file.
+        
+        Unlike import_database, nothing is replaced wholesale: rows are
+        matched by natural key (see merge.py), new ones are inserted and
+        conflicting ones resolved by policy, all in one transaction. The
+        change log records every merged row, so open views catch up
+        through apply_changes() without a restart. Settings are not merged.
+        
+        The source is attached to the connection, which SQLite does not
+        allow inside a transaction, so the merge cannot be part of a
+        transaction() block; it refuses to run rather than commit the
+        caller's pending writes.
+        
+        Args:
+            src_path (str): Database file to merge from
+            policy (str): Conflict policy, one of merge.MERGE_POLICIES
+            progress (callable, optional): Called as progress(merged, total) in tables
+            cancel (threading.Event, optional): Set to abort the merge; the
+                database is left unchanged
+            
+        Returns:
+            dict: {table: {'inserted': n, 'updated': n, 'unchanged': n,
+                'skipped': n}} for each merged table
+            
+        Raises:
+            MergeCancelled: If cancel was set before the merge completed
+            ValueError: If src_path is not a University Career Manager database
+            RuntimeError: If called inside a transaction
+        """
+        if self._transaction_depth > 0 or self.conn.in_transaction:
+            raise RuntimeError("merge_database() cannot run inside a transaction")
+            
+        with merge.attached(self.conn, src_path):
+            with self.transaction():
+                report = merge.merge_tables(self.conn, policy, progress=progress, cancel=cancel)
+                
+        self._exams_reset()
+        return report
+                
     def add_exam(self, name, credits, grade=None, status="planned", date=None, notes=None):
         """
         Add a new exam to the database.
@@ -122,8 +394,13 @@ class DatabaseManager:
         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         ''', (name, credits, grade, status, date, notes, now, now))
         
-        self.conn.commit()
-        return self.cursor.lastrowid
+        self._commit()
+        exam_id = self.cursor.lastrowid
+        
+        for observer in self.exam_observers:
+            observer.exam_changed(None, Exam(exam_id, name, credits, grade, status, date, notes, now, now))
+            
+        return exam_id
         
     def update_exam(self, exam_id, name=None, credits=None, grade=None, status=None, date=None, notes=None):
         """
@@ -163,9 +440,131 @@ class DatabaseManager:
         WHERE id = ?
         ''', (name, credits, grade, status, date, notes, updated_at, exam_id))
         
-        self.conn.commit()
+        self._commit()
+        
+        for observer in self.exam_observers:
+            observer.exam_changed(exam, Exam(exam_id, name, credits, grade, status, date, notes,
+                                             exam['created_at'], updated_at))
+            
         return True
         
+    def add_exams_bulk(self, exams, chunk_size=DEFAULT_BULK_CHUNK_SIZE):
+        """
+        Add many exams in a single transaction.
+        
+        Args:
+            exams (iterable): Exam dictionaries with the same keys as the
+                add_exam() arguments ('name' and 'credits' are required)
+            chunk_size (int): Number of rows inserted per executemany() call
+            
+        Returns:
+            list: IDs of the newly added exams, in input order
+        """
+        ids = []
+        
+        with self.transaction():
+            for chunk in _chunked(exams, chunk_size):
+                now = datetime.now().isoformat()
+                self.cursor.executemany('''
+                INSERT INTO exams (name, credits, grade, status, date, notes, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(exam['name'], exam['credits'], exam.get('grade'),
+                       exam.get('status', 'planned'), exam.get('date'), exam.get('notes'),
+                       now, now) for exam in chunk])
+                ids.extend(self._inserted_ids(len(chunk)))
+                
+        self._exams_reset()
+        return ids
+        
+    def update_exams_bulk(self, updates, chunk_size=DEFAULT_BULK_CHUNK_SIZE):
+        """
+        Update many exams in a single transaction.
+        
+        As with update_exam(), fields that are missing or None keep their
+        current value.
+        
+        Args:
+            updates (iterable): Dictionaries with an 'id' key plus the fields to change
+            chunk_size (int): Number of rows updated per executemany() call
+            
+        Returns:
+            int: Number of exams updated
+        """
+        updated = 0
+        
+        with self.transaction():
+            for chunk in _chunked(updates, chunk_size):
+                now = datetime.now().isoformat()
+                self.cursor.executemany('''
+                UPDATE exams
+                SET name = COALESCE(?, name), credits = COALESCE(?, credits),
+                    grade = COALESCE(?, grade), status = COALESCE(?, status),
+                    date = COALESCE(?, date), notes = COALESCE(?, notes), updated_at = ?
+                WHERE id = ?
+                ''', [(exam.get('name'), exam.get('credits'), exam.get('grade'),
+                       exam.get('status'), exam.get('date'), exam.get('notes'),
+                       now, exam['id']) for exam in chunk])
+                updated += self.cursor.rowcount
+                
+        self._exams_reset()
+        return updated
+        
+    def _exams_reset(self):
+        """Tell the exam observers that many exams may have changed."""
+        for observer in self.exam_observers:
+            observer.exams_reset()
+            
+    def _inserted_ids(self, count):
+        """
+        Return the IDs assigned by the last executemany() INSERT of count rows.
+        
+        AUTOINCREMENT allocates consecutive IDs, and the open write
+        transaction keeps other connections from interleaving rows.
+        """
+        last_id = self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return list(range(last_id - count + 1, last_id + 1))
+        
+    def _fetch_records(self, record_type, query, params=()):
+        """
+        Run a query and return its rows as records (see records.py).
+        
+        Args:
+            record_type (type): Record class matching the selected table
+            query (str): SELECT statement, normally SELECT * on that table
+            params (sequence): Query parameters
+            
+        Returns:
+            list: List of record_type instances
+        """
+        # A separate cursor keeps the record factory off self.cursor
+        cursor = self.conn.execute(query, params)
+        cursor.row_factory = record_type.row_factory(cursor.description)
+        return cursor.fetchall()
+        
+    def _fetch_record(self, record_type, query, params=()):
+        """Like _fetch_records, for queries returning at most one row (None if none)."""
+        cursor = self.conn.execute(query, params)
+        cursor.row_factory = record_type.row_factory(cursor.description)
+        return cursor.fetchone()
+        
+    def _iter_records(self, record_type, query, params=(), batch_size=DEFAULT_FETCH_BATCH_SIZE):
+        """
+        Like _fetch_records, but yield the records batch_size rows at a time.
+        
+        Only one batch is held in memory, however many rows the query returns.
+        The statement stays open until the generator is exhausted or closed.
+        """
+        cursor = self.conn.execute(query, params)
+        cursor.row_factory = record_type.row_factory(cursor.description)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+            
     def delete_exam(self, exam_id):
         """
         Delete an exam from the database.
@@ -176,9 +575,19 @@ class DatabaseManager:
         Returns:
             bool: True if successful, False otherwise
         """
+        # The observers need the deleted values
+        exam = self.get_exam(exam_id) if self.exam_observers else None
+        
         self.cursor.execute("DELETE FROM exams WHERE id = ?", (exam_id,))
-        self.conn.commit()
-        return self.cursor.rowcount > 0
+        # Read before committing: commit maintenance may run other statements
+        deleted = self.cursor.rowcount > 0
+        self._commit()
+        
+        if deleted and exam is not None:
+            for observer in self.exam_observers:
+                observer.exam_changed(exam, None)
+                
+        return deleted
         
     def get_exam(self, exam_id):
         """
@@ -188,11 +597,9 @@ class DatabaseManager:
             exam_id (int): ID of the exam
             
         Returns:
-            dict: Exam data or None if not found
+            Exam: Exam record or None if not found
         """
-        self.cursor.execute("SELECT * FROM exams WHERE id = ?", (exam_id,))
-        exam = self.cursor.fetchone()
-        return dict(exam) if exam else None
+        return self._fetch_record(Exam, "SELECT * FROM exams WHERE id = ?", (exam_id,))
         
     def get_all_exams(self, status=None):
         """
@@ -202,14 +609,99 @@ class DatabaseManager:
             status (str, optional): Filter by status ('passed', 'failed', 'planned')
             
         Returns:
-            list: List of exam dictionaries
+            list: List of Exam records
+        """
+        return self._fetch_records(Exam, *self._exams_query(status))
+        
+    def iter_exams(self, status=None, batch_size=DEFAULT_FETCH_BATCH_SIZE):
+        """
+        Iterate over exams in get_all_exams order without loading them all.
+        
+        Rows are fetched batch_size at a time, so memory use does not grow
+        with the number of exams. Do not modify the exams table on this
+        connection while iterating; collect the changes and apply them once
+        the iteration is over, or walk the table with get_exams_page.
+        
+        Args:
+            status (str, optional): Filter by status ('passed', 'failed', 'planned')
+            batch_size (int): Rows per fetchmany() call
+            
+        Yields:
+            Exam: Exam records, most recent date first
         """
+        return self._iter_records(Exam, *self._exams_query(status), batch_size=batch_size)
+        
+    def get_exams_page(self, status=None, after=None, limit=DEFAULT_PAGE_SIZE):
+        """
+        Get one page of exams using keyset pagination.
+        
+        Pages follow the get_all_exams order (most recent date first, undated
+        exams last) with id DESC breaking ties. Each page seeks straight past
+        the previous one through the (date, id) index, so a page deep in a
+        long history costs the same as the first one, unlike OFFSET.
+        
+        Args:
+            status (str, optional): Filter by status ('passed', 'failed', 'planned')
+            after (tuple, optional): (date, id) of the last exam of the previous
+                page; None for the first page
+            limit (int): Maximum number of exams to return
+            
+        Returns:
+            list: Up to limit Exam records; pass (exam['date'], exam['id']) of
+                the last one as after to get the next page
+        """
+        conditions = []
+        params = []
         if status:
-            self.cursor.execute("SELECT * FROM exams WHERE status = ? ORDER BY date DESC", (status,))
-        else:
-            self.cursor.execute("SELECT * FROM exams ORDER BY date DESC")
+            conditions.append("status = ?")
+            params.append(status)
             
-        return [dict(row) for row in self.cursor.fetchall()]
+        after_date, after_id = after if after is not None else (None, None)
+        exams = []
+        
+        if after is None or after_date is not None:
+            # Dated exams; a NULL date never satisfies the row-value comparison
+            keyset = "date IS NOT NULL" if after is None else "(date, id) < (?, ?)"
+            keyset_params = [] if after is None else [after_date, after_id]
+            where = " AND ".join(conditions + [keyset])
+            exams = self._fetch_records(
+                Exam, f"SELECT * FROM exams WHERE {where} ORDER BY date DESC, id DESC LIMIT ?",
+                params + keyset_params + [limit])
+            
+        if len(exams) < limit:
+            # Undated exams come last, in id order
+            keyset, keyset_params = "date IS NULL", []
+            if after is not None and after_date is None:
+                keyset, keyset_params = "date IS NULL AND id < ?", [after_id]
+            where = " AND ".join(conditions + [keyset])
+            exams.extend(self._fetch_records(
+                Exam, f"SELECT * FROM exams WHERE {where} ORDER BY id DESC LIMIT ?",
+                params + keyset_params + [limit - len(exams)]))
+            
+        return exams
+        
+    def _exams_query(self, status=None):
+        """Return the (query, params) selecting exams for get_all_exams and iter_exams."""
+        # id breaks date ties, giving the same order as get_exams_page
+        if status:
+            return "SELECT * FROM exams WHERE status = ? ORDER BY date DESC, id DESC", (status,)
+        return "SELECT * FROM exams ORDER BY date DESC, id DESC", ()
+        
+    def get_exams_by_ids(self, exam_ids):
+        """
+        Get the exams with the given IDs.
+        
+        Args:
+            exam_ids (iterable): Exam IDs (missing IDs are ignored)
+            
+        Returns:
+            list: List of Exam records, in no particular order
+        """
+        exams = []
+        for chunk in _chunked(exam_ids, DEFAULT_BULK_CHUNK_SIZE):
+            placeholders = ", ".join("?" * len(chunk))
+            exams.extend(self._fetch_records(Exam, f"SELECT * FROM exams WHERE id IN ({placeholders})", chunk))
+        return exams
         
     def get_passed_exams(self):
         """Get all passed exams."""
@@ -223,6 +715,26 @@ class DatabaseManager:
         """Get all planned exams."""
         return self.get_all_exams('planned')
         
+    def _settings(self):
+        """
+        Return the cached settings dictionary, reloading it when needed.
+        
+        PRAGMA data_version changes whenever another connection commits, so
+        edits made outside this DatabaseManager also invalidate the cache.
+        """
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        
+        if self._settings_cache is None or data_version != self._settings_data_version:
+            self.cursor.execute("SELECT key, value FROM settings")
+            self._settings_cache = {row['key']: row['value'] for row in self.cursor.fetchall()}
+            self._settings_data_version = data_version
+            
+        return self._settings_cache
+        
+    def invalidate_settings_cache(self):
+        """Force the next settings read to reload from the database."""
+        self._settings_cache = None
+        
     def get_setting(self, key, default=None):
         """
         Get a setting value by key.
@@ -234,12 +746,39 @@ class DatabaseManager:
         Returns:
             str: Setting value or default
         """
-        self.cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
-        result = self.cursor.fetchone()
+        return self._settings().get(key, default)
+        
+    def get_int(self, key, default=0):
+        """
+        Get a setting value as an integer.
+        
+        Args:
+            key (str): Setting key
+            default (int): Value returned if the setting is missing or not a number
+            
+        Returns:
+            int: Setting value or default
+        """
+        try:
+            return int(self._settings()[key])
+        except (KeyError, ValueError):
+            return default
+            
+    def get_float(self, key, default=0.0):
+        """
+        Get a setting value as a float.
         
-        if result:
-            return result['value']
-        return default
+        Args:
+            key (str): Setting key
+            default (float): Value returned if the setting is missing or not a number
+            
+        Returns:
+            float: Setting value or default
+        """
+        try:
+            return float(self._settings()[key])
+        except (KeyError, ValueError):
+            return default
         
     def update_setting(self, key, value):
         """
@@ -252,12 +791,36 @@ class DatabaseManager:
         Returns:
             bool: True if successful
         """
+        # Skip no-op writes so they don't show up as changes
+        if self._settings().get(key) == str(value):
+            return True
+            
         self.cursor.execute('''
         INSERT OR REPLACE INTO settings (key, value)
         VALUES (?, ?)
         ''', (key, value))
         
-        self.conn.commit()
+        # Write through to the cache (the column has TEXT affinity)
+        if self._settings_cache is not None:
+            self._settings_cache[key] = str(value)
+            
+        self._commit()
+        return True
+        
+    def update_settings(self, values):
+        """
+        Update several settings with a single commit.
+        
+        Args:
+            values (dict): Setting keys and their new values
+            
+        Returns:
+            bool: True if successful
+        """
+        with self.transaction():
+            for key, value in values.items():
+                self.update_setting(key, value)
+                
         return True
         
     def get_total_credits(self):
@@ -281,6 +844,57 @@ class DatabaseManager:
         result = self.cursor.fetchone()
         return result['count'] if result else 0
     
+    def get_exam_summary(self):
+        """
+        Get per-status aggregates for all exams in a single query.
+        
+        Returns:
+            dict: Keyed by status ('passed', 'failed', 'planned'; other
+                statuses are included if present). Each value is a dict with:
+                - 'count': number of exams
+                - 'credits': sum of credits
+                - 'graded_count': number of exams with a grade
+                - 'graded_credits': sum of credits of exams with a grade
+                - 'grade_sum': sum of grades
+                - 'weighted_grade_sum': sum of grade * credits
+        """
+        summary = {status: {'count': 0, 'credits': 0, 'graded_count': 0,
+                            'graded_credits': 0, 'grade_sum': 0, 'weighted_grade_sum': 0}
+                   for status in ('passed', 'failed', 'planned')}
+        
+        self.cursor.execute("""
+        SELECT status,
+               COUNT(*) AS count,
+               COALESCE(SUM(credits), 0) AS credits,
+               COUNT(grade) AS graded_count,
+               COALESCE(SUM(CASE WHEN grade IS NOT NULL THEN credits END), 0) AS graded_credits,
+               COALESCE(SUM(grade), 0) AS grade_sum,
+               COALESCE(SUM(grade * credits), 0) AS weighted_grade_sum
+        FROM exams
+        GROUP BY status
+        """)
+        
+        for row in self.cursor.fetchall():
+            summary[row['status']] = {key: row[key] for key in row.keys() if key != 'status'}
+            
+        return summary
+        
+    def get_grade_distribution(self):
+        """
+        Get the number of passed exams for each grade.
+        
+        Returns:
+            dict: Grade as key, number of passed exams with that grade as value
+        """
+        self.cursor.execute("""
+        SELECT grade, COUNT(*) AS count
+        FROM exams
+        WHERE status = 'passed' AND grade IS NOT NULL
+        GROUP BY grade
+        """)
+        
+        return {row['grade']: row['count'] for row in self.cursor.fetchall()}
+    
     # Calendar event methods
     def add_calendar_event(self, title, event_type, start_date, end_date, exam_id=None, 
                          all_day=True, location=None, description=None, color=None):
@@ -310,9 +924,40 @@ class DatabaseManager:
         ''', (exam_id, title, event_type, start_date, end_date, 
               1 if all_day else 0, location, description, color, now, now))
         
-        self.conn.commit()
+        self._commit()
         return self.cursor.lastrowid
         
+    def add_calendar_events_bulk(self, events, chunk_size=DEFAULT_BULK_CHUNK_SIZE):
+        """
+        Add many calendar events in a single transaction.
+        
+        Args:
+            events (iterable): Event dictionaries with the same keys as the
+                add_calendar_event() arguments ('title', 'event_type',
+                'start_date' and 'end_date' are required)
+            chunk_size (int): Number of rows inserted per executemany() call
+            
+        Returns:
+            list: IDs of the newly added events, in input order
+        """
+        ids = []
+        
+        with self.transaction():
+            for chunk in _chunked(events, chunk_size):
+                now = datetime.now().isoformat()
+                self.cursor.executemany('''
+                INSERT INTO calendar_events (exam_id, title, event_type, start_date, end_date,
+                                             all_day, location, description, color, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(event.get('exam_id'), event['title'], event['event_type'],
+                       event['start_date'], event['end_date'],
+                       1 if event.get('all_day', True) else 0, event.get('location'),
+                       event.get('description'), event.get('color'), now, now)
+                      for event in chunk])
+                ids.extend(self._inserted_ids(len(chunk)))
+                
+        return ids
+        
     def update_calendar_event(self, event_id, title=None, event_type=None, start_date=None, 
                             end_date=None, exam_id=None, all_day=None, location=None, 
                             description=None, color=None):
@@ -353,7 +998,7 @@ class DatabaseManager:
         ''', (title, event_type, start_date, end_date, exam_id,
               1 if all_day else 0, location, description, color, updated_at, event_id))
         
-        self.conn.commit()
+        self._commit()
         return True
         
     def delete_calendar_event(self, event_id):
@@ -367,8 +1012,9 @@ class DatabaseManager:
             bool: True if successful, False otherwise
         """
         self.cursor.execute("DELETE FROM calendar_events WHERE id = ?", (event_id,))
-        self.conn.commit()
-        return self.cursor.rowcount > 0
+        deleted = self.cursor.rowcount > 0
+        self._commit()
+        return deleted
         
     def get_calendar_event(self, event_id):
         """
@@ -378,52 +1024,235 @@ class DatabaseManager:
             event_id (int): ID of the event
             
         Returns:
-            dict: Event data or None if not found
+            CalendarEvent: Event record or None if not found
         """
-        self.cursor.execute("SELECT * FROM calendar_events WHERE id = ?", (event_id,))
-        row = self.cursor.fetchone()
-        return dict(row) if row else None
+        return self._fetch_record(CalendarEvent, "SELECT * FROM calendar_events WHERE id = ?", (event_id,))
+        
+    def get_calendar_events_by_ids(self, event_ids):
+        """
+        Get the calendar events with the given IDs.
+        
+        Args:
+            event_ids (iterable): Event IDs (missing IDs are ignored)
+            
+        Returns:
+            list: List of CalendarEvent records, in no particular order
+        """
+        events = []
+        for chunk in _chunked(event_ids, DEFAULT_BULK_CHUNK_SIZE):
+            placeholders = ", ".join("?" * len(chunk))
+            events.extend(self._fetch_records(
+                CalendarEvent, f"SELECT * FROM calendar_events WHERE id IN ({placeholders})", chunk))
+        return events
         
     def get_calendar_events(self, start_date=None, end_date=None, event_type=None, exam_id=None):
         """
         Get calendar events with optional filtering.
         
+        Date filters select the events overlapping [start_date, end_date]
+        and are answered through the calendar_events_rtree interval index.
+        
+        Args:
+            start_date (str, optional): Filter events ending on or after this date
+            end_date (str, optional): Filter events starting on or before this date
+            event_type (str, optional): Filter by event type
+            exam_id (int, optional): Filter by associated exam
+            
+        Returns:
+            list: List of CalendarEvent records
+        """
+        return self._fetch_records(
+            CalendarEvent, *self._calendar_events_query(start_date, end_date, event_type, exam_id))
+        
+    def iter_events(self, start_date=None, end_date=None, event_type=None, exam_id=None,
+                    batch_size=DEFAULT_FETCH_BATCH_SIZE):
+        """
+        Iterate over calendar events without loading them all.
+        
+        Takes the same filters as get_calendar_events and yields events in
+        the same order, fetching batch_size rows at a time. Do not modify the
+        calendar_events table on this connection while iterating.
+        
+        Args:
+            start_date (str, optional): Filter events ending on or after this date
+            end_date (str, optional): Filter events starting on or before this date
+            event_type (str, optional): Filter by event type
+            exam_id (int, optional): Filter by associated exam
+            batch_size (int): Rows per fetchmany() call
+            
+        Yields:
+            CalendarEvent: Event records, earliest start first
+        """
+        query, params = self._calendar_events_query(start_date, end_date, event_type, exam_id)
+        return self._iter_records(CalendarEvent, query, params, batch_size=batch_size)
+        
+    def get_events_page(self, start_date=None, end_date=None, event_type=None, exam_id=None,
+                        after=None, limit=DEFAULT_PAGE_SIZE):
+        """
+        Get one page of calendar events using keyset pagination.
+        
+        Pages are ordered by start_date, then id, and each one resumes right
+        after the (start_date, id) of the previous page's last event.
+        
         Args:
-            start_date (str, optional): Filter events starting from this date
-            end_date (str, optional): Filter events ending before this date
+            start_date (str, optional): Filter events ending on or after this date
+            end_date (str, optional): Filter events starting on or before this date
             event_type (str, optional): Filter by event type
             exam_id (int, optional): Filter by associated exam
+            after (tuple, optional): (start_date, id) of the last event of the
+                previous page; None for the first page
+            limit (int): Maximum number of events to return
             
         Returns:
-            list: List of event dictionaries
+            list: Up to limit CalendarEvent records; pass
+                (event['start_date'], event['id']) of the last one as after
+                to get the next page
+        """
+        query, params = self._calendar_events_query(start_date, end_date, event_type, exam_id,
+                                                    after=after, limit=limit)
+        return self._fetch_records(CalendarEvent, query, params)
+        
+    def _calendar_events_query(self, start_date=None, end_date=None, event_type=None, exam_id=None,
+                               after=None, limit=None):
         """
-        query = "SELECT * FROM calendar_events"
+        Build the (query, params) behind get_calendar_events, iter_events and
+        get_events_page. after and limit switch to keyset pagination.
+        """
+        query = "SELECT e.* FROM calendar_events AS e"
         conditions = []
         params = []
         
+        if start_date or end_date:
+            conditions.append(_RTREE_CANDIDATES)
+            params.extend([start_date, end_date])
+            
         if start_date:
-            conditions.append("end_date >= ?")
+            conditions.append("e.end_date >= ?")
             params.append(start_date)
             
         if end_date:
-            conditions.append("start_date <= ?")
+            conditions.append("e.start_date <= ?")
             params.append(end_date)
             
         if event_type:
-            conditions.append("event_type = ?")
+            conditions.append("e.event_type = ?")
             params.append(event_type)
             
         if exam_id:
-            conditions.append("exam_id = ?")
+            conditions.append("e.exam_id = ?")
             params.append(exam_id)
             
+        if after is not None:
+            conditions.append("(e.start_date, e.id) > (?, ?)")
+            params.extend(after)
+            
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
             
-        query += " ORDER BY start_date ASC"
+        if limit is None:
+            query += " ORDER BY e.start_date ASC"
+        else:
+            query += " ORDER BY e.start_date ASC, e.id ASC LIMIT ?"
+            params.append(limit)
+            
+        return query, params
+        
+    def get_events_on_day(self, day):
+        """
+        Get the events covering a day, including multi-day events.
+        
+        Args:
+            day (str): Day in ISO format (YYYY-MM-DD)
+            
+        Returns:
+            list: List of CalendarEvent records ordered by start date
+        """
+        return self.get_calendar_events(start_date=day, end_date=f"{day}T23:59:59")
+        
+    def get_conflicting_events(self, start_date, end_date, exclude_event_id=None,
+                               ignore_types=NON_CONFLICTING_EVENT_TYPES):
+        """
+        Get the events that clash with the interval [start_date, end_date].
+        
+        Unlike get_calendar_events, intervals that only touch (one ends when
+        the other starts) do not clash.
+        
+        Args:
+            start_date (str): Start of the interval (ISO format)
+            end_date (str): End of the interval (ISO format)
+            exclude_event_id (int, optional): Event to leave out, e.g. the one being edited
+            ignore_types (tuple): Event types that never clash
+            
+        Returns:
+            list: List of CalendarEvent records ordered by start date
+        """
+        query = f'''
+        SELECT e.* FROM calendar_events AS e
+        WHERE {_RTREE_CANDIDATES} AND e.end_date > ? AND e.start_date < ?
+        '''
+        params = [start_date, end_date, start_date, end_date]
+        
+        if exclude_event_id is not None:
+            query += " AND e.id != ?"
+            params.append(exclude_event_id)
+            
+        if ignore_types:
+            query += f" AND e.event_type NOT IN ({', '.join('?' * len(ignore_types))})"
+            params.extend(ignore_types)
+            
+        query += " ORDER BY e.start_date ASC"
+        
+        return self._fetch_records(CalendarEvent, query, params)
+        
+    def get_event_conflicts(self, start_date=None, end_date=None,
+                            ignore_types=NON_CONFLICTING_EVENT_TYPES):
+        """
+        Find every pair of clashing events, optionally within a date range.
+        
+        Args:
+            start_date (str, optional): Only consider events ending on or after this date
+            end_date (str, optional): Only consider events starting on or before this date
+            ignore_types (tuple): Event types that never clash
+            
+        Returns:
+            list: (event_id, other_event_id) tuples with event_id < other_event_id,
+                ordered by the start date of the first event
+        """
+        # Each event probes the R*Tree for the events overlapping its own box
+        query = '''
+        SELECT a.id, b.id FROM calendar_events_rtree AS ra
+        CROSS JOIN calendar_events AS a ON a.id = ra.id
+        CROSS JOIN calendar_events_rtree AS rb
+            ON rb.end_key >= ra.start_key AND rb.start_key <= ra.end_key AND rb.id > ra.id
+        CROSS JOIN calendar_events AS b ON b.id = rb.id
+        WHERE b.end_date > a.start_date AND b.start_date < a.end_date
+        '''
+        params = []
+        
+        # The range applies to both events of a pair
+        for event, rtree in (('a', 'ra'), ('b', 'rb')):
+            if start_date or end_date:
+                query += " AND " + _RTREE_OVERLAP.replace("r.", f"{rtree}.")
+                params.extend([start_date, end_date])
+                
+            if start_date:
+                query += f" AND {event}.end_date >= ?"
+                params.append(start_date)
+                
+            if end_date:
+                query += f" AND {event}.start_date <= ?"
+                params.append(end_date)
+            
+        if ignore_types:
+            placeholders = ', '.join('?' * len(ignore_types))
+            query += f" AND a.event_type NOT IN ({placeholders}) AND b.event_type NOT IN ({placeholders})"
+            params.extend(ignore_types)
+            params.extend(ignore_types)
+            
+        query += " ORDER BY a.start_date ASC, a.id, b.id"
         
         self.cursor.execute(query, params)
-        return [dict(row) for row in self.cursor.fetchall()]
+        return [(row[0], row[1]) for row in self.cursor.fetchall()]
         
     def get_events_for_month(self, year, month):
         """
@@ -434,7 +1263,7 @@ class DatabaseManager:
             month (int): Month (1-12)
             
         Returns:
-            list: List of event dictionaries
+            list: List of CalendarEvent records
         """
         # First day of the month
         start_date = f"{year:04d}-{month:02d}-01"
@@ -474,7 +1303,7 @@ class DatabaseManager:
         VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (name, start_date, end_date, description, color, now, now))
         
-        self.conn.commit()
+        self._commit()
         return self.cursor.lastrowid
         
     def update_academic_session(self, session_id, name=None, start_date=None, 
@@ -510,7 +1339,7 @@ class DatabaseManager:
         WHERE id = ?
         ''', (name, start_date, end_date, description, color, updated_at, session_id))
         
-        self.conn.commit()
+        self._commit()
         return True
         
     def delete_academic_session(self, session_id):
@@ -524,8 +1353,9 @@ class DatabaseManager:
             bool: True if successful, False otherwise
         """
         self.cursor.execute("DELETE FROM academic_sessions WHERE id = ?", (session_id,))
-        self.conn.commit()
-        return self.cursor.rowcount > 0
+        deleted = self.cursor.rowcount > 0
+        self._commit()
+        return deleted
         
     def get_academic_session(self, session_id):
         """
@@ -535,11 +1365,10 @@ class DatabaseManager:
             session_id (int): ID of the session
             
         Returns:
-            dict: Session data or None if not found
+            AcademicSession: Session record or None if not found
         """
-        self.cursor.execute("SELECT * FROM academic_sessions WHERE id = ?", (session_id,))
-        row = self.cursor.fetchone()
-        return dict(row) if row else None
+        return self._fetch_record(AcademicSession, "SELECT * FROM academic_sessions WHERE id = ?",
+                                  (session_id,))
         
     def get_academic_sessions(self, year=None):
         """
@@ -549,43 +1378,175 @@ class DatabaseManager:
             year (int, optional): Filter sessions by year
             
         Returns:
-            list: List of session dictionaries
+            list: List of AcademicSession records
         """
         if year:
             year_str = f"{year:04d}"
             start_filter = f"{year_str}-01-01"
             end_filter = f"{year+1:04d}-01-01"
             
-            self.cursor.execute("""
+            return self._fetch_records(AcademicSession, """
             SELECT * FROM academic_sessions 
             WHERE (start_date >= ? AND start_date < ?) OR 
                   (end_date >= ? AND end_date < ?) OR
                   (start_date < ? AND end_date >= ?)
             ORDER BY start_date ASC
             """, (start_filter, end_filter, start_filter, end_filter, start_filter, start_filter))
-        else:
-            self.cursor.execute("SELECT * FROM academic_sessions ORDER BY start_date ASC")
             
-        return [dict(row) for row in self.cursor.fetchall()]
+        return self._fetch_records(AcademicSession, "SELECT * FROM academic_sessions ORDER BY start_date ASC")
         
     def get_current_academic_sessions(self):
         """
         Get all current academic sessions (where today falls between start_date and end_date).
         
         Returns:
-            list: List of current session dictionaries
+            list: List of current AcademicSession records
         """
         today = datetime.now().date().isoformat()
         
-        self.cursor.execute("""
+        return self._fetch_records(AcademicSession, """
         SELECT * FROM academic_sessions 
         WHERE start_date <= ? AND end_date >= ?
         ORDER BY start_date ASC
         """, (today, today))
+    
+    # Search methods
+    def search(self, text, limit=DEFAULT_SEARCH_LIMIT, entities=tuple(SEARCH_INDEXES)):
+        """
+        Ranked prefix search over exams and calendar events.
+        
+        Covers exam names and notes, and event titles, descriptions and
+        locations. Meant to be called on every keystroke.
+        
+        Args:
+            text (str): Text typed by the user (see fts_prefix_query)
+            limit (int): Maximum number of results
+            entities (tuple): Tables to search, keys of SEARCH_INDEXES
+            
+        Returns:
+            list: Result dictionaries with 'entity', 'id', 'title', 'snippet'
+                and 'rank' (lower is better), best match first
+        """
+        match = fts_prefix_query(text)
+        if match is None or not entities:
+            return []
+            
+        # Each index returns its own best matches; only those are merged
+        selects = []
+        params = []
+        for entity in entities:
+            table, weights, title_column = SEARCH_INDEXES[entity]
             
+            # Counting stops at the cap, so this stays cheap for broad prefixes
+            self.cursor.execute(f"""
+            SELECT COUNT(*) FROM (SELECT 1 FROM {table} WHERE {table} MATCH ? LIMIT ?)
+            """, (match, SEARCH_RANK_CANDIDATES + 1))
+            broad = self.cursor.fetchone()[0] > SEARCH_RANK_CANDIDATES
+            
+            selects.append(f'''
+            SELECT * FROM (
+                SELECT '{entity}' AS entity, rowid AS id, {title_column} AS title,
+                       snippet({table}, -1, '[', ']', '...', 10) AS snippet,
+                       bm25({table}, {', '.join(str(weight) for weight in weights)}) AS rank
+                FROM {table} WHERE {table} MATCH ?
+                ORDER BY {'rowid DESC' if broad else 'rank'} LIMIT ?
+            )''')
+            params.extend([match, limit])
+            
+        query = " UNION ALL ".join(selects) + " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        
+        self.cursor.execute(query, params)
         return [dict(row) for row in self.cursor.fetchall()]
+        
+    # Change tracking methods
+    def get_data_version(self):
+        """
+        Get the current data version.
+        
+        The version grows by one for every row inserted, updated or deleted
+        in a tracked table, whichever connection made the change.
+        
+        Returns:
+            int: Latest change_log version (0 if nothing was ever changed)
+        """
+        row = self.conn.execute("SELECT MAX(version) FROM change_log").fetchone()
+        return row[0] or 0
+        
+    def get_changes_since(self, version, entities=TRACKED_ENTITIES):
+        """
+        Get the rows that changed after a given data version.
+        
+        Several changes to the same row are collapsed into its final state:
+        a row is reported as deleted if the last change removed it, and as
+        upserted (inserted or updated) otherwise.
+        
+        Args:
+            version (int): Data version the caller is up to date with
+            entities (tuple): Tracked table names to report
+            
+        Returns:
+            dict: {'version': latest version, '<table>': {'upserted': set of ids,
+                'deleted': set of ids}, ...} for each requested table, or None
+                if the log no longer reaches back to version (the caller
+                must then reload everything)
+        """
+        # Two subqueries: SQLite only answers a lone MIN or MAX from the index
+        oldest, newest = self.conn.execute(
+            "SELECT (SELECT MIN(version) FROM change_log), (SELECT MAX(version) FROM change_log)"
+        ).fetchone()
+        
+        # A pruned log, or a version from before an import replaced the data
+        if oldest is not None and version < oldest - 1:
+            return None
+        if version > (newest or 0):
+            return None
+            
+        changes = {entity: {'upserted': set(), 'deleted': set()} for entity in entities}
+        latest = version
+        
+        rows = self.conn.execute("""
+        SELECT version, entity, entity_id, operation
+        FROM change_log
+        WHERE version > ?
+        ORDER BY version ASC
+        """, (version,))
+        
+        for row_version, entity, entity_id, operation in rows:
+            latest = row_version
+            if entity not in changes:
+                continue
+                
+            entity_changes = changes[entity]
+            if operation == 'delete':
+                entity_changes['upserted'].discard(entity_id)
+                entity_changes['deleted'].add(entity_id)
+            else:
+                entity_changes['deleted'].discard(entity_id)
+                entity_changes['upserted'].add(entity_id)
+                
+        changes['version'] = latest
+        return changes
+        
+    def prune_change_log(self, keep=CHANGE_LOG_RETENTION):
+        """
+        Drop old change_log entries, keeping the most recent ones.
+        
+        Args:
+            keep (int): Number of most recent entries to keep
+        """
+        # Own statement, so the shared cursor's rowcount and results survive
+        self.conn.execute("""
+        DELETE FROM change_log
+        WHERE version <= (SELECT MAX(version) FROM change_log) - ?
+        """, (keep,))
+        self._commit()
     
     def close(self):
-        """Close database connection."""
+        """Run final maintenance and close database connection."""
         if self.conn:
+            try:
+                self.optimize(checkpoint_mode="TRUNCATE")
+            except sqlite3.Error:
+                pass  # Maintenance is best effort; never block closing
             self.conn.close()
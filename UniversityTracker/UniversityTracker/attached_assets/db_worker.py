@@ -0,0 +1,182 @@
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+
+from database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseWorker:
+    """
+    Runs database queries on a dedicated thread.
+
+    The worker opens its own DatabaseManager (SQLite connections cannot be
+    shared between threads) and executes submitted queries one at a time,
+    in submission order.
+    """
+
+    def __init__(self, db_path, profile):
+        """
+        Start the worker thread.
+
+        Args:
+            db_path (str): Database file to open
+            profile (str or list): PRAGMA profile, see database.PRAGMA_PROFILES
+        """
+        self.db_path = db_path
+        self.profile = profile
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="DatabaseWorker", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Worker loop: execute queued queries until close() is called."""
+        db_manager = DatabaseManager(self.db_path, self.profile)
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+
+                future, func, args, kwargs = item
+                if not future.set_running_or_notify_cancel():
+                    continue  # Cancelled before it started
+
+                try:
+                    future.set_result(func(db_manager, *args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            db_manager.close()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue a query for the worker thread.
+
+        Args:
+            func (callable): Called as func(db_manager, *args, **kwargs) on the
+                worker thread, e.g. DatabaseManager.get_all_exams
+
+        Returns:
+            Future: Resolves to the return value of func
+        """
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def close(self, timeout=5):
+        """Stop the worker after the queued queries and close its connection."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+class AsyncDatabase(QObject):
+    """
+    Qt facade over DatabaseWorker.
+
+    Results are delivered to callbacks on the GUI thread through a queued
+    signal, so widgets can update themselves directly from the callback.
+    """
+
+    # Emitted from the worker thread when a query finishes: key, callback, errback, future
+    _query_finished = pyqtSignal(object, object, object, object)
+
+    # Emitted on the GUI thread with the exception of a failed query that has no errback
+    query_failed = pyqtSignal(object)
+
+    def __init__(self, db_manager, threaded=True, parent=None):
+        """
+        Args:
+            db_manager (DatabaseManager): Manager of the GUI thread's connection
+            threaded (bool): Run queries on a worker thread; when False (or for
+                in-memory databases, which cannot be shared) queries run inline
+                on db_manager and callbacks fire immediately
+            parent (QObject, optional): Qt parent
+        """
+        super(AsyncDatabase, self).__init__(parent)
+        self.db_manager = db_manager
+        self.worker = None
+        if threaded and db_manager.db_path != ":memory:":
+            self.worker = DatabaseWorker(db_manager.db_path, db_manager.profile)
+
+        # Most recent query for each key; older ones are superseded
+        self._latest = {}
+        self._query_finished.connect(self._deliver, Qt.QueuedConnection)
+
+    def call(self, func, *args, callback=None, errback=None, key=None, **kwargs):
+        """
+        Run a query in the background and hand its result to callback.
+
+        Args:
+            func (callable): Called as func(db_manager, *args, **kwargs)
+            callback (callable, optional): Receives the result on the GUI thread
+            errback (callable, optional): Receives the exception on the GUI
+                thread if func fails; without one the error is logged and
+                query_failed is emitted
+            key (str, optional): Identifies what the result is for (e.g. a
+                widget's table). A newer call with the same key cancels the
+                older one, or drops its result if it already ran.
+
+        Returns:
+            Future: Resolves to the return value of func
+        """
+        if key is not None and key in self._latest:
+            self._latest[key].cancel()
+
+        if self.worker is None:
+            future = Future()
+            future.set_running_or_notify_cancel()
+            # Same handling as DatabaseWorker._run
+            try:
+                future.set_result(func(self.db_manager, *args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+        else:
+            future = self.worker.submit(func, *args, **kwargs)
+
+        if key is not None:
+            self._latest[key] = future
+
+        if self.worker is None:
+            self._deliver(key, callback, errback, future)
+        else:
+            future.add_done_callback(
+                lambda done: self._query_finished.emit(key, callback, errback, done))
+
+        return future
+
+    def is_pending(self, key):
+        """Return True if a call with this key has not been delivered yet."""
+        return key in self._latest
+
+    def _deliver(self, key, callback, errback, future):
+        """Pass a finished query's result to its callback (GUI thread)."""
+        if key is not None:
+            if self._latest.get(key) is not future:
+                return  # Superseded by a newer call
+            del self._latest[key]
+
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is not None:
+            if errback is not None:
+                errback(error)
+            else:
+                logger.error("Database query failed (key %r)", key, exc_info=error)
+                self.query_failed.emit(error)
+            return
+
+        if callback is not None:
+            callback(future.result())
+
+    def close(self):
+        """Stop the worker thread, if any."""
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
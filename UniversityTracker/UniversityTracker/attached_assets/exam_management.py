@@ -1,10 +1,644 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-                             QTableWidget, QTableWidgetItem, QHeaderView, QComboBox,
+                             QTableView, QHeaderView, QComboBox, QStyledItemDelegate,
+                             QStyle, QStyleOptionButton, QAbstractItemView,
                              QDialog, QFormLayout, QLineEdit, QDateEdit, QSpinBox,
-                             QTextEdit, QMessageBox, QGroupBox, QRadioButton)
-from PyQt5.QtCore import Qt, pyqtSignal, QDate
+                             QTextEdit, QMessageBox, QGroupBox, QRadioButton, QCheckBox)
+from PyQt5.QtCore import (Qt, pyqtSignal, QDate, QAbstractTableModel, QAbstractProxyModel,
+                          QModelIndex, QEvent, QRect, QSize)
 from PyQt5.QtGui import QFont, QColor
 
+from functools import cmp_to_key
+
+import numpy as np
+
+from array_calculations import STATUS_CODES, STATUS_OTHER
+from db_worker import AsyncDatabase
+
+# Exam table columns; the ID column is hidden
+EXAM_COLUMNS = ["ID", "Nome Esame", "CFU", "Voto", "Stato", "Data", "Azioni"]
+(ID_COLUMN, NAME_COLUMN, CREDITS_COLUMN, GRADE_COLUMN,
+ STATUS_COLUMN, DATE_COLUMN, ACTIONS_COLUMN) = range(len(EXAM_COLUMNS))
+
+STATUS_LABELS = {'passed': "Superato", 'failed': "Non Superato", 'planned': "Pianificato"}
+STATUS_COLORS = {
+    'passed': QColor(200, 255, 200),  # Light green
+    'failed': QColor(255, 200, 200),  # Light red
+    'planned': QColor(200, 200, 255),  # Light blue
+}
+
+# Sortable columns and the ExamFilterProxyModel value each one sorts by
+SORT_COLUMNS = {
+    ID_COLUMN: 'id',
+    NAME_COLUMN: 'name',
+    CREDITS_COLUMN: 'credits',
+    GRADE_COLUMN: 'grade',
+    STATUS_COLUMN: 'status',
+    DATE_COLUMN: 'date',
+}
+
+# Rows sampled when sizing the columns to their contents; the remaining
+# columns hold short values of bounded width
+RESIZE_SAMPLE_ROWS = 100
+
+# Changed exams above which apply_changes() reloads the whole table instead
+# of patching it one row at a time
+RELOAD_CHANGES_THRESHOLD = 300
+
+# Action buttons of a row: action name and label; "schedule" only for planned exams
+EXAM_ACTIONS = [('schedule', "Pianifica"), ('edit', "Modifica"), ('delete', "Elimina")]
+
+
+def _fetch_exams(db_manager):
+    """Load the exam table contents (runs on the database worker)."""
+    # Read the version first: later changes are then re-applied, never lost
+    return db_manager.get_data_version(), db_manager.get_all_exams()
+
+
+def _exam_order_key(exam):
+    """
+    Sort key of the exam table order, which is descending by this key.
+    
+    Matches get_all_exams(): date DESC, id DESC, exams without a date last.
+    """
+    return (exam['date'] is not None, exam['date'] or '', exam['id'])
+
+
+class ExamTableModel(QAbstractTableModel):
+    """
+    Table model over a list of exams, kept in get_all_exams() order.
+    
+    Rows are only created when the view paints them, and single exams are
+    inserted, updated or removed in place (with a binary search for their
+    row) instead of rebuilding the table.
+    """
+    
+    def __init__(self, parent=None):
+        super(ExamTableModel, self).__init__(parent)
+        self.exams = []
+        self.exams_by_id = {}
+        
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.exams)
+        
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(EXAM_COLUMNS)
+        
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return EXAM_COLUMNS[section]
+        return None
+        
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+            
+        exam = self.exams[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == ID_COLUMN:
+                return str(exam['id'])
+            if column == NAME_COLUMN:
+                return exam['name']
+            if column == CREDITS_COLUMN:
+                return str(exam['credits'])
+            if column == GRADE_COLUMN:
+                return str(exam['grade']) if exam['grade'] is not None else "-"
+            if column == STATUS_COLUMN:
+                return STATUS_LABELS.get(exam['status'], STATUS_LABELS['planned'])
+            if column == DATE_COLUMN:
+                return exam['date'] if exam['date'] else "-"
+        elif role == Qt.TextAlignmentRole:
+            if column in (CREDITS_COLUMN, GRADE_COLUMN, STATUS_COLUMN, DATE_COLUMN):
+                return Qt.AlignCenter
+        elif role == Qt.BackgroundRole:
+            if column == STATUS_COLUMN:
+                return STATUS_COLORS.get(exam['status'], STATUS_COLORS['planned'])
+        elif role == Qt.UserRole:
+            return exam
+        return None
+        
+    def exam_at(self, row):
+        """Return the exam shown in a row."""
+        return self.exams[row]
+        
+    def set_exams(self, exams):
+        """
+        Replace every row.
+        
+        Args:
+            exams (list): Exams in get_all_exams() order
+        """
+        self.beginResetModel()
+        self.exams = list(exams)
+        self.exams_by_id = {exam['id']: exam for exam in self.exams}
+        self.endResetModel()
+        
+    def _position(self, key):
+        """Return the first row whose exam does not sort before key."""
+        low, high = 0, len(self.exams)
+        while low < high:
+            middle = (low + high) // 2
+            if _exam_order_key(self.exams[middle]) > key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+        
+    def find_row(self, exam_id):
+        """Return the row showing an exam, or -1 if it is not shown."""
+        exam = self.exams_by_id.get(exam_id)
+        if exam is None:
+            return -1
+        return self._position(_exam_order_key(exam))
+        
+    def remove_exam(self, exam_id):
+        """
+        Remove an exam's row, if it is shown.
+        
+        Returns:
+            bool: True if a row was removed
+        """
+        row = self.find_row(exam_id)
+        if row < 0:
+            return False
+            
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.exams[row]
+        del self.exams_by_id[exam_id]
+        self.endRemoveRows()
+        return True
+        
+    def upsert_exam(self, exam):
+        """Show an exam: update its row in place, or (re-)insert it where it belongs."""
+        row = self.find_row(exam['id'])
+        if row >= 0 and _exam_order_key(self.exams[row]) == _exam_order_key(exam):
+            self.exams[row] = self.exams_by_id[exam['id']] = exam
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(EXAM_COLUMNS) - 1))
+            return
+            
+        # The date moved the exam: drop the old row first
+        if row >= 0:
+            self.remove_exam(exam['id'])
+            
+        row = self._position(_exam_order_key(exam))
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.exams.insert(row, exam)
+        self.exams_by_id[exam['id']] = exam
+        self.endInsertRows()
+
+
+class ExamActionsDelegate(QStyledItemDelegate):
+    """
+    Paints the action buttons of the exam table and reports their clicks.
+    
+    The buttons are only drawn, so rows need no widgets of their own; a
+    hidden QPushButton provides the style (stylesheet included) they are
+    drawn with.
+    """
+    
+    # Action name (see EXAM_ACTIONS) and exam ID of a clicked button
+    action_triggered = pyqtSignal(str, int)
+    
+    MARGIN = 2
+    SPACING = 6
+    
+    def __init__(self, view):
+        super(ExamActionsDelegate, self).__init__(view)
+        self.button = QPushButton(view)
+        self.button.hide()
+        self.pressed = None  # (row, action) of the button held down
+        
+    def _button_sizes(self):
+        """Return the size of each action button, by action name."""
+        sizes = {}
+        for action, label in EXAM_ACTIONS:
+            option = QStyleOptionButton()
+            option.initFrom(self.button)
+            option.text = label
+            text_size = option.fontMetrics.size(Qt.TextShowMnemonic, label)
+            sizes[action] = self.button.style().sizeFromContents(
+                QStyle.CT_PushButton, option, text_size, self.button)
+        return sizes
+        
+    def _buttons(self, rect, exam):
+        """Return (action, label, QRect) for each button of a row, left to right."""
+        sizes = self._button_sizes()
+        height = rect.height() - 2 * self.MARGIN
+        x = rect.left() + self.MARGIN
+        buttons = []
+        for action, label in EXAM_ACTIONS:
+            if action == 'schedule' and exam['status'] != 'planned':
+                continue
+            width = sizes[action].width()
+            buttons.append((action, label, QRect(x, rect.top() + self.MARGIN, width, height)))
+            x += width + self.SPACING
+        return buttons
+        
+    def paint(self, painter, option, index):
+        super(ExamActionsDelegate, self).paint(painter, option, index)
+        exam = index.data(Qt.UserRole)
+        style = self.button.style()
+        for action, label, rect in self._buttons(option.rect, exam):
+            button_option = QStyleOptionButton()
+            button_option.initFrom(self.button)
+            button_option.rect = rect
+            button_option.text = label
+            if self.pressed == (index.row(), action):
+                button_option.state |= QStyle.State_Sunken
+            else:
+                button_option.state |= QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, button_option, painter, self.button)
+            
+    def sizeHint(self, option, index):
+        # Room for every button, so the column does not change with the status
+        sizes = self._button_sizes().values()
+        width = sum(size.width() for size in sizes) + self.SPACING * (len(sizes) - 1)
+        height = max(size.height() for size in sizes)
+        return QSize(width + 2 * self.MARGIN, height + 2 * self.MARGIN)
+        
+    def editorEvent(self, event, model, option, index):
+        if event.type() not in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease):
+            return False
+        if event.button() != Qt.LeftButton:
+            return False
+            
+        exam = index.data(Qt.UserRole)
+        clicked = next((action for action, _, rect in self._buttons(option.rect, exam)
+                        if rect.contains(event.pos())), None)
+        
+        if event.type() == QEvent.MouseButtonPress:
+            self.pressed = (index.row(), clicked) if clicked else None
+            self.parent().viewport().update(option.rect)
+            return clicked is not None
+            
+        pressed, self.pressed = self.pressed, None
+        self.parent().viewport().update(option.rect)
+        if clicked and pressed == (index.row(), clicked):
+            self.action_triggered.emit(clicked, exam['id'])
+            return True
+        return False
+
+class ExamFilterProxyModel(QAbstractProxyModel):
+    """
+    Filtered and sorted view of an ExamTableModel.
+    
+    Plays the role of a QSortFilterProxyModel, but without calling Python
+    once per row (filterAcceptsRow) or per comparison (lessThan): the
+    filterable and sortable values of every exam are kept in NumPy columns
+    aligned with the source rows, so a filter or sort change is a few
+    vectorized passes. Source row changes are applied in place, with a
+    binary search for each row's new position.
+    """
+    
+    # Sort columns remembered: the last clicked column sorts first, the
+    # previous ones break its ties
+    MAX_SORT_COLUMNS = 3
+    
+    def __init__(self, parent=None):
+        super(ExamFilterProxyModel, self).__init__(parent)
+        # Filter, see set_filter()
+        self.status = None
+        self.min_credits = None
+        self.max_credits = None
+        self.date_from = None
+        self.date_to = None
+        self.name = ''
+        # [(column, Qt.SortOrder)], first entry sorts first
+        self.sort_columns = []
+        
+        # Source row of each proxy row, and proxy row of each source row (-1 if hidden)
+        self.order = np.empty(0, dtype=np.int64)
+        self.positions = np.empty(0, dtype=np.int64)
+        self._columns = {}
+        self._ranks = {}
+        
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        super(ExamFilterProxyModel, self).setSourceModel(model)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._source_reset)
+        model.rowsAboutToBeRemoved.connect(self._source_rows_about_to_be_removed)
+        model.rowsRemoved.connect(self._source_rows_removed)
+        model.rowsInserted.connect(self._source_rows_inserted)
+        model.dataChanged.connect(self._source_data_changed)
+        self._load_columns()
+        self._update_order()
+        self.endResetModel()
+        
+    # QAbstractProxyModel interface
+    
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self.order)) or not (0 <= column < len(EXAM_COLUMNS)):
+            return QModelIndex()
+        return self.createIndex(row, column)
+        
+    def parent(self, index=None):
+        return QModelIndex()
+        
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.order)
+        
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(EXAM_COLUMNS)
+        
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(int(self.order[index.row()]), index.column())
+        
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        row = int(self.positions[index.row()])
+        return self.createIndex(row, index.column()) if row >= 0 else QModelIndex()
+        
+    # Filtering and sorting
+    
+    def set_filter(self, status=None, min_credits=None, max_credits=None,
+                   date_from=None, date_to=None, name=''):
+        """
+        Show only the exams matching every given condition.
+        
+        Args:
+            status (str, optional): Exam status
+            min_credits (int, optional): Lowest credits
+            max_credits (int, optional): Highest credits
+            date_from (str, optional): Earliest date (yyyy-MM-dd); exams without a date are hidden
+            date_to (str, optional): Latest date (yyyy-MM-dd); exams without a date are hidden
+            name (str): Case-insensitive substring of the exam name
+        """
+        self.status = status
+        self.min_credits = min_credits
+        self.max_credits = max_credits
+        self.date_from = date_from
+        self.date_to = date_to
+        self.name = name.casefold()
+        
+        self.beginResetModel()
+        self._update_order()
+        self.endResetModel()
+        
+    def sort(self, column, order=Qt.AscendingOrder):
+        """
+        Sort by a column, keeping the previous sort columns as tie-breakers.
+        
+        Args:
+            column (int): Column to sort by; -1 restores the source order
+            order (Qt.SortOrder): Sort direction
+        """
+        if column < 0:
+            self.sort_columns = []
+        elif column in SORT_COLUMNS:
+            previous = [entry for entry in self.sort_columns if entry[0] != column]
+            self.sort_columns = [(column, order)] + previous[:self.MAX_SORT_COLUMNS - 1]
+        else:
+            return
+            
+        self.layoutAboutToBeChanged.emit()
+        old_rows = self.order
+        persistent = self.persistentIndexList()
+        self._update_order()
+        self.changePersistentIndexList(persistent, [
+            self.mapFromSource(self.sourceModel().index(int(old_rows[index.row()]), index.column()))
+            for index in persistent])
+        self.layoutChanged.emit()
+        
+    def _load_columns(self):
+        """Extract the filter and sort values of every source row."""
+        exams = self.sourceModel().exams
+        self._columns = {
+            'id': np.array([exam['id'] for exam in exams], dtype=np.int64),
+            'status': np.array([STATUS_CODES.get(exam['status'], STATUS_OTHER) for exam in exams],
+                               dtype=np.int8),
+            'credits': np.array([exam['credits'] for exam in exams], dtype=np.int64),
+            # Ungraded exams sort below every grade
+            'grade': np.array([-1 if exam['grade'] is None else exam['grade'] for exam in exams],
+                              dtype=np.float64),
+            # Fixed-width strings keep comparisons and sorting vectorized
+            'date': np.array([exam['date'] or '' for exam in exams], dtype=str),
+            'name': np.array([exam['name'].casefold() for exam in exams], dtype=str),
+        }
+        self._ranks = {}
+        
+    def _row_values(self, exam):
+        """Return the column values of one exam, as stored by _load_columns."""
+        return {
+            'id': exam['id'],
+            'status': STATUS_CODES.get(exam['status'], STATUS_OTHER),
+            'credits': exam['credits'],
+            'grade': -1 if exam['grade'] is None else exam['grade'],
+            'date': exam['date'] or '',
+            'name': exam['name'].casefold(),
+        }
+        
+    def _set_value(self, field, row, value):
+        """Store one value, widening a string column that is too narrow for it."""
+        values = self._columns[field]
+        if values.dtype.kind == 'U' and len(value) > values.dtype.itemsize // 4:
+            values = self._columns[field] = values.astype(f'U{len(value)}')
+        values[row] = value
+        
+    def _accepts(self, rows=None):
+        """
+        Evaluate the filter.
+        
+        Args:
+            rows (numpy.ndarray, optional): Source rows to test; all rows by default
+            
+        Returns:
+            numpy.ndarray: Boolean mask, True for the rows shown
+        """
+        columns = self._columns
+        if rows is None:
+            rows = np.arange(len(columns['id']))
+        mask = np.ones(len(rows), dtype=bool)
+        
+        if self.status:
+            mask &= columns['status'][rows] == STATUS_CODES.get(self.status, STATUS_OTHER)
+        if self.min_credits is not None:
+            mask &= columns['credits'][rows] >= self.min_credits
+        if self.max_credits is not None:
+            mask &= columns['credits'][rows] <= self.max_credits
+            
+        # String comparisons cost more: only run them on the rows still shown
+        if self.date_from or self.date_to:
+            kept = np.flatnonzero(mask)
+            dates = columns['date'][rows[kept]]
+            matches = dates != ''
+            if self.date_from:
+                matches &= dates >= self.date_from
+            if self.date_to:
+                matches &= dates <= self.date_to
+            mask[kept] = matches
+        if self.name:
+            kept = np.flatnonzero(mask)
+            mask[kept] = np.char.find(columns['name'][rows[kept]], self.name) >= 0
+        return mask
+        
+    def _sort_key(self, column):
+        """Return a numeric sort key per source row for a column (ranks for text)."""
+        values = self._columns[SORT_COLUMNS[column]]
+        if values.dtype.kind != 'U':
+            return values
+        
+        field = SORT_COLUMNS[column]
+        if field not in self._ranks:
+            # Equal strings share a rank, so the other sort columns still break their ties
+            ranks = np.zeros(len(values), dtype=np.int64)
+            if len(values):
+                order = np.argsort(values, kind='stable')
+                sorted_values = values[order]
+                ranks[order] = np.cumsum(np.concatenate(([0], sorted_values[1:] != sorted_values[:-1])))
+            self._ranks[field] = ranks
+        return self._ranks[field]
+        
+    def _update_order(self):
+        """Recompute which source rows are shown, in which order."""
+        rows = np.flatnonzero(self._accepts())
+        if self.sort_columns and len(rows):
+            # np.lexsort sorts by its last key first; the source row breaks ties
+            keys = [rows]
+            for column, order in reversed(self.sort_columns):
+                key = self._sort_key(column)[rows]
+                keys.append(-key if order == Qt.DescendingOrder else key)
+            rows = rows[np.lexsort(keys)]
+        self.order = rows
+        self._update_positions()
+        
+    def _update_positions(self):
+        self.positions = np.full(len(self._columns['id']), -1, dtype=np.int64)
+        self.positions[self.order] = np.arange(len(self.order))
+        
+    def _before(self, row, other):
+        """Return whether source row sorts before source row other."""
+        for column, order in self.sort_columns:
+            values = self._columns[SORT_COLUMNS[column]]
+            if values[row] != values[other]:
+                return (values[row] < values[other]) != (order == Qt.DescendingOrder)
+        return row < other
+        
+    def _insert_position(self, row):
+        """Return the proxy row where a source row belongs."""
+        low, high = 0, len(self.order)
+        while low < high:
+            middle = (low + high) // 2
+            if self._before(int(self.order[middle]), row):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+        
+    def _show_rows(self, rows):
+        """
+        Insert source rows into the proxy, in sort order.
+        
+        The rows are sorted among themselves and placed with one binary
+        search each, then the order is rebuilt once, however many rows
+        there are. Insert signals are emitted per contiguous block.
+        
+        Args:
+            rows (iterable): Source rows not shown yet
+        """
+        if self.sort_columns:
+            rows = sorted((int(row) for row in rows),
+                          key=cmp_to_key(lambda row, other: -1 if self._before(row, other) else 1))
+            positions = np.array([self._insert_position(row) for row in rows], dtype=np.int64)
+            rows = np.array(rows, dtype=np.int64)
+        else:
+            # Unsorted, the proxy keeps the source order
+            rows = np.sort(np.asarray(rows, dtype=np.int64))
+            positions = np.searchsorted(self.order, rows)
+            
+        if len(rows):
+            order = np.insert(self.order, positions, rows)
+            # Proxy rows of the inserted rows once all of them are shown
+            targets = positions + np.arange(len(rows))
+            blocks = np.split(targets, np.flatnonzero(np.diff(targets) != 1) + 1)
+            if len(blocks) == 1:
+                self.beginInsertRows(QModelIndex(), int(targets[0]), int(targets[-1]))
+                self.order = order
+                self.endInsertRows()
+            else:
+                # Each signal must see the rows of the earlier blocks only
+                later = np.zeros(len(order), dtype=bool)
+                later[targets] = True
+                for block in blocks:
+                    later[block] = False
+                    self.beginInsertRows(QModelIndex(), int(block[0]), int(block[-1]))
+                    self.order = order[~later]
+                    self.endInsertRows()
+        self._update_positions()
+        
+    def _hide_row(self, row):
+        """Remove a source row from the proxy."""
+        position = int(self.positions[row])
+        self.beginRemoveRows(QModelIndex(), position, position)
+        self.order = np.delete(self.order, position)
+        self._update_positions()
+        self.endRemoveRows()
+        
+    # Source model changes
+    
+    def _source_reset(self):
+        self._load_columns()
+        self._update_order()
+        self.endResetModel()
+        
+    def _source_rows_about_to_be_removed(self, parent, first, last):
+        # Drop the proxy rows while the source rows still exist; the source
+        # row numbers are shifted in _source_rows_removed
+        positions = self.positions[first:last + 1]
+        for position in np.sort(positions[positions >= 0])[::-1]:
+            self.beginRemoveRows(QModelIndex(), int(position), int(position))
+            self.order = np.delete(self.order, position)
+            self.endRemoveRows()
+            
+    def _source_rows_removed(self, parent, first, last):
+        count = last - first + 1
+        for field, values in self._columns.items():
+            self._columns[field] = np.delete(values, np.s_[first:last + 1])
+        self._ranks = {}
+        self.order = np.where(self.order > last, self.order - count, self.order)
+        self._update_positions()
+        
+    def _source_rows_inserted(self, parent, first, last):
+        count = last - first + 1
+        exams = self.sourceModel().exams[first:last + 1]
+        values = [self._row_values(exam) for exam in exams]
+        for field, column in self._columns.items():
+            # Concatenating (unlike np.insert) widens string columns as needed
+            inserted = np.array([row_values[field] for row_values in values],
+                                dtype=str if column.dtype.kind == 'U' else column.dtype)
+            self._columns[field] = np.concatenate((column[:first], inserted, column[first:]))
+        self._ranks = {}
+        self.order = np.where(self.order >= first, self.order + count, self.order)
+        
+        # Also renumbers self.positions for the shifted source rows
+        rows = np.arange(first, last + 1)
+        self._show_rows(rows[self._accepts(rows)])
+            
+    def _source_data_changed(self, top_left, bottom_right, roles=()):
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            for field, value in self._row_values(self.sourceModel().exams[row]).items():
+                self._set_value(field, row, value)
+            self._ranks = {}
+            
+            position = int(self.positions[row])
+            accepted = bool(self._accepts(np.array([row]))[0])
+            if position >= 0 and accepted:
+                in_order = ((position == 0 or not self._before(row, int(self.order[position - 1])))
+                            and (position == len(self.order) - 1
+                                 or not self._before(int(self.order[position + 1]), row)))
+                if in_order:
+                    self.dataChanged.emit(self.index(position, top_left.column()),
+                                          self.index(position, bottom_right.column()), roles)
+                    continue
+            if position >= 0:
+                self._hide_row(row)
+            if accepted:
+                self._show_rows([row])
+
 
 class ExamDialog(QDialog):
     """Dialog for adding or editing an exam record."""
@@ -158,9 +792,11 @@ class ExamManagementWidget(QWidget):
     # Signal emitted when exams are updated
     exams_updated = pyqtSignal()
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, async_db=None):
         super(ExamManagementWidget, self).__init__()
         self.db_manager = db_manager
+        self.async_db = async_db or AsyncDatabase(db_manager, threaded=False, parent=self)
+        self.data_version = None
         self.init_ui()
         self.load_exams()
         
@@ -199,125 +835,150 @@ class ExamManagementWidget(QWidget):
         controls_widget.setLayout(controls_layout)
         main_layout.addWidget(controls_widget)
         
+        # Name, credits and date filters, applied without querying the database
+        search_layout = QHBoxLayout()
+        
+        self.name_filter = QLineEdit()
+        self.name_filter.setPlaceholderText("Cerca per nome...")
+        self.name_filter.textChanged.connect(self.filter_exams)
+        
+        self.min_credits_filter = QSpinBox()
+        self.min_credits_filter.setRange(0, 30)
+        self.min_credits_filter.setSpecialValueText("Min")  # 0: no lower bound
+        self.min_credits_filter.valueChanged.connect(self.filter_exams)
+        
+        self.max_credits_filter = QSpinBox()
+        self.max_credits_filter.setRange(0, 30)
+        self.max_credits_filter.setSpecialValueText("Max")  # 0: no upper bound
+        self.max_credits_filter.valueChanged.connect(self.filter_exams)
+        
+        self.date_filter_check = QCheckBox("Periodo:")
+        self.date_filter_check.toggled.connect(self.filter_exams)
+        
+        self.date_from_filter = QDateEdit(QDate.currentDate().addYears(-1))
+        self.date_to_filter = QDateEdit(QDate.currentDate())
+        for date_edit in (self.date_from_filter, self.date_to_filter):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("dd/MM/yyyy")
+            date_edit.setEnabled(False)
+            date_edit.dateChanged.connect(self.filter_exams)
+            self.date_filter_check.toggled.connect(date_edit.setEnabled)
+        
+        search_layout.addWidget(self.name_filter)
+        search_layout.addWidget(QLabel("CFU:"))
+        search_layout.addWidget(self.min_credits_filter)
+        search_layout.addWidget(QLabel("-"))
+        search_layout.addWidget(self.max_credits_filter)
+        search_layout.addWidget(self.date_filter_check)
+        search_layout.addWidget(self.date_from_filter)
+        search_layout.addWidget(QLabel("-"))
+        search_layout.addWidget(self.date_to_filter)
+        
+        search_widget = QWidget()
+        search_widget.setLayout(search_layout)
+        main_layout.addWidget(search_widget)
+        
         # Exams table
-        self.exams_table = QTableWidget()
-        self.exams_table.setColumnCount(7)
-        self.exams_table.setHorizontalHeaderLabels(
-            ["ID", "Nome Esame", "CFU", "Voto", "Stato", "Data", "Azioni"])
+        self.exam_model = ExamTableModel(self)
+        self.exam_proxy = ExamFilterProxyModel(self)
+        self.exam_proxy.setSourceModel(self.exam_model)
+        self.exams_table = QTableView()
+        self.exams_table.setModel(self.exam_proxy)
+        self.actions_delegate = ExamActionsDelegate(self.exams_table)
+        self.actions_delegate.action_triggered.connect(self.run_action)
+        self.exams_table.setItemDelegateForColumn(ACTIONS_COLUMN, self.actions_delegate)
         
         # Configure table properties
-        self.exams_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)  # Stretch name column
-        self.exams_table.horizontalHeader().setSectionResizeMode(6, QHeaderView.ResizeToContents)  # Actions column
+        header = self.exams_table.horizontalHeader()
+        header.setSectionResizeMode(NAME_COLUMN, QHeaderView.Stretch)  # Stretch name column
+        header.setResizeContentsPrecision(RESIZE_SAMPLE_ROWS)
+        header.setSectionResizeMode(ACTIONS_COLUMN, QHeaderView.Fixed)  # Actions column
+        actions_size = self.actions_delegate.sizeHint(None, QModelIndex())
+        header.resizeSection(ACTIONS_COLUMN, actions_size.width())
+        self.exams_table.verticalHeader().setDefaultSectionSize(
+            max(self.exams_table.verticalHeader().defaultSectionSize(), actions_size.height()))
         self.exams_table.verticalHeader().setVisible(False)
-        self.exams_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.exams_table.setSelectionMode(QTableWidget.SingleSelection)
-        self.exams_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.exams_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.exams_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.exams_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        
+        # Hide ID column
+        self.exams_table.hideColumn(ID_COLUMN)
+        
+        # Header clicks sort through the proxy; no indicator keeps the date order of the database
+        header.setSortIndicator(-1, Qt.AscendingOrder)
+        self.exams_table.setSortingEnabled(True)
         
         main_layout.addWidget(self.exams_table)
         
         self.setLayout(main_layout)
         
-    def load_exams(self, status=None):
-        """Load exams from database into the table."""
-        # Get settings
-        max_grade = int(self.db_manager.get_setting('max_grade', 30))
+    def load_exams(self):
+        """Load all exams from database into the table once the query completes."""
+        self.async_db.call(_fetch_exams, callback=self._show_exams, key='exam_table')
         
-        # Clear table
-        self.exams_table.setRowCount(0)
+    def _show_exams(self, result):
+        """Show the exams loaded by load_exams."""
+        # Remember the data version this load reflects (see apply_changes)
+        self.data_version, exams = result
+        self.exam_model.set_exams(exams)
         
-        # Get exams
-        exams = self.db_manager.get_all_exams(status)
+        # Resize columns to contents (sampling RESIZE_SAMPLE_ROWS rows)
+        for column in (CREDITS_COLUMN, GRADE_COLUMN, STATUS_COLUMN, DATE_COLUMN):
+            self.exams_table.resizeColumnToContents(column)
         
-        # Populate table
-        for row, exam in enumerate(exams):
-            self.exams_table.insertRow(row)
-            
-            # ID (hidden)
-            id_item = QTableWidgetItem(str(exam['id']))
-            id_item.setData(Qt.UserRole, exam['id'])
-            self.exams_table.setItem(row, 0, id_item)
-            
-            # Name
-            name_item = QTableWidgetItem(exam['name'])
-            self.exams_table.setItem(row, 1, name_item)
-            
-            # Credits
-            credits_item = QTableWidgetItem(str(exam['credits']))
-            credits_item.setTextAlignment(Qt.AlignCenter)
-            self.exams_table.setItem(row, 2, credits_item)
+    def apply_changes(self):
+        """
+        Patch the table with the exams changed since the last load.
+        
+        Only the affected rows are removed, inserted or updated; the whole
+        table is reloaded if the change log cannot tell what changed, or if
+        more than RELOAD_CHANGES_THRESHOLD exams changed.
+        """
+        if self.data_version is None or self.async_db.is_pending('exam_table'):
+            # A load is still in flight and may predate this change
+            self.refresh_data()
+            return
             
-            # Grade
-            grade_text = str(exam['grade']) if exam['grade'] is not None else "-"
-            grade_item = QTableWidgetItem(grade_text)
-            grade_item.setTextAlignment(Qt.AlignCenter)
-            self.exams_table.setItem(row, 3, grade_item)
+        changes = self.db_manager.get_changes_since(self.data_version, ('exams',))
+        if changes is None:
+            self.refresh_data()
+            return
             
-            # Status with color
-            status_text = "Superato" if exam['status'] == 'passed' else "Non Superato" if exam['status'] == 'failed' else "Pianificato"
-            status_item = QTableWidgetItem(status_text)
-            status_item.setTextAlignment(Qt.AlignCenter)
+        exam_changes = changes['exams']
+        if len(exam_changes['upserted']) + len(exam_changes['deleted']) > RELOAD_CHANGES_THRESHOLD:
+            # A bulk change such as an import: one reload beats patching every row
+            self.refresh_data()
+            return
             
-            if exam['status'] == 'passed':
-                status_item.setBackground(QColor(200, 255, 200))  # Light green
-            elif exam['status'] == 'failed':
-                status_item.setBackground(QColor(255, 200, 200))  # Light red
-            else:  # planned
-                status_item.setBackground(QColor(200, 200, 255))  # Light blue
+        for exam_id in exam_changes['deleted']:
+            self.exam_model.remove_exam(exam_id)
                 
-            self.exams_table.setItem(row, 4, status_item)
-            
-            # Date
-            date_text = exam['date'] if exam['date'] else "-"
-            date_item = QTableWidgetItem(date_text)
-            date_item.setTextAlignment(Qt.AlignCenter)
-            self.exams_table.setItem(row, 5, date_item)
-            
-            # Actions
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout()
-            actions_layout.setContentsMargins(2, 2, 2, 2)
-            
-            edit_button = QPushButton("Modifica")
-            edit_button.setProperty("exam_id", exam['id'])
-            edit_button.clicked.connect(self.edit_exam)
-            
-            # Calendar button for planned exams
-            if exam['status'] == 'planned':
-                calendar_button = QPushButton("Pianifica")
-                calendar_button.setProperty("exam_id", exam['id'])
-                calendar_button.clicked.connect(self.schedule_exam)
-                actions_layout.addWidget(calendar_button)
-            
-            delete_button = QPushButton("Elimina")
-            delete_button.setProperty("exam_id", exam['id'])
-            delete_button.clicked.connect(self.delete_exam)
-            
-            actions_layout.addWidget(edit_button)
-            actions_layout.addWidget(delete_button)
-            
-            actions_widget.setLayout(actions_layout)
-            self.exams_table.setCellWidget(row, 6, actions_widget)
-            
-        # Hide ID column
-        self.exams_table.hideColumn(0)
-        
-        # Resize columns to contents
-        self.exams_table.resizeColumnsToContents()
+        # The proxy re-filters and re-sorts just these rows
+        for exam in self.db_manager.get_exams_by_ids(exam_changes['upserted']):
+            self.exam_model.upsert_exam(exam)
+                
+        self.data_version = changes['version']
         
     def filter_exams(self):
-        """Filter exams based on selected status."""
-        status = self.filter_combo.currentData()
-        self.load_exams(status)
+        """Filter the loaded exams by status, name, credits and date."""
+        date_range = self.date_filter_check.isChecked()
+        self.exam_proxy.set_filter(
+            status=self.filter_combo.currentData(),
+            min_credits=self.min_credits_filter.value() or None,
+            max_credits=self.max_credits_filter.value() or None,
+            date_from=self.date_from_filter.date().toString("yyyy-MM-dd") if date_range else None,
+            date_to=self.date_to_filter.date().toString("yyyy-MM-dd") if date_range else None,
+            name=self.name_filter.text().strip())
         
     def refresh_data(self):
-        """Reload exams from database with current filter."""
-        status = self.filter_combo.currentData()
-        self.load_exams(status)
+        """Reload exams from database."""
+        self.load_exams()
         
     def add_exam(self):
         """Open dialog to add a new exam."""
-        max_grade = int(self.db_manager.get_setting('max_grade', 30))
-        pass_threshold = int(self.db_manager.get_setting('pass_threshold', 18))
+        max_grade = self.db_manager.get_int('max_grade', 30)
+        pass_threshold = self.db_manager.get_int('pass_threshold', 18)
         
         dialog = ExamDialog(self, max_grade=max_grade, pass_threshold=pass_threshold)
         if dialog.exec_() == QDialog.Accepted:
@@ -334,29 +995,35 @@ class ExamManagementWidget(QWidget):
             )
             
             if exam_id:
-                # Refresh table
-                self.load_exams(self.filter_combo.currentData())
+                # Patch the changed row into the table
+                self.apply_changes()
                 # Emit signal to update other views
                 self.exams_updated.emit()
                 QMessageBox.information(self, "Operazione Completata", "Esame aggiunto con successo.")
             else:
                 QMessageBox.warning(self, "Errore", "Impossibile aggiungere l'esame.")
                 
-    def edit_exam(self):
-        """Edit selected exam."""
+    def run_action(self, action, exam_id):
+        """Run the action of a button clicked in the exam table."""
+        if action == 'edit':
+            self.edit_exam(exam_id)
+        elif action == 'delete':
+            self.delete_exam(exam_id)
+        elif action == 'schedule':
+            self.schedule_exam(exam_id)
+            
+    def edit_exam(self, exam_id):
+        """Edit an exam."""
         try:
-            button = self.sender()
-            if button:
-                exam_id = button.property("exam_id")
-                
+            if exam_id is not None:
                 # Get exam data
                 exam = self.db_manager.get_exam(exam_id)
                 if not exam:
                     QMessageBox.warning(self, "Errore", "Esame non trovato.")
                     return
                     
-                max_grade = int(self.db_manager.get_setting('max_grade', 30))
-                pass_threshold = int(self.db_manager.get_setting('pass_threshold', 18))
+                max_grade = self.db_manager.get_int('max_grade', 30)
+                pass_threshold = self.db_manager.get_int('pass_threshold', 18)
                 
                 dialog = ExamDialog(self, exam=exam, max_grade=max_grade, pass_threshold=pass_threshold)
                 if dialog.exec_() == QDialog.Accepted:
@@ -378,8 +1045,8 @@ class ExamManagementWidget(QWidget):
                     )
                     
                     if success:
-                        # Refresh table
-                        self.load_exams(self.filter_combo.currentData())
+                        # Patch the changed row into the table
+                        self.apply_changes()
                         # Emit signal to update other views
                         self.exams_updated.emit()
                         QMessageBox.information(self, "Operazione Completata", "Esame aggiornato con successo.")
@@ -388,12 +1055,9 @@ class ExamManagementWidget(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Errore Critico", f"Si è verificato un errore durante la modifica dell'esame: {str(e)}")
                     
-    def delete_exam(self):
-        """Delete selected exam."""
-        button = self.sender()
-        if button:
-            exam_id = button.property("exam_id")
-            
+    def delete_exam(self, exam_id):
+        """Delete an exam."""
+        if exam_id is not None:
             # Confirm deletion
             reply = QMessageBox.question(
                 self, 'Conferma Eliminazione',
@@ -407,20 +1071,17 @@ class ExamManagementWidget(QWidget):
                 success = self.db_manager.delete_exam(exam_id)
                 
                 if success:
-                    # Refresh table
-                    self.load_exams(self.filter_combo.currentData())
+                    # Patch the changed row into the table
+                    self.apply_changes()
                     # Emit signal to update other views
                     self.exams_updated.emit()
                     QMessageBox.information(self, "Operazione Completata", "Esame eliminato con successo.")
                 else:
                     QMessageBox.warning(self, "Errore", "Impossibile eliminare l'esame.")
                     
-    def schedule_exam(self):
+    def schedule_exam(self, exam_id):
         """Schedule an exam on the calendar."""
-        button = self.sender()
-        if button:
-            exam_id = button.property("exam_id")
-            
+        if exam_id is not None:
             # Get exam data
             exam = self.db_manager.get_exam(exam_id)
             if not exam:
@@ -457,23 +1118,25 @@ class ExamManagementWidget(QWidget):
                 start_date = exam_date.toString("yyyy-MM-dd") + "T09:00:00"
                 end_date = exam_date.toString("yyyy-MM-dd") + "T11:00:00"
                 
-                event_id = self.db_manager.add_calendar_event(
-                    title=f"Esame: {exam['name']}",
-                    event_type="exam",
-                    start_date=start_date,
-                    end_date=end_date,
-                    exam_id=exam_id,
-                    all_day=False,
-                    description=f"Esame di {exam['name']} - {exam['credits']} CFU"
-                )
-                
-                if event_id:
-                    # Update exam date
-                    self.db_manager.update_exam(
+                # Create the event and update the exam date in a single commit
+                with self.db_manager.transaction():
+                    event_id = self.db_manager.add_calendar_event(
+                        title=f"Esame: {exam['name']}",
+                        event_type="exam",
+                        start_date=start_date,
+                        end_date=end_date,
                         exam_id=exam_id,
-                        date=exam_date.toString("yyyy-MM-dd")
+                        all_day=False,
+                        description=f"Esame di {exam['name']} - {exam['credits']} CFU"
                     )
                     
+                    if event_id:
+                        self.db_manager.update_exam(
+                            exam_id=exam_id,
+                            date=exam_date.toString("yyyy-MM-dd")
+                        )
+                
+                if event_id:
                     QMessageBox.information(
                         self, 
                         "Esame Pianificato", 
@@ -482,7 +1145,7 @@ class ExamManagementWidget(QWidget):
                     )
                     
                     # Refresh data
-                    self.load_exams(self.filter_combo.currentData())
+                    self.apply_changes()
                     self.exams_updated.emit()
                 else:
                     QMessageBox.warning(self, "Errore", "Impossibile pianificare l'esame.")
@@ -1,26 +1,67 @@
+import time
+STARTED = time.perf_counter()
+
 import sys
 import os
-from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget, QVBoxLayout, QWidget, QMessageBox
+from functools import partial
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, QVBoxLayout, QWidget, QMessageBox,
+                             QLabel)
 from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 import signal
 
 from database import DatabaseManager
-# Import directly from files in the root directory instead of from views package
-from dashboard import DashboardWidget
-from exam_management import ExamManagementWidget
-from analytics import AnalyticsWidget
-from settings import SettingsWidget
-from calendar_view import AcademicCalendarWidget
+from db_worker import AsyncDatabase
+from aggregates import CareerAggregates
+from refresh import RefreshCoordinator
+from startup import StartupProfile
+
+# Tabs in display order: attribute, title, module (imported directly from
+# the root directory instead of from the views package), widget class and the
+# window attributes passed to the constructor. Each tab is imported and
+# built the first time it is shown, so the chart modules (and matplotlib)
+# only load once the window is already on screen.
+TABS = [
+    ('dashboard', "Panoramica", 'dashboard', 'DashboardWidget', ('db_manager', 'aggregates')),
+    ('exam_management', "Gestione Esami", 'exam_management', 'ExamManagementWidget',
+     ('db_manager', 'async_db')),
+    ('analytics', "Analisi", 'analytics', 'AnalyticsWidget', ('db_manager', 'async_db', 'aggregates')),
+    ('calendar', "Calendario", 'calendar_view', 'AcademicCalendarWidget', ('db_manager', 'async_db')),
+    ('settings', "Impostazioni", 'settings', 'SettingsWidget', ('db_manager', 'async_db')),
+]
+
+# Tab signals and the tabs that apply the change, through the refresh
+# coordinator; tabs not built yet are skipped, they read current data
+# when they are built
+TAB_SIGNALS = [
+    ('exam_management', 'exams_updated', ('dashboard', 'analytics', 'calendar')),
+    ('calendar', 'examUpdated', ('exam_management', 'dashboard', 'analytics')),
+    ('settings', 'data_imported', ('dashboard', 'exam_management', 'analytics', 'calendar')),
+]
 
 class UniversityCareerManager(QMainWindow):
     """Main application window for University Career Manager."""
     
-    def __init__(self):
+    first_painted = pyqtSignal()
+    
+    def __init__(self, profile=None):
+        """
+        Args:
+            profile (StartupProfile, optional): Collects startup timings
+        """
         super().__init__()
+        self.profile = profile or StartupProfile(enabled=False)
         
         # Initialize database
-        self.db_manager = DatabaseManager()
+        with self.profile.step("open database"):
+            self.db_manager = DatabaseManager()
+        
+        # Background queries for the tabs run on their own connection
+        self.async_db = AsyncDatabase(self.db_manager, parent=self)
+        self.async_db.query_failed.connect(self.show_query_error)
+        
+        # Exam totals shared by the dashboard and the analytics, kept current by the exam hooks
+        self.aggregates = CareerAggregates(self.db_manager)
         
         # Setup UI
         self.setWindowTitle("Gestione Carriera Universitaria")
@@ -31,22 +72,17 @@ class UniversityCareerManager(QMainWindow):
         # Load stylesheet
         self.load_stylesheet()
         
-        # Create tab widget
+        # Create tab widget with an empty page per tab; tab widgets are built on first show
         self.tab_widget = QTabWidget()
-        
-        # Create widgets for each tab
-        self.dashboard = DashboardWidget(self.db_manager)
-        self.exam_management = ExamManagementWidget(self.db_manager)
-        self.analytics = AnalyticsWidget(self.db_manager)
-        self.calendar = AcademicCalendarWidget(self.db_manager)
-        self.settings = SettingsWidget(self.db_manager)
-        
-        # Add tabs to widget
-        self.tab_widget.addTab(self.dashboard, "Panoramica")
-        self.tab_widget.addTab(self.exam_management, "Gestione Esami")
-        self.tab_widget.addTab(self.analytics, "Analisi")
-        self.tab_widget.addTab(self.calendar, "Calendario")
-        self.tab_widget.addTab(self.settings, "Impostazioni")
+        self.tab_pages = {}
+        for name, title, _, _, _ in TABS:
+            setattr(self, name, None)
+            page = QWidget()
+            page_layout = QVBoxLayout(page)
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            page_layout.addWidget(QLabel("Caricamento...", alignment=Qt.AlignCenter))
+            self.tab_pages[name] = page
+            self.tab_widget.addTab(page, title)
         
         # Set up the main layout
         main_layout = QVBoxLayout()
@@ -57,8 +93,13 @@ class UniversityCareerManager(QMainWindow):
         central_widget.setLayout(main_layout)
         self.setCentralWidget(central_widget)
         
-        # Connect signals
-        self.setup_signals()
+        # Refreshes requested by tab signals, coalesced and deferred for hidden tabs
+        self.refresh = RefreshCoordinator(self.tab_widget, parent=self)
+        
+        # Build the visible tab once the window has been painted, later tabs when selected
+        self._painted = False
+        self.first_painted.connect(self.finish_startup, Qt.QueuedConnection)
+        self.tab_widget.currentChanged.connect(self.build_tab_at)
         
     def load_stylesheet(self):
         """Load application style from QSS file."""
@@ -70,17 +111,69 @@ class UniversityCareerManager(QMainWindow):
         except Exception as e:
             print(f"Error loading stylesheet: {e}")
     
-    def setup_signals(self):
-        """Connect signals between different parts of the application."""
-        # When exams are updated, refresh all tabs
-        self.exam_management.exams_updated.connect(self.dashboard.refresh_data)
-        self.exam_management.exams_updated.connect(self.analytics.refresh_data)
-        self.exam_management.exams_updated.connect(self.calendar.refresh_calendar)
-        
-        # When calendar events are updated, refresh related tabs
-        self.calendar.examUpdated.connect(self.exam_management.refresh_data)
-        self.calendar.examUpdated.connect(self.dashboard.refresh_data)
-        self.calendar.examUpdated.connect(self.analytics.refresh_data)
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            self.profile.mark("first paint")
+            self.first_painted.emit()
+    
+    def finish_startup(self):
+        """Build the tab shown at startup and report the startup timings."""
+        self.build_tab_at(self.tab_widget.currentIndex())
+        self.profile.mark("first tab ready")
+        self.profile.report()
+    
+    def build_tab_at(self, index):
+        """Build the tab at a tab bar index, if it was not built yet."""
+        if index >= 0:
+            self.build_tab(TABS[index][0])
+    
+    def build_tab(self, name):
+        """
+        Import and construct a tab widget the first time it is needed.
+        
+        Args:
+            name (str): Tab attribute name, see TABS
+            
+        Returns:
+            QWidget: The tab widget
+        """
+        widget = getattr(self, name)
+        if widget is not None:
+            return widget
+        
+        _, _, module_name, class_name, arg_names = next(tab for tab in TABS if tab[0] == name)
+        module = self.profile.import_module(module_name)
+        with self.profile.step(f"build {name}"):
+            widget = getattr(module, class_name)(*(getattr(self, arg) for arg in arg_names))
+        setattr(self, name, widget)
+        
+        # Replace the placeholder label
+        page_layout = self.tab_pages[name].layout()
+        placeholder = page_layout.takeAt(0).widget()
+        placeholder.deleteLater()
+        page_layout.addWidget(widget)
+        
+        # Connect the tab's signals to the tabs that apply its changes
+        for source, signal_name, targets in TAB_SIGNALS:
+            if source == name:
+                getattr(widget, signal_name).connect(partial(self.apply_changes, targets))
+        return widget
+    
+    def apply_changes(self, targets):
+        """
+        Schedule the built tabs among targets to apply what changed.
+        
+        Args:
+            targets (tuple): Tab attribute names, see TABS
+        """
+        self.refresh.request(getattr(self, name) for name in targets)
+    
+    def show_query_error(self, error):
+        """Report a background query that failed without an error handler."""
+        QMessageBox.warning(self, "Errore",
+                            f"Si è verificato un errore durante la lettura dei dati: {error}")
     
     def closeEvent(self, event):
         """Handle application close event."""
@@ -92,7 +185,8 @@ class UniversityCareerManager(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            # Close database connection
+            # Stop the query worker, then close the database connection
+            self.async_db.close()
             self.db_manager.close()
             event.accept()
         else:
@@ -110,8 +204,12 @@ def main():
     
     print("Avvio di Gestione Carriera Universitaria...")
     
+    profile = StartupProfile(STARTED)
+    profile.mark("imports")
+    
     app = QApplication(sys.argv)
-    window = UniversityCareerManager()
+    profile.mark("QApplication")
+    window = UniversityCareerManager(profile)
     window.show()
     
     # Print a message when ready
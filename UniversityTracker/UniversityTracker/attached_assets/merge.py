@@ -0,0 +1,194 @@
+"""
+Merge-import of another University Career Manager database.
+
+The source file is ATTACHed to the open connection and diffed against the
+current data by natural keys, so rows are matched by what they describe
+rather than by id:
+
+    exams               name, date
+    calendar_events     title, start_date
+    academic_sessions   name, start_date
+
+Every table is merged with a few set-based statements (no per-row Python),
+and the triggers keep the change log, search and interval indexes in step,
+so open views pick the imported rows up through apply_changes().
+"""
+
+import os
+import sqlite3
+from contextlib import contextmanager
+
+# Schema name the source database is attached under
+SOURCE_SCHEMA = "import_src"
+
+# How to resolve a row that exists on both sides with different values:
+# 'skip' keeps the current row, 'replace' takes the imported one and
+# 'newer' takes whichever was updated last
+MERGE_POLICIES = ('skip', 'replace', 'newer')
+DEFAULT_MERGE_POLICY = 'newer'
+
+# SQLite virtual machine instructions between cancellation checks
+MERGE_CANCEL_CHECK_OPS = 10000
+
+# Merged tables, in dependency order: (table, natural key, merged columns)
+MERGE_TABLES = (
+    ('exams', ('name', 'date'), ('credits', 'grade', 'status', 'notes')),
+    ('calendar_events', ('title', 'start_date'),
+     ('exam_id', 'event_type', 'end_date', 'all_day', 'location', 'description', 'color')),
+    ('academic_sessions', ('name', 'start_date'), ('end_date', 'color', 'description')),
+)
+
+# Source columns holding ids of the source database, translated to the ids
+# of the matching rows here (exams are merged first, so they all exist)
+_TRANSLATED_COLUMNS = {
+    ('calendar_events', 'exam_id'): f"""
+        (SELECT MIN(m.id) FROM main.exams AS m
+         JOIN {SOURCE_SCHEMA}.exams AS x ON m.name = x.name AND m.date IS x.date
+         WHERE x.id = s.exam_id)""",
+}
+
+
+class MergeCancelled(Exception):
+    """Raised when a merge is cancelled; nothing was imported."""
+
+
+@contextmanager
+def attached(conn, src_path):
+    """
+    Attach a database file as SOURCE_SCHEMA for the duration of the block.
+
+    Args:
+        conn (sqlite3.Connection): Connection to attach to; must not be in
+            a transaction
+        src_path (str): Database file to attach
+
+    Raises:
+        FileNotFoundError: If src_path does not exist
+        ValueError: If src_path is not a University Career Manager database
+    """
+    # ATTACH would create an empty database and import nothing
+    if not os.path.isfile(src_path):
+        raise FileNotFoundError(src_path)
+
+    conn.execute(f"ATTACH DATABASE ? AS {SOURCE_SCHEMA}", (src_path,))
+    try:
+        _check_source(conn)
+        yield conn
+    finally:
+        conn.execute(f"DETACH DATABASE {SOURCE_SCHEMA}")
+
+
+def _check_source(conn):
+    """Raise ValueError unless the attached database has the merged columns."""
+    for table, key, columns in MERGE_TABLES:
+        found = {row[1] for row in conn.execute(f"PRAGMA {SOURCE_SCHEMA}.table_info({table})")}
+        missing = {'id', 'created_at', 'updated_at', *key, *columns} - found
+        if missing:
+            raise ValueError(f"Not a University Career Manager database: "
+                             f"{table} is missing {', '.join(sorted(missing))}")
+
+
+def merge_tables(conn, policy=DEFAULT_MERGE_POLICY, progress=None, cancel=None):
+    """
+    Merge the attached source database into the main one.
+
+    Must run inside a transaction so a failure or cancellation leaves the
+    main database unchanged. Rows sharing a natural key within the source
+    are collapsed to the last one.
+
+    Args:
+        conn (sqlite3.Connection): Connection with the source attached
+        policy (str): Conflict policy, one of MERGE_POLICIES
+        progress (callable, optional): Called as progress(merged, total)
+            in tables
+        cancel (threading.Event, optional): Set to abort the merge
+
+    Returns:
+        dict: {table: {'inserted': n, 'updated': n, 'unchanged': n,
+            'skipped': n}} for each merged table
+
+    Raises:
+        MergeCancelled: If cancel was set before the merge completed
+    """
+    if policy not in MERGE_POLICIES:
+        raise ValueError(f"Unknown merge policy '{policy}'. Available: {', '.join(MERGE_POLICIES)}")
+
+    if cancel is not None:
+        # A non-zero return interrupts the running statement
+        conn.set_progress_handler(cancel.is_set, MERGE_CANCEL_CHECK_OPS)
+    try:
+        report = {}
+        for index, (table, key, columns) in enumerate(MERGE_TABLES):
+            if cancel is not None and cancel.is_set():
+                raise MergeCancelled()
+            if progress is not None:
+                progress(index, len(MERGE_TABLES))
+            report[table] = _merge_table(conn, table, key, columns, policy)
+        if progress is not None:
+            progress(len(MERGE_TABLES), len(MERGE_TABLES))
+        return report
+    except sqlite3.OperationalError:
+        if cancel is not None and cancel.is_set():
+            raise MergeCancelled() from None
+        raise
+    finally:
+        if cancel is not None:
+            conn.set_progress_handler(None, 0)
+
+
+def _merge_table(conn, table, key, columns, policy):
+    """Merge one table; see merge_tables for the returned counts."""
+    copied = columns + ('created_at', 'updated_at')
+    source_values = ", ".join(
+        f"{_TRANSLATED_COLUMNS.get((table, column), f's.{column}')} AS {column}"
+        for column in key + copied)
+    key_match = " AND ".join(f"m.{column} IS s.{column}" for column in key)
+    key_list = ", ".join(key)
+
+    # One row per natural key, with the id of the matching row here (if any).
+    # The CAST gives match_id INTEGER affinity; without it comparisons with
+    # {table}.id cannot use the match_id index.
+    conn.execute("DROP TABLE IF EXISTS temp.merge_rows")
+    conn.execute(f"""
+        CREATE TEMP TABLE merge_rows AS
+        SELECT {source_values},
+               CAST((SELECT MIN(m.id) FROM main.{table} AS m WHERE {key_match}) AS INTEGER) AS match_id
+        FROM {SOURCE_SCHEMA}.{table} AS s
+        WHERE s.id IN (SELECT MAX(id) FROM {SOURCE_SCHEMA}.{table} GROUP BY {key_list})
+    """)
+    conn.execute("CREATE INDEX temp.idx_merge_rows_match ON merge_rows (match_id)")
+
+    try:
+        inserted = conn.execute(f"""
+            INSERT INTO main.{table} ({", ".join(key + copied)})
+            SELECT {", ".join(key + copied)} FROM temp.merge_rows WHERE match_id IS NULL
+        """).rowcount
+
+        matched = conn.execute(
+            "SELECT COUNT(*) FROM temp.merge_rows WHERE match_id IS NOT NULL").fetchone()[0]
+
+        # Matched rows whose merged columns differ are conflicts
+        conflict = (f"FROM temp.merge_rows AS r JOIN main.{table} AS m ON m.id = r.match_id "
+                    f"WHERE NOT ({' AND '.join(f'm.{column} IS r.{column}' for column in columns)})")
+        conflicts = conn.execute(f"SELECT COUNT(*) {conflict}").fetchone()[0]
+
+        updated = 0
+        if policy != 'skip' and conflicts:
+            if policy == 'newer':
+                conflict += " AND r.updated_at > m.updated_at"
+            copied_list = ", ".join(copied)
+            updated = conn.execute(f"""
+                UPDATE main.{table}
+                SET ({copied_list}) = (SELECT {copied_list} FROM temp.merge_rows AS r
+                                       WHERE r.match_id = {table}.id)
+                WHERE id IN (SELECT r.match_id {conflict})
+            """).rowcount
+    finally:
+        conn.execute("DROP TABLE temp.merge_rows")
+
+    return {
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': matched - conflicts,
+        'skipped': conflicts - updated,
+    }
@@ -0,0 +1,331 @@
+"""
+Versioned schema migrations for the University Career Manager database.
+
+The schema version of a database file is stored in ``PRAGMA user_version``.
+Each migration is applied inside its own transaction together with the
+version bump, so a failed upgrade leaves the file at the last good version.
+"""
+
+# Interval keys of the calendar_events_rtree index (migration 4): whole minutes
+# since the Unix epoch, which rtree_i32 stores exactly. strftime() yields NULL
+# for unparseable dates; those fall back to the ends of the key range so the
+# index never hides a row, and MIN/MAX keep the box valid if end < start.
+# Queries always re-check the ISO strings on calendar_events.
+MIN_INTERVAL_KEY = -2147483648
+MAX_INTERVAL_KEY = 2147483647
+_MINUTE_KEY = "COALESCE(CAST(strftime('%s', {value}) AS INTEGER) / 60, {fallback})"
+
+
+def interval_key_sql(value, fallback):
+    """
+    Return SQL computing the interval key of an ISO date.
+
+    Args:
+        value (str): SQL expression of the date, e.g. '?' or 'NEW.start_date'
+        fallback (int): Key used when the date cannot be parsed
+    """
+    return _MINUTE_KEY.format(value=value, fallback=fallback)
+
+
+def _interval_box_sql(row):
+    """Return the (start_key, end_key) SQL of a calendar_events row alias."""
+    start = interval_key_sql(f"{row}.start_date", MIN_INTERVAL_KEY)
+    end = interval_key_sql(f"{row}.end_date", MAX_INTERVAL_KEY)
+    return f"MIN({start}, {end})", f"MAX({start}, {end})"
+
+
+# Ordered list of (version, description, statements). Never edit a migration
+# that has already shipped: append a new one instead.
+MIGRATIONS = [
+    (1, "Initial schema", [
+        '''
+        CREATE TABLE IF NOT EXISTS exams (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            credits INTEGER NOT NULL,
+            grade INTEGER,
+            status TEXT NOT NULL,
+            date TEXT,
+            notes TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS calendar_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            exam_id INTEGER,
+            title TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            all_day INTEGER NOT NULL DEFAULT 1,
+            location TEXT,
+            description TEXT,
+            color TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            FOREIGN KEY (exam_id) REFERENCES exams(id) ON DELETE CASCADE
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS academic_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            color TEXT,
+            description TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        ''',
+    ]),
+    (2, "Indexes for exam status filters and calendar range queries", [
+        "CREATE INDEX IF NOT EXISTS idx_exams_status_date ON exams (status, date)",
+        "CREATE INDEX IF NOT EXISTS idx_events_start_end ON calendar_events (start_date, end_date)",
+        # start_date trails the filter column so ORDER BY start_date needs no sort
+        "CREATE INDEX IF NOT EXISTS idx_events_type ON calendar_events (event_type, start_date)",
+        "CREATE INDEX IF NOT EXISTS idx_events_exam ON calendar_events (exam_id, start_date)",
+    ]),
+    (3, "Change log maintained by triggers", [
+        '''
+        CREATE TABLE IF NOT EXISTS change_log (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            operation TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_exams_log_insert AFTER INSERT ON exams
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, operation) VALUES ('exams', NEW.rowid, 'insert');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_exams_log_update AFTER UPDATE ON exams
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, operation) VALUES ('exams', NEW.rowid, 'update');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_exams_log_delete AFTER DELETE ON exams
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, operation) VALUES ('exams', OLD.rowid, 'delete');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_calendar_events_log_insert AFTER INSERT ON calendar_events
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, operation) VALUES ('calendar_events', NEW.rowid, 'insert');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_calendar_events_log_update AFTER UPDATE ON calendar_events
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, operation) VALUES ('calendar_events', NEW.rowid, 'update');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_calendar_events_log_delete AFTER DELETE ON calendar_events
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, operation) VALUES ('calendar_events', OLD.rowid, 'delete');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_academic_sessions_log_insert AFTER INSERT ON academic_sessions
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, operation) VALUES ('academic_sessions', NEW.rowid, 'insert');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_academic_sessions_log_update AFTER UPDATE ON academic_sessions
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, operation) VALUES ('academic_sessions', NEW.rowid, 'update');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_academic_sessions_log_delete AFTER DELETE ON academic_sessions
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, operation) VALUES ('academic_sessions', OLD.rowid, 'delete');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_settings_log_insert AFTER INSERT ON settings
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, operation) VALUES ('settings', NEW.rowid, 'insert');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_settings_log_update AFTER UPDATE ON settings
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, operation) VALUES ('settings', NEW.rowid, 'update');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_settings_log_delete AFTER DELETE ON settings
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, operation) VALUES ('settings', OLD.rowid, 'delete');
+        END
+        ''',
+    ]),
+    (4, "R*Tree interval index over calendar event dates", [
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS calendar_events_rtree
+        USING rtree_i32 (id, start_key, end_key)
+        ''',
+        '''
+        INSERT INTO calendar_events_rtree (id, start_key, end_key)
+        SELECT id, {0}, {1} FROM calendar_events
+        '''.format(*_interval_box_sql('calendar_events')),
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_calendar_events_rtree_insert AFTER INSERT ON calendar_events
+        BEGIN
+            INSERT INTO calendar_events_rtree (id, start_key, end_key) VALUES (NEW.id, {0}, {1});
+        END
+        '''.format(*_interval_box_sql('NEW')),
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_calendar_events_rtree_update
+        AFTER UPDATE OF id, start_date, end_date ON calendar_events
+        BEGIN
+            DELETE FROM calendar_events_rtree WHERE id = OLD.id;
+            INSERT INTO calendar_events_rtree (id, start_key, end_key) VALUES (NEW.id, {0}, {1});
+        END
+        '''.format(*_interval_box_sql('NEW')),
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_calendar_events_rtree_delete AFTER DELETE ON calendar_events
+        BEGIN
+            DELETE FROM calendar_events_rtree WHERE id = OLD.id;
+        END
+        ''',
+    ]),
+    (5, "FTS5 search indexes over exams and calendar events", [
+        # External-content tables: the text lives only in exams/calendar_events.
+        # Prefix indexes make search-as-you-type queries ("ana*") cheap.
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS exams_fts USING fts5 (
+            name, notes,
+            content='exams', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        ''',
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS calendar_events_fts USING fts5 (
+            title, description, location,
+            content='calendar_events', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        ''',
+        "INSERT INTO exams_fts (exams_fts) VALUES ('rebuild')",
+        "INSERT INTO calendar_events_fts (calendar_events_fts) VALUES ('rebuild')",
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_exams_fts_insert AFTER INSERT ON exams
+        BEGIN
+            INSERT INTO exams_fts (rowid, name, notes) VALUES (NEW.id, NEW.name, NEW.notes);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_exams_fts_update AFTER UPDATE OF id, name, notes ON exams
+        BEGIN
+            INSERT INTO exams_fts (exams_fts, rowid, name, notes)
+            VALUES ('delete', OLD.id, OLD.name, OLD.notes);
+            INSERT INTO exams_fts (rowid, name, notes) VALUES (NEW.id, NEW.name, NEW.notes);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_exams_fts_delete AFTER DELETE ON exams
+        BEGIN
+            INSERT INTO exams_fts (exams_fts, rowid, name, notes)
+            VALUES ('delete', OLD.id, OLD.name, OLD.notes);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_calendar_events_fts_insert AFTER INSERT ON calendar_events
+        BEGIN
+            INSERT INTO calendar_events_fts (rowid, title, description, location)
+            VALUES (NEW.id, NEW.title, NEW.description, NEW.location);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_calendar_events_fts_update
+        AFTER UPDATE OF id, title, description, location ON calendar_events
+        BEGIN
+            INSERT INTO calendar_events_fts (calendar_events_fts, rowid, title, description, location)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.location);
+            INSERT INTO calendar_events_fts (rowid, title, description, location)
+            VALUES (NEW.id, NEW.title, NEW.description, NEW.location);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_calendar_events_fts_delete AFTER DELETE ON calendar_events
+        BEGIN
+            INSERT INTO calendar_events_fts (calendar_events_fts, rowid, title, description, location)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.location);
+        END
+        ''',
+    ]),
+    (6, "Index for date-ordered exam listings", [
+        # The implicit rowid makes this (date, id): it serves ORDER BY date DESC
+        # and the (date, id) keyset seeks of DatabaseManager.get_exams_page
+        "CREATE INDEX IF NOT EXISTS idx_exams_date ON exams (date)",
+    ]),
+    (7, "Natural-key indexes for matching rows during merge-imports", [
+        "CREATE INDEX IF NOT EXISTS idx_exams_name_date ON exams (name, date)",
+        "CREATE INDEX IF NOT EXISTS idx_events_title_start ON calendar_events (title, start_date)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """Return the schema version stored in the database file."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target_version=None):
+    """
+    Bring a database up to date by applying pending migrations in order.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        target_version (int, optional): Stop after this version (defaults to the latest)
+
+    Returns:
+        list: Versions that were applied, in order
+    """
+    if target_version is None:
+        target_version = LATEST_VERSION
+
+    current_version = get_schema_version(conn)
+    applied = []
+
+    for version, description, statements in MIGRATIONS:
+        if version <= current_version or version > target_version:
+            continue
+
+        # Close any transaction implicitly opened by an earlier statement
+        if conn.in_transaction:
+            conn.commit()
+
+        try:
+            conn.execute("BEGIN")
+            for statement in statements:
+                conn.execute(statement)
+            # PRAGMA does not accept bound parameters; version is an int from MIGRATIONS
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        applied.append(version)
+
+    return applied
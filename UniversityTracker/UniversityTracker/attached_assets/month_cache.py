@@ -0,0 +1,139 @@
+"""
+Cache of the calendar months loaded from the database.
+
+The calendar keeps the last MONTH_CACHE_SIZE months it loaded, so going
+back to a month, or to one prefetched in the background, needs no query.
+Every cached month is known to be current as of MonthCache.version; when
+the data version moves on, sync() reads the change log once and drops only
+the months containing a changed event or overlapping where it now is.
+"""
+
+from collections import OrderedDict
+
+# Months kept by MonthCache, least recently used first out
+MONTH_CACHE_SIZE = 24
+
+
+class MonthCache:
+    """Least recently used cache of loaded months, keyed by (year, month)."""
+
+    def __init__(self, db_manager, capacity=MONTH_CACHE_SIZE):
+        """
+        Args:
+            db_manager (DatabaseManager): Connection used to read the change log
+            capacity (int): Number of months kept
+        """
+        self.db_manager = db_manager
+        self.capacity = capacity
+        # (year, month) -> month data, least recently used first
+        self.months = OrderedDict()
+        # Data version every cached month is current with
+        self.version = None
+
+    def __contains__(self, key):
+        return key in self.months
+
+    def __len__(self):
+        return len(self.months)
+
+    def get(self, year, month):
+        """
+        Get a cached month if it is still current.
+
+        Args:
+            year (int): Year
+            month (int): Month (1-12)
+
+        Returns:
+            dict: The month data, or None if it has to be loaded
+        """
+        self.sync()
+        data = self.months.get((year, month))
+        if data is not None:
+            self.months.move_to_end((year, month))
+        return data
+
+    def put(self, data):
+        """
+        Add a loaded month.
+
+        A month loaded before later changes is only kept if the changes do
+        not touch it.
+
+        Args:
+            data (dict): Month data with 'version', 'year', 'month', 'range'
+                (first day of the month, first day of the next one) and
+                'event_ids' (IDs of the events loaded)
+
+        Returns:
+            bool: True if the month was cached, False if it is already stale
+        """
+        self.sync()
+        if data['version'] != self.version:
+            changes = self.db_manager.get_changes_since(data['version'], ('calendar_events',))
+            if changes is None or self._affected([data], changes):
+                return False
+            data['version'] = self.version
+
+        key = (data['year'], data['month'])
+        self.months[key] = data
+        self.months.move_to_end(key)
+        while len(self.months) > self.capacity:
+            self.months.popitem(last=False)
+        return True
+
+    def clear(self):
+        """Drop every cached month."""
+        self.months.clear()
+
+    def sync(self):
+        """Drop the cached months touched by changes made since self.version."""
+        version = self.db_manager.get_data_version()
+        if version == self.version:
+            return
+
+        if self.months:
+            changes = self.db_manager.get_changes_since(self.version, ('calendar_events',))
+            if changes is None:
+                self.months.clear()
+            else:
+                for data in self._affected(list(self.months.values()), changes):
+                    del self.months[(data['year'], data['month'])]
+                version = changes['version']
+
+        self.version = version
+        for data in self.months.values():
+            data['version'] = version
+
+    def _affected(self, months, changes):
+        """
+        Find the months an event change shows up in.
+
+        Args:
+            months (list): Month data dictionaries
+            changes (dict): get_changes_since() result
+
+        Returns:
+            list: The months holding a changed event, or overlapping an
+                inserted or moved one
+        """
+        event_changes = changes['calendar_events']
+        changed_ids = event_changes['upserted'] | event_changes['deleted']
+        if not changed_ids:
+            return []
+
+        upserted = None
+        affected = []
+        for data in months:
+            if changed_ids & data['event_ids']:
+                affected.append(data)
+                continue
+
+            if upserted is None:
+                upserted = self.db_manager.get_calendar_events_by_ids(event_changes['upserted'])
+            # Same overlap test as get_calendar_events(start_date, end_date)
+            month_start, month_end = data['range']
+            if any(event['end_date'] >= month_start and event['start_date'] <= month_end
+                   for event in upserted):
+                affected.append(data)
+        return affected
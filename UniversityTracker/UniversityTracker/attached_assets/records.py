@@ -0,0 +1,170 @@
+"""
+Compact record types for rows read by DatabaseManager.
+
+Records keep their values in __slots__ instead of a per-row dict, which
+makes large result sets smaller and faster to build. They still behave like
+the dictionaries the rest of the application was written against:
+exam['grade'], exam.get('notes'), dict(exam) and iteration over keys all
+work. Attribute access (exam.grade) is the fastest way to read a value;
+string indexing goes through a Python-level __getitem__ and is slower than
+on a dict.
+"""
+
+
+class Record:
+    """Base class for slot-based rows with dict-compatible access."""
+
+    __slots__ = ()
+
+    # Column names, in table order; set by each subclass
+    _fields = ()
+    _field_set = frozenset()
+
+    def __init__(self, *values):
+        for name, value in zip(self._fields, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def row_factory(cls, description):
+        """
+        Return an sqlite3 row factory building records of this type.
+
+        Args:
+            description (tuple): cursor.description of the query
+
+        Returns:
+            callable: Row factory for cursor.row_factory
+        """
+        columns = tuple(column[0] for column in description)
+        if columns == cls._fields:
+            # SELECT * in table order: values map straight onto the slots
+            return lambda cursor, row: cls(*row)
+
+        # Other column orders; missing columns are None, extra ones dropped
+        positions = [columns.index(name) if name in columns else None for name in cls._fields]
+        return lambda cursor, row: cls(*(None if i is None else row[i] for i in positions))
+
+    # Mapping protocol, so existing dict-based callers keep working.
+    # Keys are checked against the columns first, so method and class
+    # attribute names ('keys', 'get', ...) are not mistaken for columns;
+    # __getitem__ sits in every hot loop, so columns then take a plain getattr.
+    def __getitem__(self, key):
+        try:
+            if key in self._field_set:
+                return getattr(self, key)
+        except TypeError:
+            pass  # Unhashable key
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self._field_set:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self._field_set
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def get(self, key, default=None):
+        """Return the value of a column, or default if there is no such column."""
+        try:
+            if key in self._field_set:
+                return getattr(self, key)
+        except TypeError:
+            pass  # Unhashable key
+        return default
+
+    def keys(self):
+        """Return the column names."""
+        return self._fields
+
+    def values(self):
+        """Return the column values, in column order."""
+        return [getattr(self, name) for name in self._fields]
+
+    def items(self):
+        """Return (column, value) pairs, in column order."""
+        return [(name, getattr(self, name)) for name in self._fields]
+
+    def to_dict(self):
+        """Return a plain dict copy of the record."""
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return type(self) is type(other) and self.values() == other.values()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None  # Mutable, like the dicts records replace
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({values})"
+
+
+class Exam(Record):
+    """A row of the exams table."""
+
+    __slots__ = _fields = ('id', 'name', 'credits', 'grade', 'status', 'date', 'notes',
+                           'created_at', 'updated_at')
+    _field_set = frozenset(_fields)
+
+    def __init__(self, id, name, credits, grade, status, date, notes, created_at, updated_at):
+        self.id = id
+        self.name = name
+        self.credits = credits
+        self.grade = grade
+        self.status = status
+        self.date = date
+        self.notes = notes
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+
+class CalendarEvent(Record):
+    """A row of the calendar_events table."""
+
+    __slots__ = _fields = ('id', 'exam_id', 'title', 'event_type', 'start_date', 'end_date',
+                           'all_day', 'location', 'description', 'color',
+                           'created_at', 'updated_at')
+    _field_set = frozenset(_fields)
+
+    def __init__(self, id, exam_id, title, event_type, start_date, end_date, all_day,
+                 location, description, color, created_at, updated_at):
+        self.id = id
+        self.exam_id = exam_id
+        self.title = title
+        self.event_type = event_type
+        self.start_date = start_date
+        self.end_date = end_date
+        self.all_day = all_day
+        self.location = location
+        self.description = description
+        self.color = color
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+
+class AcademicSession(Record):
+    """A row of the academic_sessions table."""
+
+    __slots__ = _fields = ('id', 'name', 'start_date', 'end_date', 'color', 'description',
+                           'created_at', 'updated_at')
+    _field_set = frozenset(_fields)
+
+    def __init__(self, id, name, start_date, end_date, color, description, created_at, updated_at):
+        self.id = id
+        self.name = name
+        self.start_date = start_date
+        self.end_date = end_date
+        self.color = color
+        self.description = description
+        self.created_at = created_at
+        self.updated_at = updated_at
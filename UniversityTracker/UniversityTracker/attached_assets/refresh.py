@@ -0,0 +1,86 @@
+"""
+Coalesced refreshes of the main window tabs.
+
+Tabs report their edits through signals (exams_updated, examUpdated,
+data_imported) and every other tab used to refresh synchronously on each
+one, so a burst of edits, or one edit echoed by a second signal, ran
+several refresh cascades. RefreshCoordinator collects the requests
+instead: a tab is refreshed once after the burst settles, and only if it
+is visible; hidden tabs are marked dirty and refreshed when shown.
+"""
+
+import time
+
+from PyQt5.QtCore import QObject, QTimer
+
+# Quiet period after the last request before the refresh runs
+REFRESH_DEBOUNCE_MS = 50
+
+# Longest a request waits while new ones keep arriving
+REFRESH_MAX_DELAY_MS = 250
+
+
+class RefreshCoordinator(QObject):
+    """Debounces, deduplicates and defers apply_changes() calls on tab widgets."""
+
+    def __init__(self, tab_widget, parent=None, debounce_ms=REFRESH_DEBOUNCE_MS,
+                 max_delay_ms=REFRESH_MAX_DELAY_MS):
+        """
+        Args:
+            tab_widget (QTabWidget): Tabs whose pages contain the widgets
+            parent (QObject, optional): Parent object
+            debounce_ms (int): Quiet period before pending refreshes run
+            max_delay_ms (int): Longest a pending refresh is postponed
+        """
+        super().__init__(parent)
+        self.tab_widget = tab_widget
+        self.debounce_ms = debounce_ms
+        self.max_delay_ms = max_delay_ms
+
+        # Widgets waiting for the timer, and hidden widgets waiting to be shown
+        self.pending = set()
+        self.dirty = set()
+        self._deadline = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+        tab_widget.currentChanged.connect(self.tab_shown)
+
+    def request(self, widgets):
+        """
+        Schedule a refresh of some widgets.
+
+        Args:
+            widgets (iterable): Widgets with an apply_changes() method; None
+                entries (tabs not built yet) are ignored
+        """
+        self.pending.update(widget for widget in widgets if widget is not None)
+        if not self.pending:
+            return
+
+        now = time.monotonic()
+        if not self.timer.isActive():
+            self._deadline = now + self.max_delay_ms / 1000
+        remaining = max(0, int((self._deadline - now) * 1000))
+        self.timer.start(min(self.debounce_ms, remaining))
+
+    def flush(self):
+        """Refresh the pending visible widgets now and mark the hidden ones dirty."""
+        self.timer.stop()
+        pending, self.pending = self.pending, set()
+        for widget in pending:
+            if widget.isVisible():
+                self.dirty.discard(widget)
+                widget.apply_changes()
+            else:
+                self.dirty.add(widget)
+
+    def tab_shown(self, index):
+        """Refresh the dirty widgets on the tab that was just selected."""
+        page = self.tab_widget.widget(index)
+        if page is None:
+            return
+        for widget in [widget for widget in self.dirty if page.isAncestorOf(widget)]:
+            self.dirty.discard(widget)
+            widget.apply_changes()
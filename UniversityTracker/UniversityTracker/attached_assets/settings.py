@@ -1,16 +1,39 @@
+import threading
+
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
                              QFormLayout, QLineEdit, QSpinBox, QGroupBox, QMessageBox,
-                             QFileDialog)
-from PyQt5.QtCore import Qt
+                             QFileDialog, QCheckBox, QProgressDialog, QInputDialog)
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
 
+from backup import BackupCancelled
+from database import DatabaseManager
+from db_worker import AsyncDatabase
+from merge import DEFAULT_MERGE_POLICY, MergeCancelled
+
+# Choices offered for merge.MERGE_POLICIES when importing
+IMPORT_POLICY_LABELS = {
+    'newer': "Keep the most recently updated version",
+    'replace': "Use the imported version",
+    'skip': "Keep my current version",
+}
+
 
 class SettingsWidget(QWidget):
     """Widget for application settings."""
     
-    def __init__(self, db_manager):
+    # Emitted after an import has been merged into the database
+    data_imported = pyqtSignal()
+    
+    # Emitted from the database worker while an export/import runs: done, total steps
+    _backup_progress = pyqtSignal(int, int)
+    
+    def __init__(self, db_manager, async_db=None):
         super(SettingsWidget, self).__init__()
         self.db_manager = db_manager
+        self.async_db = async_db or AsyncDatabase(db_manager, threaded=False, parent=self)
+        self.backup_dialog = None
+        self._backup_progress.connect(self.update_backup_progress)
         self.init_ui()
         self.load_settings()
         
@@ -88,6 +111,9 @@ class SettingsWidget(QWidget):
         
         data_layout.addLayout(export_import_layout)
         
+        self.compact_export_checkbox = QCheckBox("Compact export (smaller file, no progress)")
+        data_layout.addWidget(self.compact_export_checkbox)
+        
         # Add reset button
         reset_layout = QHBoxLayout()
         reset_layout.addStretch()
@@ -123,14 +149,14 @@ class SettingsWidget(QWidget):
         """Load settings from database into UI elements."""
         # Degree settings
         degree_name = self.db_manager.get_setting('degree_name', 'Computer Science')
-        total_credits = int(self.db_manager.get_setting('total_credits', 180))
+        total_credits = self.db_manager.get_int('total_credits', 180)
         
         # Grading system
-        max_grade = int(self.db_manager.get_setting('max_grade', 30))
-        pass_threshold = int(self.db_manager.get_setting('pass_threshold', 18))
+        max_grade = self.db_manager.get_int('max_grade', 30)
+        pass_threshold = self.db_manager.get_int('pass_threshold', 18)
         
         # Target settings
-        target_average = int(self.db_manager.get_setting('target_average', 100))
+        target_average = self.db_manager.get_int('target_average', 100)
         
         # Set values in UI
         self.degree_name_input.setText(degree_name)
@@ -154,82 +180,124 @@ class SettingsWidget(QWidget):
         pass_threshold = self.pass_threshold_input.value()
         target_average = self.target_average_input.value()
         
-        # Save to database
-        self.db_manager.update_setting('degree_name', degree_name)
-        self.db_manager.update_setting('total_credits', str(total_credits))
-        self.db_manager.update_setting('max_grade', str(max_grade))
-        self.db_manager.update_setting('pass_threshold', str(pass_threshold))
-        self.db_manager.update_setting('target_average', str(target_average))
+        # Save to database in a single commit
+        self.db_manager.update_settings({
+            'degree_name': degree_name,
+            'total_credits': str(total_credits),
+            'max_grade': str(max_grade),
+            'pass_threshold': str(pass_threshold),
+            'target_average': str(target_average)
+        })
         
         QMessageBox.information(self, "Settings Saved", 
                               "Your settings have been saved successfully.")
         
     def export_data(self):
-        """Export database to a file."""
-        try:
-            file_path, _ = QFileDialog.getSaveFileName(
-                self, "Export Data", "", "SQLite Database (*.db);;All Files (*)")
-                
-            if file_path:
-                import sqlite3
-                import shutil
-                
-                # Get current database path
-                dbconn = self.db_manager.conn
-                src_path = dbconn.execute("PRAGMA database_list").fetchone()[2]
-                
-                # Copy database file
-                shutil.copy2(src_path, file_path)
-                
-                QMessageBox.information(self, "Export Successful", 
-                                      f"Data exported successfully to {file_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Export Failed", 
-                               f"Failed to export data: {str(e)}")
+        """Export the database to a file."""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export Data", "", "SQLite Database (*.db);;All Files (*)")
+            
+        if file_path:
+            # Online backup on the database worker: consistent even with
+            # uncheckpointed WAL changes, and the UI stays responsive
+            self.run_backup(
+                "Exporting data...", DatabaseManager.export_database, file_path,
+                compact=self.compact_export_checkbox.isChecked(),
+                callback=lambda result: QMessageBox.information(
+                    self, "Export Successful", f"Data exported successfully to {file_path}"),
+                operation="Export")
         
     def import_data(self):
-        """Import database from a file."""
-        try:
-            file_path, _ = QFileDialog.getOpenFileName(
-                self, "Import Data", "", "SQLite Database (*.db);;All Files (*)")
-                
-            if file_path:
-                reply = QMessageBox.question(
-                    self, 'Confirm Import',
-                    "Importing data will replace your current data. Continue?",
-                    QMessageBox.Yes | QMessageBox.No, 
-                    QMessageBox.No
-                )
+        """Merge the exams, events and sessions of another database file."""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Import Data", "", "SQLite Database (*.db);;All Files (*)")
+            
+        if file_path:
+            labels = list(IMPORT_POLICY_LABELS.values())
+            label, ok = QInputDialog.getItem(
+                self, 'Import Data',
+                "Imported exams and events are added to your current data.\n"
+                "When the same exam or event exists in both with different details:",
+                labels, labels.index(IMPORT_POLICY_LABELS[DEFAULT_MERGE_POLICY]), False)
                 
-                if reply == QMessageBox.Yes:
-                    import sqlite3
-                    import shutil
-                    
-                    # Close current connection
-                    self.db_manager.close()
-                    
-                    # Get current database path
-                    import os
-                    documents_folder = os.path.join(os.path.expanduser("~"), "Documents")
-                    app_folder = os.path.join(documents_folder, "UniversityCareerManager")
-                    db_path = os.path.join(app_folder, "university_career.db")
+            if ok:
+                policy = next(key for key, value in IMPORT_POLICY_LABELS.items() if value == label)
+                # Merged in one transaction on the database worker; a
+                # cancelled import leaves the current data untouched
+                self.run_backup(
+                    "Importing data...", DatabaseManager.merge_database, file_path, policy=policy,
+                    callback=self.import_finished, operation="Import")
                     
-                    # Copy imported database file
-                    shutil.copy2(file_path, db_path)
-                    
-                    # Reopen connection
-                    self.db_manager.conn = sqlite3.connect(db_path)
-                    self.db_manager.conn.row_factory = sqlite3.Row
-                    self.db_manager.cursor = self.db_manager.conn.cursor()
-                    
-                    # Refresh UI
-                    self.load_settings()
-                    
-                    QMessageBox.information(self, "Import Successful", 
-                                         "Data imported successfully. Please restart the application.")
-        except Exception as e:
-            QMessageBox.critical(self, "Import Failed", 
-                              f"Failed to import data: {str(e)}")
+    def import_finished(self, report):
+        """Report what an import merged and let the other tabs pick it up."""
+        lines = []
+        for table, title in (('exams', "Exams"), ('calendar_events', "Calendar events"),
+                             ('academic_sessions', "Academic sessions")):
+            counts = report[table]
+            lines.append(f"{title}: {counts['inserted']} added, {counts['updated']} updated, "
+                         f"{counts['unchanged']} unchanged, {counts['skipped']} kept as they were")
+                         
+        self.data_imported.emit()
+        
+        QMessageBox.information(self, "Import Successful", 
+                             "Data imported successfully.\n\n" + "\n".join(lines))
+        
+    def run_backup(self, label, func, *args, callback=None, operation="Export", **kwargs):
+        """
+        Run an export or import on the database worker behind a progress dialog.
+        
+        Args:
+            label (str): Text shown in the progress dialog
+            func (callable): DatabaseManager method taking progress and cancel
+                (export_database, import_database or merge_database)
+            callback (callable, optional): Receives the result on success
+            operation (str): "Export" or "Import", used in the failure messages
+        """
+        cancel = threading.Event()
+        
+        self.backup_dialog = QProgressDialog(label, "Cancel", 0, 0, self)
+        self.backup_dialog.setWindowModality(Qt.WindowModal)
+        self.backup_dialog.setMinimumDuration(0)
+        self.backup_dialog.setAutoClose(False)
+        self.backup_dialog.canceled.connect(cancel.set)
+        self.backup_dialog.show()
+        
+        self.export_button.setEnabled(False)
+        self.import_button.setEnabled(False)
+        
+        def finished(result):
+            self.finish_backup()
+            if callback is not None:
+                callback(result)
+                
+        def failed(error):
+            self.finish_backup()
+            if isinstance(error, (BackupCancelled, MergeCancelled)):
+                QMessageBox.information(self, f"{operation} Cancelled",
+                                        f"The {operation.lower()} was cancelled. No changes were made.")
+            else:
+                QMessageBox.critical(self, f"{operation} Failed",
+                                     f"Failed to {operation.lower()} data: {str(error)}")
+                
+        self.async_db.call(func, *args, progress=self._backup_progress.emit, cancel=cancel,
+                           callback=finished, errback=failed, **kwargs)
+        
+    def update_backup_progress(self, copied, total):
+        """Show export/import progress; a total of 0 shows a busy indicator."""
+        if self.backup_dialog is not None:
+            self.backup_dialog.setMaximum(total)
+            self.backup_dialog.setValue(copied)
+            
+    def finish_backup(self):
+        """Close the progress dialog and re-enable the data buttons."""
+        if self.backup_dialog is not None:
+            # Closing a QProgressDialog emits canceled; the job is over anyway
+            self.backup_dialog.canceled.disconnect()
+            self.backup_dialog.close()
+            self.backup_dialog = None
+            
+        self.export_button.setEnabled(True)
+        self.import_button.setEnabled(True)
         
     def reset_data(self):
         """Reset all data in the database."""
@@ -274,6 +342,7 @@ class SettingsWidget(QWidget):
                         ''', (key, value))
                         
                     self.db_manager.conn.commit()
+                    self.db_manager.invalidate_settings_cache()
                     
                     # Reload settings
                     self.load_settings()
@@ -7,6 +7,7 @@ setup(
     install_requires=[
         "PyQt5",
         "matplotlib",
+        "numpy",
     ],
     package_data={
         "": ["assets/*"],
@@ -0,0 +1,83 @@
+"""
+Startup timing for the main window.
+
+Run the application with UCM_STARTUP_PROFILE=1 to print how long each
+startup step took (module imports, database opening, tab construction,
+first paint), measured from when the main module started importing.
+"""
+
+import importlib
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# Environment variable enabling the startup report
+PROFILE_ENV = 'UCM_STARTUP_PROFILE'
+
+
+class StartupProfile:
+    """Collects timed startup steps and prints them as a table."""
+
+    def __init__(self, started=None, enabled=None):
+        """
+        Args:
+            started (float, optional): time.perf_counter() value startup is
+                measured from; defaults to now
+            enabled (bool, optional): Whether to collect and report steps;
+                defaults to whether PROFILE_ENV is set
+        """
+        self.started = time.perf_counter() if started is None else started
+        self.enabled = bool(os.environ.get(PROFILE_ENV)) if enabled is None else enabled
+        # (name, duration in ms or None, elapsed since start in ms)
+        self.steps = []
+
+    def _record(self, name, duration):
+        if self.enabled:
+            elapsed = (time.perf_counter() - self.started) * 1000
+            self.steps.append((name, duration, elapsed))
+
+    def mark(self, name):
+        """Record that startup reached a point, e.g. the first paint."""
+        self._record(name, None)
+
+    @contextmanager
+    def step(self, name):
+        """Time the body of a with statement as one step."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, (time.perf_counter() - start) * 1000)
+
+    def import_module(self, name):
+        """
+        Import a module, timing it as a step.
+
+        The step also reports how many modules the import loaded, which
+        shows where heavy dependencies such as matplotlib come in.
+
+        Args:
+            name (str): Module name
+
+        Returns:
+            module: The imported module
+        """
+        loaded = len(sys.modules)
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        self._record(f"import {name} (+{len(sys.modules) - loaded} modules)",
+                     (time.perf_counter() - start) * 1000)
+        return module
+
+    def report(self, file=None):
+        """Print the recorded steps, if profiling is enabled."""
+        if not self.enabled:
+            return
+        file = file or sys.stderr
+        print("Startup profile (ms):", file=file)
+        print(f"  {'step':<52} {'took':>8} {'at':>8}", file=file)
+        for name, duration, elapsed in self.steps:
+            took = '' if duration is None else f"{duration:.1f}"
+            print(f"  {name:<52} {took:>8} {elapsed:8.1f}", file=file)
+        print(f"  matplotlib loaded: {'matplotlib' in sys.modules}", file=file)
@@ -0,0 +1,57 @@
+"""Tests for DatabaseManager.merge_database."""
+
+import pytest
+
+from database import DatabaseManager
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """A main database and a source database to merge from."""
+    main = DatabaseManager(str(tmp_path / "main.db"))
+    source = DatabaseManager(str(tmp_path / "source.db"))
+    yield main, source
+    main.close()
+    source.close()
+
+
+def _exam_names(db):
+    return sorted(exam['name'] for exam in db.get_all_exams())
+
+
+def test_merge_inserts_new_rows(databases):
+    main, source = databases
+    main.add_exam("Analisi", 9, 28, 'passed', '2024-01-15')
+    source.add_exam("Analisi", 9, 28, 'passed', '2024-01-15')
+    source.add_exam("Fisica", 6, None, 'planned', '2024-06-10')
+    source.add_calendar_event("Esame Fisica", 'exam', '2024-06-10T09:00:00', '2024-06-10T12:00:00')
+
+    report = main.merge_database(source.db_path)
+
+    assert _exam_names(main) == ["Analisi", "Fisica"]
+    assert report['exams']['inserted'] == 1
+    assert report['exams']['unchanged'] == 1
+    assert report['calendar_events']['inserted'] == 1
+    assert not main.conn.in_transaction
+
+    # Merging the same source again changes nothing
+    report = main.merge_database(source.db_path)
+    assert report['exams']['inserted'] == 0
+    assert _exam_names(main) == ["Analisi", "Fisica"]
+
+
+def test_merge_refuses_to_run_inside_a_transaction(databases):
+    main, source = databases
+    source.add_exam("Fisica", 6, None, 'planned', '2024-06-10')
+
+    with pytest.raises(ZeroDivisionError):
+        with main.transaction():
+            main.add_exam("Y", 6)
+            with pytest.raises(RuntimeError):
+                main.merge_database(source.db_path)
+            1 / 0
+
+    # The caller's pending write was rolled back, not committed by the merge
+    assert _exam_names(main) == []
+    attached = [row[1] for row in main.conn.execute("PRAGMA database_list")]
+    assert attached == ['main']
@@ -0,0 +1,36 @@
+"""Tests for the dict-compatible record types."""
+
+import pytest
+
+from records import Exam
+
+
+def _exam():
+    return Exam(1, "Analisi", 9, 28, 'passed', '2024-01-15', None,
+                '2024-01-01T00:00:00', '2024-01-15T00:00:00')
+
+
+def test_columns_read_like_a_dict():
+    exam = _exam()
+    assert exam['grade'] == 28
+    assert exam.get('notes', 'none') is None
+    assert dict(exam)['name'] == "Analisi"
+
+
+def test_method_names_are_not_columns():
+    exam = _exam()
+    with pytest.raises(KeyError):
+        exam['keys']
+    with pytest.raises(KeyError):
+        exam['_fields']
+    assert exam.get('get') is None
+    assert exam.get('values', 'missing') == 'missing'
+
+
+def test_unknown_and_unhashable_keys():
+    exam = _exam()
+    with pytest.raises(KeyError):
+        exam['missing']
+    with pytest.raises(KeyError):
+        exam[['id']]
+    assert exam.get(['id'], 0) == 0
@@ -0,0 +1,124 @@
+"""
+Grade trend series for the analytics charts.
+
+Every series is computed from prefix sums in O(n), and long series can be
+reduced with Largest-Triangle-Three-Buckets (LTTB) downsampling, which
+keeps the visual shape (peaks and dips included) of a line with a fixed
+number of points, so plotting cost does not grow with the exam history.
+"""
+
+import numpy as np
+
+# Most points drawn per series; longer series are downsampled with lttb()
+TREND_MAX_POINTS = 1000
+
+# Default number of exams averaged by rolling_average()
+DEFAULT_ROLLING_WINDOW = 5
+
+
+def cumulative_average(grades):
+    """
+    Average of the first 1, 2, ..., n grades.
+
+    Args:
+        grades (array-like): Grades in chronological order
+
+    Returns:
+        numpy.ndarray: Cumulative average after each exam
+    """
+    grades = np.asarray(grades, dtype=np.float64)
+    return np.cumsum(grades) / np.arange(1, len(grades) + 1)
+
+
+def weighted_cumulative_average(grades, credits):
+    """
+    Credit-weighted average of the first 1, 2, ..., n grades.
+
+    Args:
+        grades (array-like): Grades in chronological order
+        credits (array-like): Credits of the same exams
+
+    Returns:
+        numpy.ndarray: Weighted cumulative average after each exam (NaN
+            while the credits seen so far add up to 0)
+    """
+    grades = np.asarray(grades, dtype=np.float64)
+    credits = np.asarray(credits, dtype=np.float64)
+    total_credits = np.cumsum(credits)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.cumsum(grades * credits) / total_credits
+
+
+def rolling_average(grades, window=DEFAULT_ROLLING_WINDOW):
+    """
+    Average of the last `window` grades at each exam.
+
+    The first window - 1 points average the exams available so far.
+
+    Args:
+        grades (array-like): Grades in chronological order
+        window (int): Number of exams averaged
+
+    Returns:
+        numpy.ndarray: Rolling average after each exam
+    """
+    if window < 1:
+        raise ValueError("window must be at least 1")
+
+    grades = np.asarray(grades, dtype=np.float64)
+    sums = np.concatenate(([0.0], np.cumsum(grades)))
+    ends = np.arange(1, len(grades) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (sums[ends] - sums[starts]) / (ends - starts)
+
+
+def lttb(x, y, threshold=TREND_MAX_POINTS):
+    """
+    Downsample a line with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept; the points in between are
+    split into threshold - 2 buckets and each bucket keeps the point that
+    forms the largest triangle with the previously kept point and the
+    average of the next bucket.
+
+    Args:
+        x (array-like): Increasing x coordinates
+        y (array-like): y coordinates
+        threshold (int): Number of points to keep
+
+    Returns:
+        numpy.ndarray: Indices of the kept points, in increasing order
+            (every index if the line has no more than threshold points)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    count = len(x)
+
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+
+    # Bucket i covers [edges[i], edges[i + 1]) of the inner points
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.int64)
+
+    # Average of every bucket, from prefix sums; the last point stands
+    # in for the bucket after the final one
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = edges[1:] - edges[:-1]
+    next_x = np.append((x_sums[edges[2:]] - x_sums[edges[1:-1]]) / sizes[1:], x[-1])
+    next_y = np.append((y_sums[edges[2:]] - y_sums[edges[1:-1]]) / sizes[1:], y[-1])
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = count - 1
+    previous = 0
+
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Twice the triangle area; the factor does not change the argmax
+        areas = np.abs((x[previous] - next_x[bucket]) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y[bucket] - y[previous]))
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+
+    return kept